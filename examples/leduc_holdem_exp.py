@@ -9,7 +9,7 @@ from rlcard.agents.cfr_agent import CFRAgent
 from rlcard.agents.cfr_agent import CFRAgent
 from rlcard import models
 from rlcard.utils.utils import set_global_seed, tournament
-from rlcard.utils.exploitability import exploitability
+from rlcard.utils.exploitability import exploitability, exact_exploitability
 from rlcard.utils.logger import Logger
 
 # Make environment and enable human mode
@@ -51,6 +51,8 @@ for episode in range(episode_num):
     if episode % evaluate_every == 0:
         exp = exploitability(eval_env, opponent, evaluate_num)
         print("Eploitability:", exp)
+        # The exact exploitability of the average policy. The game tree is compiled once and cached
+        print("Exact exploitability:", exact_exploitability(eval_env, opponent.average_policy, cache_path='./experiments/leduc_holdem_tree.pkl'))
         #logger.log_performance(env.timestep, tournament(eval_env, evaluate_num)[0])
 
 # Close files in the logger
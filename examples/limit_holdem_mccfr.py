@@ -0,0 +1,48 @@
+''' An example of solve Limit Texas Hold'em with Monte Carlo CFR (external sampling)
+'''
+import numpy as np
+
+import rlcard
+from rlcard.agents import MCCFRAgent
+from rlcard.agents import RandomAgent
+from rlcard.utils import set_global_seed, tournament
+from rlcard.utils import Logger
+
+# Make environment
+env = rlcard.make('limit-holdem', config={'seed': 0, 'allow_step_back':True})
+eval_env = rlcard.make('limit-holdem', config={'seed': 0})
+
+# Set the iterations numbers and how frequently we evaluate the performance and save model
+evaluate_every = 1000
+evaluate_num = 10000
+episode_num = 100000
+
+# The paths for saving the logs and learning curves
+log_dir = './experiments/limit_holdem_mccfr_result/'
+
+# Set a global seed
+set_global_seed(0)
+
+# Initilize MCCFR Agent. Use sampling='outcome' for cheaper iterations
+agent = MCCFRAgent(env, sampling='external')
+agent.load()  # If we have saved model, we first load the model
+
+# Evaluate MCCFR against a random agent
+eval_env.set_agents([agent, RandomAgent(action_num=eval_env.action_num)])
+
+# Init a Logger to plot the learning curve
+logger = Logger(log_dir)
+
+for episode in range(episode_num):
+    agent.train()
+    print('\rIteration {} ({:.1f} iterations/s)'.format(episode, agent.iterations_per_second), end='')
+    # Evaluate the performance. Play with a random agent.
+    if episode % evaluate_every == 0:
+        agent.save() # Save model
+        logger.log_performance(env.timestep, tournament(eval_env, evaluate_num)[0])
+
+# Close files in the logger
+logger.close_files()
+
+# Plot the learning curve
+logger.plot('MCCFR')
@@ -77,7 +77,7 @@ class BRAgent():
             self.infosets = collections.defaultdict(list)
             probs = np.ones(self.env.player_num)
             self.traverse_tree(probs, this_player)
-            action = self.best_response_action(this_player, state['obs'].tostring())
+            action = self.best_response_action(this_player, get_state_key(state))
             q_val = self.get_q_value(action, [0.0, 0.0])
             return q_val[this_player]
         else:
@@ -164,7 +164,7 @@ class BRAgent():
         self.tmp_state = state['obs']
         obs, legal_act = self.get_state(this_player)
         self.traverse_tree(probs, this_player)
-        act = self.best_response_action(this_player, state['obs'].tostring())
+        act = self.best_response_action(this_player, get_state_key(state))
         return act, []
 
     def get_state(self, player_id):
@@ -179,7 +179,7 @@ class BRAgent():
                 legal_actions (list): Indices of legal actions
         '''
         state = self.env.get_state(player_id)
-        return state['obs'].tostring(), state['legal_actions']
+        return get_state_key(state), state['legal_actions']
 
     def save(self):
         ''' Save model
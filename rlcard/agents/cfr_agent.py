@@ -1,37 +1,99 @@
 import numpy as np
-import collections
 
 import os
 import pickle
 
 from rlcard.utils.utils import *
+from rlcard.utils.infoset_table import InfosetTable
+from rlcard.utils.cfr_checkpoint import save_checkpoint, CFRCheckpoint
+
+UPDATE_RULES = ['vanilla', 'cfr+', 'linear', 'dcfr']
 
 class CFRAgent():
-    ''' Implement CFR (chance sampling) algorithm
+    ''' Implement CFR (chance sampling) algorithm. The regrets and the
+        average policy can be updated with the rule of vanilla CFR, CFR+,
+        Linear CFR or Discounted CFR
     '''
 
-    def __init__(self, env, model_path='./cfr_model'):
+    def __init__(self, env, model_path='./cfr_model', update_rule='vanilla', alpha=1.5, beta=0.0, gamma=2.0,
+                 prune_threshold=None, prune_warmup=0, explore_every=10):
         ''' Initilize Agent
 
         Args:
             env (Env): Env class
+            model_path (str): The path to save and load the model
+            update_rule (str): One of the following
+              'vanilla': The average policy is weighted by the iteration
+              'cfr+': The regrets are floored at zero after the traversal of
+                each player, and the policy is updated in turn (alternating updates)
+              'linear': The regrets and the average policy of iteration t are
+                weighted by t. It is the same as 'dcfr' with alpha=beta=gamma=1
+              'dcfr': Discounted CFR. After iteration t, the positive regrets
+                are multiplied by t^alpha/(t^alpha+1), the negative regrets by
+                t^beta/(t^beta+1) and the average policy by (t/(t+1))^gamma
+            alpha (float): The discount exponent of positive regrets in DCFR
+            beta (float): The discount exponent of negative regrets in DCFR
+            gamma (float): The discount exponent of the average policy in DCFR
+            prune_threshold (float): If set, regret-based pruning is enabled. At
+              the nodes of the traverser, the subtrees of the actions whose
+              regrets are below the threshold and whose probabilities are zero
+              are not traversed. The threshold should be negative
+            prune_warmup (int): No subtree is pruned in the first prune_warmup iterations
+            explore_every (int): Every explore_every-th iteration traverses all
+              the subtrees, so that the regrets of the pruned actions can recover
         '''
+        if update_rule not in UPDATE_RULES:
+            raise ValueError('Unknown update rule {}, should be one of {}'.format(update_rule, UPDATE_RULES))
         self.use_raw = False
         self.env = env
         self.model_path = model_path
+        self.update_rule = update_rule
+        if update_rule == 'linear':
+            alpha, beta, gamma = 1.0, 1.0, 1.0
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.prune_threshold = prune_threshold
+        self.prune_warmup = prune_warmup
+        self.explore_every = explore_every
+
+        # The numbers of the visited nodes and the pruned subtrees
+        self.visited_nodes = 0
+        self.pruned_subtrees = 0
+
+        # The state_str of each information set is interned to an integer ID,
+        # and the regrets, the average policy and the policy are rows of arrays
+        self.table = InfosetTable(self.env.action_num)
+
+        # The memory-mapped checkpoint of an evaluation-only agent
+        self.checkpoint = None
 
-        # A policy is a dict state_str -> action probabilities
-        self.policy = collections.defaultdict(list)
-        self.average_policy = collections.defaultdict(np.array)
+        self.iteration = 0
 
-        # Regret is a dict state_str -> action regrets
-        self.regrets = collections.defaultdict(np.array)
+    @property
+    def policy(self):
+        ''' A dict-like view state_str -> action probabilities
+        '''
+        return self.table.view('policy')
 
-        self.iteration = 0
+    @property
+    def average_policy(self):
+        ''' A dict-like view state_str -> unnormalized average action probabilities
+        '''
+        if self.checkpoint is not None:
+            return self.checkpoint.view('strategy_sums')
+        return self.table.view('strategy_sums')
+
+    @property
+    def regrets(self):
+        ''' A dict-like view state_str -> action regrets
+        '''
+        return self.table.view('regrets')
 
     def train(self):
         ''' Do one iteration of CFR
         '''
+        self._check_trainable()
         self.iteration += 1
         # Firstly, traverse tree to compute counterfactual regret for each player
         # The regrets are recorded in traversal
@@ -40,28 +102,98 @@ class CFRAgent():
             probs = np.ones(self.env.player_num)
             self.traverse_tree(probs, player_id)
 
+            # CFR+ updates the policy right after the traversal of each player
+            if self.update_rule == 'cfr+':
+                self.table.floor_regrets()
+                self.update_policy()
+
+        if self.update_rule in ['linear', 'dcfr']:
+            self.discount()
+
         # Update policy
-        self.update_policy()
+        if self.update_rule != 'cfr+':
+            self.update_policy()
+
+    def _check_trainable(self):
+        ''' Raise an error if the agent is loaded with eval_only. Its table
+            is not the loaded model, so it must not be trained or saved
+        '''
+        if self.checkpoint is not None:
+            raise ValueError('The agent is loaded with eval_only=True, it can not be trained or saved')
+
+    def discount(self):
+        ''' Discount the regrets and the average policy after an iteration of
+            Linear CFR or DCFR
+        '''
+        t = float(self.iteration)
+        positive_weight = t ** self.alpha / (t ** self.alpha + 1)
+        negative_weight = t ** self.beta / (t ** self.beta + 1)
+        strategy_weight = (t / (t + 1)) ** self.gamma
+        self.table.discount(positive_weight, negative_weight, strategy_weight)
+
+    @property
+    def pruning(self):
+        ''' True if the subtrees can be pruned in the current iteration
+        '''
+        return (self.prune_threshold is not None
+                and self.iteration > self.prune_warmup
+                and self.iteration % self.explore_every != 0)
+
+    def explored_actions(self, infoset_id, legal_actions, action_probs):
+        ''' Get the actions to traverse at a node of the traverser. The actions
+            with zero probabilities do not change the utility of the node, so
+            their subtrees are pruned when their regrets are below the threshold.
+
+        Args:
+            infoset_id (int): The ID of the information set
+            legal_actions (list): Indices of legal actions
+            action_probs (numpy.array): The action probabilities
 
-    def traverse_tree(self, probs, player_id):
+        Returns:
+            (list): The actions to traverse
+        '''
+        if not self.pruning:
+            return legal_actions
+        regrets = self.table.regrets[infoset_id]
+        explored_actions = [action for action in legal_actions
+                            if action_probs[action] > 0 or regrets[action] >= self.prune_threshold]
+        self.pruned_subtrees += len(legal_actions) - len(explored_actions)
+        return explored_actions
+
+    def traverse_tree(self, probs, player_id, chance_prob=1.0):
         ''' Traverse the game tree, update the regrets
 
         Args:
             probs: The reach probability of the current node
             player_id: The player to update the value
+            chance_prob: The reach probability of the chance events, if the
+              env is made with chance_nodes. All the outcomes of the chance
+              nodes are traversed, which is vanilla CFR without sampling
 
         Returns:
             state_utilities (list): The expected utilities for all the players
         '''
+        self.visited_nodes += 1
         if self.env.is_over():
             return self.env.get_payoffs()
 
+        if self.env.is_chance_node():
+            state_utility = np.zeros(self.env.player_num)
+            for outcome, outcome_prob in self.env.get_chance_outcomes():
+                self.env.step_chance(outcome)
+                state_utility += outcome_prob * self.traverse_tree(probs, player_id, chance_prob * outcome_prob)
+                self.env.step_back()
+            return state_utility
+
         current_player = self.env.get_player_id()
 
-        action_utilities = {}
+        action_utilities = np.zeros((self.env.action_num, self.env.player_num))
         state_utility = np.zeros(self.env.player_num)
         obs, legal_actions = self.get_state(current_player)
-        action_probs = self.action_probs(obs, legal_actions, self.policy)
+        infoset_id = self.table.get_id(obs)
+        action_probs = remove_illegal(self.table.policy[infoset_id], legal_actions)
+        if current_player == player_id:
+            legal_actions = self.explored_actions(infoset_id, legal_actions, action_probs)
 
         for action in legal_actions:
             action_prob = action_probs[action]
@@ -70,7 +202,7 @@ class CFRAgent():
 
             # Keep traversing the child state
             self.env.step(action)
-            utility = self.traverse_tree(new_probs, player_id)
+            utility = self.traverse_tree(new_probs, player_id, chance_prob)
             self.env.step_back()
 
             state_utility += action_prob * utility
@@ -82,26 +214,23 @@ class CFRAgent():
         # If it is current player, we record the policy and compute regret
         player_prob = probs[current_player]
         counterfactual_prob = (np.prod(probs[:current_player]) *
-                                np.prod(probs[current_player + 1:]))
+                                np.prod(probs[current_player + 1:]) * chance_prob)
         player_state_utility = state_utility[current_player]
 
-        if obs not in self.regrets:
-            self.regrets[obs] = np.zeros(self.env.action_num)
-        if obs not in self.average_policy:
-            self.average_policy[obs] = np.zeros(self.env.action_num)
-        for action in legal_actions:
-            action_prob = action_probs[action]
-            regret = counterfactual_prob * (action_utilities[action][current_player]
-                    - player_state_utility)
-            self.regrets[obs][action] += regret
-            self.average_policy[obs][action] += self.iteration * player_prob * action_prob
+        # The table may have grown in the traversal, so the arrays are looked up
+        # again. The regrets of the pruned actions are not updated
+        self.table.regrets[infoset_id, legal_actions] += counterfactual_prob * (
+                action_utilities[legal_actions, current_player] - player_state_utility)
+        # The discounting of Linear CFR and DCFR takes the place of the iteration weight
+        strategy_weight = 1 if self.update_rule in ['linear', 'dcfr'] else self.iteration
+        self.table.strategy_sums[infoset_id, legal_actions] += strategy_weight * player_prob * action_probs[legal_actions]
         return state_utility
 
     def update_policy(self):
-        ''' Update policy based on the current regrets
+        ''' Update policy based on the current regrets with one
+            vectorized regret matching pass over the table
         '''
-        for obs in self.regrets:
-            self.policy[obs] = self.regret_matching(obs)
+        self.table.update_policy()
 
     def regret_matching(self, obs):
         ''' Apply regret matching
@@ -110,16 +239,11 @@ class CFRAgent():
             obs (string): The state_str
         '''
         regret = self.regrets[obs]
-        positive_regret_sum = sum([r for r in regret if r > 0])
-
-        action_probs = np.zeros(self.env.action_num)
+        positive_regret = np.maximum(regret, 0)
+        positive_regret_sum = positive_regret.sum()
         if positive_regret_sum > 0:
-            for action in range(self.env.action_num):
-                action_probs[action] = max(0.0, regret[action] / positive_regret_sum)
-        else:
-            for action in range(self.env.action_num):
-                action_probs[action] = 1.0 / self.env.action_num
-        return action_probs
+            return positive_regret / positive_regret_sum
+        return np.full(self.env.action_num, 1.0 / self.env.action_num)
 
     def action_probs(self, obs, legal_actions, policy):
         ''' Obtain the action probabilities of the current state
@@ -135,9 +259,8 @@ class CFRAgent():
                 action_probs(numpy.array): The action probabilities
                 legal_actions (list): Indices of legal actions
         '''
-        if obs not in policy.keys():
+        if obs not in policy:
             action_probs = np.array([1.0/self.env.action_num for _ in range(self.env.action_num)])
-            self.policy[obs] = action_probs
         else:
             action_probs = policy[obs]
         action_probs = remove_illegal(action_probs, legal_actions)
@@ -152,7 +275,7 @@ class CFRAgent():
         Returns:
             action (int): Predicted action
         '''
-        probs = self.action_probs(state['obs'].tostring(), state['legal_actions'], self.average_policy)
+        probs = self.action_probs(get_state_key(state), state['legal_actions'], self.average_policy)
         action = np.random.choice(len(probs), p=probs)
         return action, probs
 
@@ -168,49 +291,57 @@ class CFRAgent():
                 legal_actions (list): Indices of legal actions
         '''
         state = self.env.get_state(player_id)
-        return state['obs'].tostring(), state['legal_actions']
+        return get_state_key(state), state['legal_actions']
 
     def save(self):
-        ''' Save model
+        ''' Save model into a single checkpoint file, see rlcard.utils.cfr_checkpoint
         '''
+        self._check_trainable()
         if not os.path.exists(self.model_path):
             os.makedirs(self.model_path)
 
-        policy_file = open(os.path.join(self.model_path, 'policy.pkl'),'wb')
-        pickle.dump(self.policy, policy_file)
-        policy_file.close()
+        save_checkpoint(os.path.join(self.model_path, 'cfr_checkpoint.bin'), self.table, self.iteration)
 
-        average_policy_file = open(os.path.join(self.model_path, 'average_policy.pkl'),'wb')
-        pickle.dump(self.average_policy, average_policy_file)
-        average_policy_file.close()
+    def load(self, eval_only=False):
+        ''' Load model. The models saved by the previous versions, i.e., an
+            infoset_table.pkl or dicts of arrays (policy.pkl, average_policy.pkl
+            and regrets.pkl), are converted into the table
 
-        regrets_file = open(os.path.join(self.model_path, 'regrets.pkl'),'wb')
-        pickle.dump(self.regrets, regrets_file)
-        regrets_file.close()
-
-        iteration_file = open(os.path.join(self.model_path, 'iteration.pkl'),'wb')
-        pickle.dump(self.iteration, iteration_file)
-        iteration_file.close()
-
-    def load(self):
-        ''' Load model
+        Args:
+            eval_only (boolean): If True, the checkpoint is memory-mapped and
+              only the average policy is read when looking up actions. The
+              agent can not be trained anymore: train and save raise a ValueError
         '''
         if not os.path.exists(self.model_path):
             return
 
-        policy_file = open(os.path.join(self.model_path, 'policy.pkl'),'rb')
-        self.policy = pickle.load(policy_file)
-        policy_file.close()
-
-        average_policy_file = open(os.path.join(self.model_path, 'average_policy.pkl'),'rb')
-        self.average_policy = pickle.load(average_policy_file)
-        average_policy_file.close()
+        checkpoint_path = os.path.join(self.model_path, 'cfr_checkpoint.bin')
+        if os.path.exists(checkpoint_path):
+            checkpoint = CFRCheckpoint(checkpoint_path)
+            self.iteration = checkpoint.iteration
+            if eval_only:
+                self.checkpoint = checkpoint
+            else:
+                self.checkpoint = None
+                self.table = checkpoint.to_table()
+            return
 
-        regrets_file = open(os.path.join(self.model_path, 'regrets.pkl'),'rb')
-        self.regrets = pickle.load(regrets_file)
-        regrets_file.close()
+        table_path = os.path.join(self.model_path, 'infoset_table.pkl')
+        if os.path.exists(table_path):
+            table_file = open(table_path,'rb')
+            self.table = pickle.load(table_file)
+            table_file.close()
+        else:
+            dicts = {}
+            for name in ['policy', 'average_policy', 'regrets']:
+                dict_file = open(os.path.join(self.model_path, name + '.pkl'),'rb')
+                dicts[name] = pickle.load(dict_file)
+                dict_file.close()
+            self.table = InfosetTable(self.env.action_num)
+            for name, array_name in [('policy', 'policy'), ('average_policy', 'strategy_sums'), ('regrets', 'regrets')]:
+                for obs, values in dicts[name].items():
+                    getattr(self.table, array_name)[self.table.get_id(obs)] = values
 
         iteration_file = open(os.path.join(self.model_path, 'iteration.pkl'),'rb')
         self.iteration = pickle.load(iteration_file)
         iteration_file.close()
-
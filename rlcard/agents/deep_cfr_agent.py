@@ -35,11 +35,11 @@ from __future__ import print_function
 
 import sys
 import collections
-import random
 import numpy as np
 import tensorflow as tf
 
 from rlcard.utils.utils import remove_illegal
+from rlcard.utils.replay_memory import FixedSizeRingBuffer
 
 sys.setrecursionlimit(10000000)
 
@@ -74,7 +74,8 @@ class DeepCFR():
              learning_rate=1e-4,
              batch_size_advantage=16,
              batch_size_strategy=16,
-             memory_capacity=int(1e7)):
+             memory_capacity=int(1e7),
+             pack_obs=False):
         ''' Initialize the Deep CFR
 
         Args:
@@ -89,6 +90,7 @@ class DeepCFR():
             batch_size_strategy (int or None): Batch size to sample from strategy
             memories
             memory_capacity (int): Number af samples that can be stored in memory
+            pack_obs (boolean): Store the binary observations bit-packed in the memories
         '''
         self.use_raw = False
         self._scope = scope
@@ -141,7 +143,8 @@ class DeepCFR():
                     name="action_ph_" + str(p)))
 
         # Define strategy network, loss & memory.
-        self._strategy_memories = FixedSizeRingBuffer(memory_capacity)
+        packed_fields = ['info_state'] if pack_obs else []
+        self._strategy_memories = FixedSizeRingBuffer(memory_capacity, packed_fields)
 
         fc = self._info_state_ph
         for dim in list(policy_network_layers):
@@ -160,7 +163,7 @@ class DeepCFR():
 
         # Define advantage network, loss & memory. (One per player)
         self._advantage_memories = [
-            FixedSizeRingBuffer(memory_capacity) for _ in range(self._num_players)
+            FixedSizeRingBuffer(memory_capacity, packed_fields) for _ in range(self._num_players)
         ]
         self._advantage_outputs = []
         with tf.variable_scope(scope+'_advantage'):
@@ -330,8 +333,11 @@ class DeepCFR():
                 sampled_regret[action] = expected_payoff[action][player]
                 for a_ in actions:
                     sampled_regret[action] -= strategy[a_] * expected_payoff[a_][player]
-            for act in actions:
-                self._advantage_memories[player].add(AdvantageMemory(state['obs'].flatten(), self._iteration, sampled_regret[act], act))
+            self._advantage_memories[player].add_batch(AdvantageMemory(
+                np.tile(state['obs'].flatten(), (len(actions), 1)),
+                np.full(len(actions), self._iteration),
+                np.array([sampled_regret[act] for act in actions]),
+                np.array(actions)))
             players_payoff = [max(expected_payoff[act_]) for act_ in expected_payoff.keys()]
             return players_payoff
         else:
@@ -401,29 +407,21 @@ class DeepCFR():
         Returns:
             loss advantages (float): The average loss over the advantage network.
         '''
-        if self._batch_size_advantage and self._batch_size_advantage < len(self._advantage_memories[player]._data):
-            samples = self._advantage_memories[player].sample(self._batch_size_advantage)
-        else:
-            samples = self._advantage_memories[player]
-        info_states = []
-        advantages = []
-        iterations = []
-        acts = []
-        for s in samples:
-            info_states.append(s.info_state)
-            advantages.append(s.advantage)
-            iterations.append(s.iteration)
-            acts.append(s.action)
-        if info_states == []:
-            return None
+        memory = self._advantage_memories[player]
         # Ensure some samples have been gathered.
+        if len(memory) == 0:
+            return None
+        if self._batch_size_advantage and self._batch_size_advantage < len(memory):
+            samples = memory.sample(self._batch_size_advantage)
+        else:
+            samples = memory.sample(len(memory))
         loss_advantages, _ = self._session.run(
             [self._loss_advantages[player], self._learn_step_advantages[player]],
             feed_dict={
-                self._info_state_ph: np.array(info_states),
-                self._advantage_ph[player]: np.array(advantages),
-                self._action_ph[player]: np.array(acts),
-                self._iter_ph: np.array(iterations)
+                self._info_state_ph: samples.info_state,
+                self._advantage_ph[player]: samples.advantage,
+                self._action_ph[player]: samples.action,
+                self._iter_ph: samples.iteration
             })
         return loss_advantages
 
@@ -433,86 +431,18 @@ class DeepCFR():
         Returns:
             The average loss obtained on this batch of transitions or `None`.
         '''
-        if self._batch_size_strategy and self._batch_size_strategy < len(self._strategy_memories._data):
-            samples = self._strategy_memories.sample(self._batch_size_strategy)
-        else:
-            samples = self._strategy_memories
-        info_states = []
-        action_probs = []
-        iterations = []
-        for s in samples:
-            info_states.append(s.info_state)
-            action_probs.append(s.strategy_action_probs)
-            iterations.append(s.iteration)
-        if info_states == []:
+        memory = self._strategy_memories
+        if len(memory) == 0:
             return None
+        if self._batch_size_strategy and self._batch_size_strategy < len(memory):
+            samples = memory.sample(self._batch_size_strategy)
+        else:
+            samples = memory.sample(len(memory))
         loss_strategy, _ = self._session.run(
             [self._loss_policy, self._learn_step_policy],
             feed_dict={
-                self._info_state_ph: np.array(info_states),
-                self._action_probs_ph: np.array(np.squeeze(action_probs)),
-                self._iter_ph: np.array(iterations),
+                self._info_state_ph: samples.info_state,
+                self._action_probs_ph: samples.strategy_action_probs,
+                self._iter_ph: samples.iteration,
             })
         return loss_strategy
-
-class FixedSizeRingBuffer(object):
-    ''' ReplayBuffer of fixed size with a FIFO replacement policy.
-
-    Stored transitions can be sampled uniformly.
-
-    The underlying datastructure is a ring buffer, allowing 0(1) adding and
-    sampling.
-    '''
-    def __init__(self, replay_buffer_capacity):
-        ''' Initialize the buffer
-        '''
-
-        self._replay_buffer_capacity = replay_buffer_capacity
-        self._data = []
-        self._next_entry_index = 0
-
-    def add(self, element):
-        '''Adds `element` to the buffer.
-
-        If the buffer is full, the oldest element will be replaced.
-
-        Args:
-            element: data to be added to the buffer.
-        '''
-        if len(self._data) < self._replay_buffer_capacity:
-            self._data.append(element)
-        else:
-            self._next_entry_index = int(self._next_entry_index)
-            self._data[self._next_entry_index] = element
-            self._next_entry_index += 1
-            self._next_entry_index %= self._replay_buffer_capacity
-
-    def sample(self, num_samples):
-        ''' Returns `num_samples` uniformly sampled from the buffer.
-
-        Args:
-            num_samples (int): number of samples to draw.
-
-        Returns:
-            sample data (list): a list of random sampled elements of the buffer
-
-        Raises:
-            ValueError: If there are less than `num_samples` elements in the buffer
-        '''
-        if len(self._data) < num_samples:
-            raise ValueError("{} elements could not be sampled from size {}".format(
-                num_samples, len(self._data)))
-        return random.sample(self._data, num_samples)
-
-    def clear(self):
-        ''' Clear the buffer
-        '''
-        self._data = []
-        self._next_entry_index = 0
-
-    def __len__(self):
-        return len(self._data)
-
-    def __iter__(self):
-        return iter(self._data)
-
@@ -24,14 +24,12 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 '''
 
-import random
 import numpy as np
 import tensorflow as tf
-from collections import namedtuple
 
 from rlcard.utils.utils import remove_illegal
-
-Transition = namedtuple('Transition', ['state', 'action', 'reward', 'next_state', 'done'])
+from rlcard.utils.replay_memory import Memory, PrioritizedMemory
+from rlcard.utils.prefetcher import Prefetcher
 
 
 class DQNAgent(object):
@@ -51,7 +49,15 @@ class DQNAgent(object):
                  state_shape=None,
                  train_every=1,
                  mlp_layers=None,
-                 learning_rate=0.00005):
+                 learning_rate=0.00005,
+                 prioritized_replay=False,
+                 priority_alpha=0.6,
+                 priority_beta_start=0.4,
+                 priority_beta_steps=20000,
+                 prefetch_batches=0,
+                 pack_obs=False,
+                 dedup_next_state=False,
+                 mask_next_actions=False):
 
         '''
         Q-Learning algorithm for off-policy TD control using Function Approximation.
@@ -78,6 +84,18 @@ class DQNAgent(object):
             train_every (int): Train the network every X steps.
             mlp_layers (list): The layer number and the dimension of each layer in MLP
             learning_rate (float): The learning rate of the DQN agent.
+            prioritized_replay (boolean): Sample the transitions in proportion to their TD errors
+            priority_alpha (float): How much the TD errors are used in prioritized replay
+            priority_beta_start (float): The exponent of the importance-sampling weights of
+              prioritized replay. It is increased to 1 over time and this is the start value
+            priority_beta_steps (int): Number of training steps to increase the exponent over
+            prefetch_batches (int): The number of minibatches that are sampled and converted
+              in a background thread. With 0, they are sampled in the training step
+            pack_obs (boolean): Store the binary observations bit-packed in the replay memory
+            dedup_next_state (boolean): Do not store the next states that are the states of the
+              following transitions in the replay memory
+            mask_next_actions (boolean): Store the legal actions of the next states, and only
+              choose among them in the Double DQN targets
         '''
         self.use_raw = False
         self.sess = sess
@@ -89,6 +107,10 @@ class DQNAgent(object):
         self.batch_size = batch_size
         self.action_num = action_num
         self.train_every = train_every
+        self.prioritized_replay = prioritized_replay
+        self.prefetch_batches = prefetch_batches
+        self.mask_next_actions = mask_next_actions
+        self._prefetcher = None
 
         # Total timesteps
         self.total_t = 0
@@ -103,8 +125,14 @@ class DQNAgent(object):
         self.q_estimator = Estimator(scope=self.scope+"_q", action_num=action_num, learning_rate=learning_rate, state_shape=state_shape, mlp_layers=mlp_layers)
         self.target_estimator = Estimator(scope=self.scope+"_target_q", action_num=action_num, learning_rate=learning_rate, state_shape=state_shape, mlp_layers=mlp_layers)
 
-        # Create replay memory
-        self.memory = Memory(replay_memory_size, batch_size)
+        # Create replay memory. The legal actions are only stored for masking the targets
+        memory_action_num = action_num if mask_next_actions else None
+        if prioritized_replay:
+            self.memory = PrioritizedMemory(replay_memory_size, batch_size, memory_action_num, alpha=priority_alpha,
+                                            pack_obs=pack_obs, dedup_next_state=dedup_next_state)
+            self.betas = np.linspace(priority_beta_start, 1.0, priority_beta_steps)
+        else:
+            self.memory = Memory(replay_memory_size, batch_size, memory_action_num, pack_obs, dedup_next_state)
 
     def feed(self, ts):
         ''' Store data in to replay buffer and train the agent. There are two stages.
@@ -115,7 +143,7 @@ class DQNAgent(object):
             ts (list): a list of 5 elements that represent the transition
         '''
         (state, action, reward, next_state, done) = tuple(ts)
-        self.feed_memory(state['obs'], action, reward, next_state['obs'], done)
+        self.feed_memory(state['obs'], action, reward, next_state['obs'], done, next_state['legal_actions'])
         self.total_t += 1
         tmp = self.total_t - self.replay_memory_init_size
         if tmp>=0 and tmp%self.train_every == 0:
@@ -145,10 +173,42 @@ class DQNAgent(object):
             action (int): an action id
             probs (list): a list of probabilies
         '''
-        q_values = self.q_estimator.predict(self.sess, np.expand_dims(state['obs'], 0))[0]
-        probs = remove_illegal(np.exp(q_values), state['legal_actions'])
-        best_action = np.argmax(probs)
-        return best_action, probs
+        actions, probs = self.batch_eval_step([state])
+        return actions[0], probs[0]
+
+    def batch_step(self, states):
+        ''' Predict the actions for a batch of states with one forward pass
+
+        Args:
+            states (list): a list of state dictionaries
+
+        Returns:
+            actions (list): a list of action ids
+        '''
+        A = self.batch_predict(np.array([state['obs'] for state in states]))
+        actions = []
+        for a, state in zip(A, states):
+            a = remove_illegal(a, state['legal_actions'])
+            actions.append(np.random.choice(np.arange(len(a)), p=a))
+        return actions
+
+    def batch_eval_step(self, states):
+        ''' Predict the actions for a batch of states for evaluation purpose.
+
+        Args:
+            states (list): a list of state dictionaries
+
+        Returns:
+            actions (list): a list of action ids
+            probs (list): a list of the probabilities for each state
+        '''
+        q_values = self.q_estimator.predict(self.sess, np.array([state['obs'] for state in states]))
+        actions, probs = [], []
+        for q, state in zip(q_values, states):
+            p = remove_illegal(np.exp(q), state['legal_actions'])
+            actions.append(np.argmax(p))
+            probs.append(p)
+        return actions, probs
 
     def predict(self, state):
         ''' Predict the action probabilities
@@ -159,11 +219,22 @@ class DQNAgent(object):
         Returns:
             q_values (numpy.array): a 1-d array where each entry represents a Q value
         '''
+        return self.batch_predict(np.expand_dims(state, 0))[0]
+
+    def batch_predict(self, states):
+        ''' Predict the action probabilities for a batch of states
+
+        Args:
+            states (numpy.array): a batch of states
+
+        Returns:
+            A (numpy.array): a 2-d array where each row represents the action probabilities
+        '''
         epsilon = self.epsilons[min(self.total_t, self.epsilon_decay_steps-1)]
-        A = np.ones(self.action_num, dtype=float) * epsilon / self.action_num
-        q_values = self.q_estimator.predict(self.sess, np.expand_dims(state, 0))[0]
-        best_action = np.argmax(q_values)
-        A[best_action] += (1.0 - epsilon)
+        A = np.ones((len(states), self.action_num), dtype=float) * epsilon / self.action_num
+        q_values = self.q_estimator.predict(self.sess, states)
+        best_actions = np.argmax(q_values, axis=1)
+        A[np.arange(len(states)), best_actions] += (1.0 - epsilon)
         return A
 
     def train(self):
@@ -172,17 +243,32 @@ class DQNAgent(object):
         Returns:
             loss (float): The loss of the current batch.
         '''
-        state_batch, action_batch, reward_batch, next_state_batch, done_batch = self.memory.sample()
+        if self.prefetch_batches > 0:
+            if self._prefetcher is None:
+                self._prefetcher = Prefetcher(self.sample_batch, self.prefetch_batches)
+            batch = self._prefetcher.get()
+        else:
+            batch = self.sample_batch()
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch, \
+            weight_batch, indexes, write_counts = batch
+
         # Calculate q values and targets (Double DQN)
         q_values_next = self.q_estimator.predict(self.sess, next_state_batch)
+        if self.mask_next_actions:
+            # Only the legal actions of the next states can be chosen
+            q_values_next = np.where(legal_actions_batch, q_values_next, -np.inf)
         best_actions = np.argmax(q_values_next, axis=1)
         q_values_next_target = self.target_estimator.predict(self.sess, next_state_batch)
         target_batch = reward_batch + np.invert(done_batch).astype(np.float32) * \
             self.discount_factor * q_values_next_target[np.arange(self.batch_size), best_actions]
 
         # Perform gradient descent update
-        state_batch = np.array(state_batch)
-        loss = self.q_estimator.update(self.sess, state_batch, action_batch, target_batch)
+        if self.prioritized_replay:
+            q_values = self.q_estimator.predict(self.sess, state_batch)
+            # The rows that are overwritten while the batch was prefetched are skipped
+            self.memory.update_priorities(indexes, target_batch - q_values[np.arange(self.batch_size), action_batch],
+                                          write_counts)
+        loss = self.q_estimator.update(self.sess, state_batch, action_batch, target_batch, weight_batch)
         print('\rINFO - Agent {}, step {}, rl-loss: {}'.format(self.scope, self.total_t, loss), end='')
 
 
@@ -193,7 +279,40 @@ class DQNAgent(object):
 
         self.train_t += 1
 
-    def feed_memory(self, state, action, reward, next_state, done):
+    def sample_batch(self):
+        ''' Sample a minibatch from the replay memory and prepare it for the
+            estimators. It runs in the background thread of the prefetcher
+            if prefetch_batches is set.
+
+        Returns:
+            (tuple): The fields of Memory.sample, in which the states are
+              converted to float32, followed by the importance-sampling weights,
+              the indexes and the write counts of the transitions, which are None
+              without prioritized replay
+        '''
+        if self.prioritized_replay:
+            beta = self.betas[min(self.train_t, len(self.betas)-1)]
+            batch = self.memory.sample(beta)
+            weight_batch, indexes, write_counts = batch[6:]
+        else:
+            batch = self.memory.sample()
+            weight_batch, indexes, write_counts = None, None, None
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = batch[:6]
+        # The estimators feed the states as float32
+        state_batch = state_batch.astype(np.float32)
+        next_state_batch = next_state_batch.astype(np.float32)
+        return state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch, \
+            weight_batch, indexes, write_counts
+
+    def close(self):
+        ''' Stop the background thread of the prefetcher, if any. It is
+            started again by the next training step
+        '''
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+
+    def feed_memory(self, state, action, reward, next_state, done, legal_actions=None):
         ''' Feed transition to memory
 
         Args:
@@ -202,8 +321,9 @@ class DQNAgent(object):
             reward (float): the reward received
             next_state (numpy.array): the next state after performing the action
             done (boolean): whether the episode is finished
+            legal_actions (list): the legal actions of the next state
         '''
-        self.memory.save(state, action, reward, next_state, done)
+        self.memory.save(state, action, reward, next_state, done, legal_actions)
 
     def copy_params_op(self, global_vars):
         ''' Copys the variables of two estimator to others.
@@ -260,6 +380,8 @@ class Estimator():
         self.actions_pl = tf.placeholder(shape=[None], dtype=tf.int32, name="actions")
         # Boolean to indicate whether is training or not
         self.is_train = tf.placeholder(tf.bool, name="is_train")
+        # The importance-sampling weights of prioritized replay
+        self.weights_pl = tf.placeholder_with_default(tf.ones_like(self.y_pl), shape=[None], name="weights")
 
         batch_size = tf.shape(self.X_pl)[0]
 
@@ -278,7 +400,7 @@ class Estimator():
 
         # Calculate the loss
         self.losses = tf.squared_difference(self.y_pl, self.action_predictions)
-        self.loss = tf.reduce_mean(self.losses)
+        self.loss = tf.reduce_mean(self.weights_pl * self.losses)
 
     def predict(self, sess, s):
         ''' Predicts action values.
@@ -294,7 +416,7 @@ class Estimator():
         '''
         return sess.run(self.predictions, { self.X_pl: s, self.is_train:False})
 
-    def update(self, sess, s, a, y):
+    def update(self, sess, s, a, y, weights=None):
         ''' Updates the estimator towards the given targets.
 
         Args:
@@ -302,57 +424,20 @@ class Estimator():
           s (list): State input of shape [batch_size, 4, 160, 160, 3]
           a (list): Chosen actions of shape [batch_size]
           y (list): Targets of shape [batch_size]
+          weights (list): The importance-sampling weights of shape [batch_size].
+            The squared errors are not weighted if it is None
 
         Returns:
           The calculated loss on the batch.
         '''
         feed_dict = { self.X_pl: s, self.y_pl: y, self.actions_pl: a, self.is_train: True}
+        if weights is not None:
+            feed_dict[self.weights_pl] = weights
         _, _, loss = sess.run(
                 [tf.contrib.framework.get_global_step(), self.train_op, self.loss],
                 feed_dict)
         return loss
 
-class Memory(object):
-    ''' Memory for saving transitions
-    '''
-
-    def __init__(self, memory_size, batch_size):
-        ''' Initialize
-        Args:
-            memory_size (int): the size of the memroy buffer
-        '''
-        self.memory_size = memory_size
-        self.batch_size = batch_size
-        self.memory = []
-
-    def save(self, state, action, reward, next_state, done):
-        ''' Save transition into memory
-
-        Args:
-            state (numpy.array): the current state
-            action (int): the performed action ID
-            reward (float): the reward received
-            next_state (numpy.array): the next state after performing the action
-            done (boolean): whether the episode is finished
-        '''
-        if len(self.memory) == self.memory_size:
-            self.memory.pop(0)
-        transition = Transition(state, action, reward, next_state, done)
-        self.memory.append(transition)
-
-    def sample(self):
-        ''' Sample a minibatch from the replay memory
-
-        Returns:
-            state_batch (list): a batch of states
-            action_batch (list): a batch of actions
-            reward_batch (list): a batch of rewards
-            next_state_batch (list): a batch of states
-            done_batch (list): a batch of dones
-        '''
-        samples = random.sample(self.memory, self.batch_size)
-        return map(np.array, zip(*samples))
-
 def copy_model_parameters(sess, estimator1, estimator2):
     ''' Copys the model parameters of one estimator to another.
 
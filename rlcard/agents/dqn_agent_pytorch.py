@@ -28,14 +28,12 @@ SOFTWARE.
 import numpy as np
 import torch
 import torch.nn as nn
-from collections import namedtuple
 from copy import deepcopy
 
-from rlcard.agents.dqn_agent import Memory
+from rlcard.utils.replay_memory import Memory, PrioritizedMemory
+from rlcard.utils.prefetcher import Prefetcher
 from rlcard.utils.utils import remove_illegal
 
-Transition = namedtuple('Transition', ['state', 'action', 'reward', 'next_state', 'done'])
-
 
 class DQNAgent(object):
     '''
@@ -57,7 +55,15 @@ class DQNAgent(object):
                  train_every=1,
                  mlp_layers=None,
                  learning_rate=0.00005,
-                 device=None):
+                 device=None,
+                 prioritized_replay=False,
+                 priority_alpha=0.6,
+                 priority_beta_start=0.4,
+                 priority_beta_steps=20000,
+                 prefetch_batches=0,
+                 pack_obs=False,
+                 dedup_next_state=False,
+                 mask_next_actions=False):
 
         '''
         Q-Learning algorithm for off-policy TD control using Function Approximation.
@@ -83,6 +89,18 @@ class DQNAgent(object):
             mlp_layers (list): The layer number and the dimension of each layer in MLP
             learning_rate (float): The learning rate of the DQN agent.
             device (torch.device): whether to use the cpu or gpu
+            prioritized_replay (boolean): Sample the transitions in proportion to their TD errors
+            priority_alpha (float): How much the TD errors are used in prioritized replay
+            priority_beta_start (float): The exponent of the importance-sampling weights of
+              prioritized replay. It is increased to 1 over time and this is the start value
+            priority_beta_steps (int): Number of training steps to increase the exponent over
+            prefetch_batches (int): The number of minibatches that are sampled and converted
+              to tensors in a background thread. With 0, they are sampled in the training step
+            pack_obs (boolean): Store the binary observations bit-packed in the replay memory
+            dedup_next_state (boolean): Do not store the next states that are the states of the
+              following transitions in the replay memory
+            mask_next_actions (boolean): Store the legal actions of the next states, and only
+              choose among them in the Double DQN targets
         '''
         self.use_raw = False
         self.scope = scope
@@ -93,6 +111,10 @@ class DQNAgent(object):
         self.batch_size = batch_size
         self.action_num = action_num
         self.train_every = train_every
+        self.prioritized_replay = prioritized_replay
+        self.prefetch_batches = prefetch_batches
+        self.mask_next_actions = mask_next_actions
+        self._prefetcher = None
 
         # Torch device
         if device is None:
@@ -115,8 +137,14 @@ class DQNAgent(object):
         self.target_estimator = Estimator(action_num=action_num, learning_rate=learning_rate, state_shape=state_shape, \
             mlp_layers=mlp_layers, device=self.device)
 
-        # Create replay memory
-        self.memory = Memory(replay_memory_size, batch_size)
+        # Create replay memory. The legal actions are only stored for masking the targets
+        memory_action_num = action_num if mask_next_actions else None
+        if prioritized_replay:
+            self.memory = PrioritizedMemory(replay_memory_size, batch_size, memory_action_num, alpha=priority_alpha,
+                                            pack_obs=pack_obs, dedup_next_state=dedup_next_state)
+            self.betas = np.linspace(priority_beta_start, 1.0, priority_beta_steps)
+        else:
+            self.memory = Memory(replay_memory_size, batch_size, memory_action_num, pack_obs, dedup_next_state)
 
     def feed(self, ts):
         ''' Store data in to replay buffer and train the agent. There are two stages.
@@ -127,7 +155,7 @@ class DQNAgent(object):
             ts (list): a list of 5 elements that represent the transition
         '''
         (state, action, reward, next_state, done) = tuple(ts)
-        self.feed_memory(state['obs'], action, reward, next_state['obs'], done)
+        self.feed_memory(state['obs'], action, reward, next_state['obs'], done, next_state['legal_actions'])
         self.total_t += 1
         tmp = self.total_t - self.replay_memory_init_size
         if tmp>=0 and tmp%self.train_every == 0:
@@ -157,10 +185,42 @@ class DQNAgent(object):
         Returns:
             action (int): an action id
         '''
-        q_values = self.q_estimator.predict_nograd(np.expand_dims(state['obs'], 0))[0]
-        probs = remove_illegal(np.exp(q_values), state['legal_actions'])
-        best_action = np.argmax(probs)
-        return best_action, probs
+        actions, probs = self.batch_eval_step([state])
+        return actions[0], probs[0]
+
+    def batch_step(self, states):
+        ''' Predict the actions for a batch of states with one forward pass
+
+        Args:
+            states (list): a list of state dictionaries
+
+        Returns:
+            actions (list): a list of action ids
+        '''
+        A = self.batch_predict(np.array([state['obs'] for state in states]))
+        actions = []
+        for a, state in zip(A, states):
+            a = remove_illegal(a, state['legal_actions'])
+            actions.append(np.random.choice(np.arange(len(a)), p=a))
+        return actions
+
+    def batch_eval_step(self, states):
+        ''' Predict the actions for a batch of states for evaluation purpose.
+
+        Args:
+            states (list): a list of state dictionaries
+
+        Returns:
+            actions (list): a list of action ids
+            probs (list): a list of the probabilities for each state
+        '''
+        q_values = self.q_estimator.predict_nograd(np.array([state['obs'] for state in states]))
+        actions, probs = [], []
+        for q, state in zip(q_values, states):
+            p = remove_illegal(np.exp(q), state['legal_actions'])
+            actions.append(np.argmax(p))
+            probs.append(p)
+        return actions, probs
 
     def predict(self, state):
         ''' Predict the action probabilities but have them
@@ -172,11 +232,23 @@ class DQNAgent(object):
         Returns:
             q_values (numpy.array): a 1-d array where each entry represents a Q value
         '''
+        return self.batch_predict(np.expand_dims(state, 0))[0]
+
+    def batch_predict(self, states):
+        ''' Predict the action probabilities for a batch of states but
+            have them disconnected from the computation graph
+
+        Args:
+            states (numpy.array): a batch of states
+
+        Returns:
+            A (numpy.array): a 2-d array where each row represents the action probabilities
+        '''
         epsilon = self.epsilons[min(self.total_t, self.epsilon_decay_steps-1)]
-        A = np.ones(self.action_num, dtype=float) * epsilon / self.action_num
-        q_values = self.q_estimator.predict_nograd(np.expand_dims(state, 0))[0]
-        best_action = np.argmax(q_values)
-        A[best_action] += (1.0 - epsilon)
+        A = np.ones((len(states), self.action_num), dtype=float) * epsilon / self.action_num
+        q_values = self.q_estimator.predict_nograd(states)
+        best_actions = np.argmax(q_values, axis=1)
+        A[np.arange(len(states)), best_actions] += (1.0 - epsilon)
         return A
 
     def train(self):
@@ -185,10 +257,20 @@ class DQNAgent(object):
         Returns:
             loss (float): The loss of the current batch.
         '''
-        state_batch, action_batch, reward_batch, next_state_batch, done_batch = self.memory.sample()
+        if self.prefetch_batches > 0:
+            if self._prefetcher is None:
+                self._prefetcher = Prefetcher(self.sample_batch, self.prefetch_batches)
+            batch = self._prefetcher.get()
+        else:
+            batch = self.sample_batch()
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch, \
+            weight_batch, indexes, write_counts = batch
 
         # Calculate best next actions using Q-network (Double DQN)
         q_values_next = self.q_estimator.predict_nograd(next_state_batch)
+        if self.mask_next_actions:
+            # Only the legal actions of the next states can be chosen
+            q_values_next = np.where(legal_actions_batch, q_values_next, -np.inf)
         best_actions = np.argmax(q_values_next, axis=1)
 
         # Evaluate best next actions using Target-network (Double DQN)
@@ -197,9 +279,13 @@ class DQNAgent(object):
             self.discount_factor * q_values_next_target[np.arange(self.batch_size), best_actions]
 
         # Perform gradient descent update
-        state_batch = np.array(state_batch)
+        if self.prioritized_replay:
+            q_values = self.q_estimator.predict_nograd(state_batch)
+            # The rows that are overwritten while the batch was prefetched are skipped
+            self.memory.update_priorities(indexes, target_batch - q_values[np.arange(self.batch_size), action_batch],
+                                          write_counts)
 
-        loss = self.q_estimator.update(state_batch, action_batch, target_batch)
+        loss = self.q_estimator.update(state_batch, action_batch, target_batch, weight_batch)
         print('\rINFO - Agent {}, step {}, rl-loss: {}'.format(self.scope, self.total_t, loss), end='')
 
         # Update the target estimator
@@ -209,7 +295,39 @@ class DQNAgent(object):
 
         self.train_t += 1
 
-    def feed_memory(self, state, action, reward, next_state, done):
+    def sample_batch(self):
+        ''' Sample a minibatch from the replay memory and prepare it for the
+            estimators. It runs in the background thread of the prefetcher
+            if prefetch_batches is set.
+
+        Returns:
+            (tuple): The fields of Memory.sample, in which the states are
+              converted to tensors on the device, followed by the importance-sampling weights,
+              the indexes and the write counts of the transitions, which are None
+              without prioritized replay
+        '''
+        if self.prioritized_replay:
+            beta = self.betas[min(self.train_t, len(self.betas)-1)]
+            batch = self.memory.sample(beta)
+            weight_batch, indexes, write_counts = batch[6:]
+        else:
+            batch = self.memory.sample()
+            weight_batch, indexes, write_counts = None, None, None
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = batch[:6]
+        state_batch = torch.from_numpy(state_batch).float().to(self.device)
+        next_state_batch = torch.from_numpy(next_state_batch).float().to(self.device)
+        return state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch, \
+            weight_batch, indexes, write_counts
+
+    def close(self):
+        ''' Stop the background thread of the prefetcher, if any. It is
+            started again by the next training step
+        '''
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+
+    def feed_memory(self, state, action, reward, next_state, done, legal_actions=None):
         ''' Feed transition to memory
 
         Args:
@@ -218,8 +336,9 @@ class DQNAgent(object):
             reward (float): the reward received
             next_state (numpy.array): the next state after performing the action
             done (boolean): whether the episode is finished
+            legal_actions (list): the legal actions of the next state
         '''
-        self.memory.save(state, action, reward, next_state, done)
+        self.memory.save(state, action, reward, next_state, done, legal_actions)
 
     def get_state_dict(self):
         ''' Get the state dict to save models
@@ -291,27 +410,29 @@ class Estimator(object):
             actions in the Double-DQN algorithm.
 
         Args:
-          s (np.ndarray): (batch, state_len)
+          s (np.ndarray or torch.Tensor): (batch, state_len)
 
         Returns:
           np.ndarray of shape (batch_size, NUM_VALID_ACTIONS) containing the estimated
           action values.
         '''
         with torch.no_grad():
-            s = torch.from_numpy(s).float().to(self.device)
+            s = self._to_tensor(s)
             q_as = self.qnet(s).cpu().numpy()
         return q_as
 
-    def update(self, s, a, y):
+    def update(self, s, a, y, weights=None):
         ''' Updates the estimator towards the given targets.
             In this case y is the target-network estimated
             value of the Q-network optimal actions, which
             is labeled y in Algorithm 1 of Minh et al. (2015)
 
         Args:
-          s (np.ndarray): (batch, state_shape) state representation
+          s (np.ndarray or torch.Tensor): (batch, state_shape) state representation
           a (np.ndarray): (batch,) integer sampled actions
           y (np.ndarray): (batch,) value of optimal actions according to Q-target
+          weights (np.ndarray): (batch,) importance-sampling weights of the
+            squared errors, or None to not weight them
 
         Returns:
           The calculated loss on the batch.
@@ -320,7 +441,7 @@ class Estimator(object):
 
         self.qnet.train()
 
-        s = torch.from_numpy(s).float().to(self.device)
+        s = self._to_tensor(s)
         a = torch.from_numpy(a).long().to(self.device)
         y = torch.from_numpy(y).float().to(self.device)
 
@@ -331,7 +452,11 @@ class Estimator(object):
         Q = torch.gather(q_as, dim=-1, index=a.unsqueeze(-1)).squeeze(-1)
 
         # update model
-        batch_loss = self.mse_loss(Q, y)
+        if weights is None:
+            batch_loss = self.mse_loss(Q, y)
+        else:
+            weights = torch.from_numpy(weights).float().to(self.device)
+            batch_loss = (weights * (Q - y) ** 2).mean()
         batch_loss.backward()
         self.optimizer.step()
         batch_loss = batch_loss.item()
@@ -340,6 +465,14 @@ class Estimator(object):
 
         return batch_loss
 
+    def _to_tensor(self, s):
+        ''' Convert a batch of states to a float tensor on the device, unless
+            it is already a tensor, e.g., from the prefetcher
+        '''
+        if torch.is_tensor(s):
+            return s.to(self.device)
+        return torch.from_numpy(s).float().to(self.device)
+
 
 class EstimatorNetwork(nn.Module):
     ''' The function approximation network for Estimator
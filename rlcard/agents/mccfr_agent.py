@@ -0,0 +1,194 @@
+import time
+
+import numpy as np
+
+from rlcard.agents.cfr_agent import CFRAgent
+from rlcard.utils.utils import *
+
+SAMPLINGS = ['external', 'outcome']
+
+class MCCFRAgent(CFRAgent):
+    ''' Implement Monte Carlo CFR with external sampling or outcome sampling.
+        Unlike CFRAgent, one iteration only visits the sampled part of the
+        game tree, and only the visited information sets are updated, so it
+        can be applied to larger games such as Limit Texas Hold'em. The
+        regrets and the average policy are stored in the same table as CFRAgent.
+        If the env is made with chance_nodes, one outcome of each chance node
+        is sampled with its probability.
+    '''
+
+    def __init__(self, env, model_path='./mccfr_model', sampling='external', explore_num=None, epsilon=0.6,
+                 prune_threshold=None, prune_warmup=0, explore_every=10):
+        ''' Initilize Agent
+
+        Args:
+            env (Env): Env class
+            model_path (str): The path to save and load the model
+            sampling (str): 'external' samples the actions of the other players
+              and explores all the actions of the traverser. 'outcome' samples
+              a single trajectory per traverser
+            explore_num (int): Only for external sampling. If set, at most
+              explore_num legal actions, sampled uniformly, are explored at the
+              nodes of the traverser, and their utilities are reweighted to stay
+              unbiased. It bounds the cost of an iteration in games with long
+              episodes such as Simple Doudizhu
+            epsilon (float): Only for outcome sampling. The exploration rate
+              of the sampling policy of the traverser
+            prune_threshold, prune_warmup, explore_every: The regret-based
+              pruning of external sampling, see CFRAgent
+        '''
+        if sampling not in SAMPLINGS:
+            raise ValueError('Unknown sampling {}, should be one of {}'.format(sampling, SAMPLINGS))
+        super().__init__(env, model_path=model_path, prune_threshold=prune_threshold,
+                         prune_warmup=prune_warmup, explore_every=explore_every)
+        self.sampling = sampling
+        self.explore_num = explore_num
+        self.epsilon = epsilon
+
+        # The total time spent in train
+        self.train_time = 0.0
+
+    @property
+    def iterations_per_second(self):
+        ''' The average number of iterations done per second of training
+        '''
+        if self.train_time == 0:
+            return 0.0
+        return self.iteration / self.train_time
+
+    def train(self):
+        ''' Do one iteration of MCCFR. Each player is the traverser once
+        '''
+        self._check_trainable()
+        start = time.time()
+        self.iteration += 1
+        for player_id in range(self.env.player_num):
+            self.env.reset()
+            if self.sampling == 'external':
+                self.traverse_external(player_id)
+            else:
+                probs = np.ones(self.env.player_num)
+                self.traverse_outcome(probs, 1.0, player_id)
+        self.train_time += time.time() - start
+
+    def traverse_external(self, player_id):
+        ''' Traverse the game tree with external sampling, update the regrets
+            of the traverser and the average policy of the other players
+
+        Args:
+            player_id: The traverser
+
+        Returns:
+            utility (float): The sampled utility of the traverser
+        '''
+        self.visited_nodes += 1
+        if self.env.is_over():
+            return self.env.get_payoffs()[player_id]
+
+        if self.env.is_chance_node():
+            self.step_chance_sample()
+            utility = self.traverse_external(player_id)
+            self.env.step_back()
+            return utility
+
+        current_player = self.env.get_player_id()
+        obs, legal_actions = self.get_state(current_player)
+        infoset_id = self.table.get_id(obs)
+        action_probs = remove_illegal(self.table.regret_matching(infoset_id), legal_actions)
+
+        if not current_player == player_id:
+            # The other players play on-policy, so the average policy is
+            # updated without the reach probability
+            self.table.strategy_sums[infoset_id, legal_actions] += action_probs[legal_actions]
+            action = np.random.choice(self.env.action_num, p=action_probs)
+            self.env.step(action)
+            utility = self.traverse_external(player_id)
+            self.env.step_back()
+            return utility
+
+        # The regrets of the pruned actions are not updated
+        legal_actions = self.explored_actions(infoset_id, legal_actions, action_probs)
+        explored_actions = legal_actions
+        weight = 1.0
+        if self.explore_num is not None and len(legal_actions) > self.explore_num:
+            explored_actions = np.random.choice(legal_actions, self.explore_num, replace=False)
+            weight = len(legal_actions) / self.explore_num
+
+        action_utilities = np.zeros(self.env.action_num)
+        for action in explored_actions:
+            self.env.step(action)
+            action_utilities[action] = weight * self.traverse_external(player_id)
+            self.env.step_back()
+
+        state_utility = np.dot(action_probs, action_utilities)
+        self.table.regrets[infoset_id, legal_actions] += action_utilities[legal_actions] - state_utility
+        return state_utility
+
+    def traverse_outcome(self, probs, sample_prob, player_id, chance_prob=1.0):
+        ''' Sample one trajectory with outcome sampling, update the regrets of
+            the traverser and the average policy of the other players
+
+        Args:
+            probs: The reach probability of the current node
+            sample_prob (float): The probability of sampling the current node
+            player_id: The traverser
+            chance_prob (float): The reach probability of the chance nodes. The
+              chance outcomes are sampled with their probabilities, so it is
+              also part of sample_prob
+
+        Returns:
+            utility (float): The estimated utility of the traverser
+        '''
+        self.visited_nodes += 1
+        if self.env.is_over():
+            return self.env.get_payoffs()[player_id]
+
+        if self.env.is_chance_node():
+            outcome_prob = self.step_chance_sample()
+            utility = self.traverse_outcome(probs, sample_prob * outcome_prob, player_id, chance_prob * outcome_prob)
+            self.env.step_back()
+            return utility
+
+        current_player = self.env.get_player_id()
+        obs, legal_actions = self.get_state(current_player)
+        infoset_id = self.table.get_id(obs)
+        action_probs = remove_illegal(self.table.regret_matching(infoset_id), legal_actions)
+
+        if current_player == player_id:
+            sample_probs = (1 - self.epsilon) * action_probs
+            sample_probs[legal_actions] += self.epsilon / len(legal_actions)
+        else:
+            sample_probs = action_probs
+        action = np.random.choice(self.env.action_num, p=sample_probs)
+
+        new_probs = probs.copy()
+        new_probs[current_player] *= action_probs[action]
+        self.env.step(action)
+        utility = self.traverse_outcome(new_probs, sample_prob * sample_probs[action], player_id, chance_prob)
+        self.env.step_back()
+
+        # The utilities of the actions are estimated with importance sampling
+        action_utilities = np.zeros(self.env.action_num)
+        action_utilities[action] = utility / sample_probs[action]
+        state_utility = action_probs[action] * action_utilities[action]
+
+        if current_player == player_id:
+            counterfactual_prob = (np.prod(probs[:current_player]) *
+                                    np.prod(probs[current_player + 1:]) * chance_prob)
+            self.table.regrets[infoset_id, legal_actions] += (action_utilities[legal_actions] - state_utility) * counterfactual_prob / sample_prob
+        else:
+            self.table.strategy_sums[infoset_id, legal_actions] += probs[current_player] * chance_prob * action_probs[legal_actions] / sample_prob
+        return state_utility
+
+    def step_chance_sample(self):
+        ''' Sample one outcome of the current chance node and apply it. It can
+            be reversed with step_back
+
+        Returns:
+            (float): The probability of the outcome
+        '''
+        outcomes = self.env.get_chance_outcomes()
+        index = np.random.choice(len(outcomes), p=[prob for _, prob in outcomes])
+        outcome, outcome_prob = outcomes[index]
+        self.env.step_chance(outcome)
+        return outcome_prob
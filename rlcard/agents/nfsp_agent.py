@@ -19,13 +19,14 @@ See the paper https://arxiv.org/abs/1603.01121 for more details.
 '''
 
 import collections
-import random
 import enum
 import numpy as np
 import tensorflow as tf
 
 from rlcard.agents.dqn_agent import DQNAgent
 from rlcard.utils.utils import remove_illegal
+from rlcard.utils.prefetcher import Prefetcher
+from rlcard.utils.replay_memory import ReservoirBuffer
 
 Transition = collections.namedtuple('Transition', 'info_state action_probs')
 
@@ -58,7 +59,9 @@ class NFSPAgent(object):
                  q_batch_size=256,
                  q_train_every=1,
                  q_mlp_layers=None,
-                 evaluate_with='average_policy'):
+                 evaluate_with='average_policy',
+                 prefetch_batches=0,
+                 pack_obs=False):
         ''' Initialize the NFSP agent.
 
         Args:
@@ -87,6 +90,11 @@ class NFSPAgent(object):
             q_train_step (int): Train the model every X steps.
             q_mlp_layers (list): The layer sizes of inner DQN agent.
             evaluate_with (string): The value can be 'best_response' or 'average_policy'
+            prefetch_batches (int): The number of minibatches of the average policy and of
+              the inner DQN agent that are prepared in background threads. With 0, they
+              are sampled in the training steps
+            pack_obs (boolean): Store the binary observations bit-packed in the reservoir buffer
+              and in the replay memory of the inner DQN agent
         '''
         self.use_raw = False
         self._sess = sess
@@ -99,8 +107,10 @@ class NFSPAgent(object):
         self._sl_learning_rate = sl_learning_rate
         self._anticipatory_param = anticipatory_param
         self._min_buffer_size_to_learn = min_buffer_size_to_learn
+        self._prefetch_batches = prefetch_batches
+        self._prefetcher = None
 
-        self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity)
+        self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity, ['info_state'] if pack_obs else [])
         self._prev_timestep = None
         self._prev_action = None
         self.evaluate_with = evaluate_with
@@ -113,7 +123,7 @@ class NFSPAgent(object):
 
         with tf.variable_scope(scope):
             # Inner RL agent
-            self._rl_agent = DQNAgent(sess, scope+'_dqn', q_replay_memory_size, q_replay_memory_init_size, q_update_target_estimator_every, q_discount_factor, q_epsilon_start, q_epsilon_end, q_epsilon_decay_steps, q_batch_size, action_num, state_shape, q_train_every, q_mlp_layers, rl_learning_rate)
+            self._rl_agent = DQNAgent(sess, scope+'_dqn', q_replay_memory_size, q_replay_memory_init_size, q_update_target_estimator_every, q_discount_factor, q_epsilon_start, q_epsilon_end, q_epsilon_decay_steps, q_batch_size, action_num, state_shape, q_train_every, q_mlp_layers, rl_learning_rate, prefetch_batches=prefetch_batches, pack_obs=pack_obs)
 
             with tf.variable_scope('sl'):
                 # Build supervised model
@@ -219,6 +229,64 @@ class NFSPAgent(object):
             raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
         return action, probs
 
+    def batch_step(self, states):
+        ''' Returns the actions to be taken for a batch of states with one
+            forward pass.
+
+        Args:
+            states (list): A list of state dictionaries
+
+        Returns:
+            actions (list): A list of action ids
+        '''
+        obs = np.array([state['obs'] for state in states])
+        if self._mode == MODE.best_response:
+            probs = self._rl_agent.batch_predict(obs)
+            for o, p in zip(obs, probs):
+                one_hot = np.eye(len(p))[np.argmax(p)]
+                self._add_transition(o, one_hot)
+
+        elif self._mode == MODE.average_policy:
+            probs = self._batch_act(obs)
+
+        actions = []
+        for p, state in zip(probs, states):
+            p = remove_illegal(p, state['legal_actions'])
+            actions.append(np.random.choice(len(p), p=p))
+        return actions
+
+    def batch_eval_step(self, states):
+        ''' Use the average policy for evaluating a batch of states
+
+        Args:
+            states (list): A list of state dictionaries
+
+        Returns:
+            actions (list): A list of action ids
+            probs (list): A list of the action probabilities for each state
+        '''
+        if self.evaluate_with == 'best_response':
+            return self._rl_agent.batch_eval_step(states)
+        elif self.evaluate_with == 'average_policy':
+            batch_probs = self._batch_act(np.array([state['obs'] for state in states]))
+            actions, probs = [], []
+            for p, state in zip(batch_probs, states):
+                p = remove_illegal(p, state['legal_actions'])
+                actions.append(np.random.choice(len(p), p=p))
+                probs.append(p)
+        else:
+            raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
+        return actions, probs
+
+    def close(self):
+        ''' Stop the background threads of the prefetchers of the average
+            policy and of the inner DQN agent, if any
+        '''
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+        self._rl_agent.close()
+
     def sample_episode_policy(self):
         ''' Sample average/best_response policy
         '''
@@ -236,10 +304,20 @@ class NFSPAgent(object):
         Returns:
             action_probs (numpy.array): The predicted action probability.
         '''
-        info_state = np.expand_dims(info_state, axis=0)
+        return self._batch_act(np.expand_dims(info_state, axis=0))[0]
+
+    def _batch_act(self, info_states):
+        ''' Predict action probabilities for a batch of observations
+
+        Args:
+            info_states (numpy.array): A batch of obervations.
+
+        Returns:
+            action_probs (numpy.array): The predicted action probabilities.
+        '''
         action_probs = self._sess.run(
                 self._avg_policy_probs,
-                feed_dict={self._info_state_ph: info_state, self.is_train: False})[0]
+                feed_dict={self._info_state_ph: info_states, self.is_train: False})
 
         return action_probs
 
@@ -270,75 +348,29 @@ class NFSPAgent(object):
                 len(self._reservoir_buffer) < self._min_buffer_size_to_learn):
             return None
 
-        transitions = self._reservoir_buffer.sample(self._batch_size)
-        info_states = [t.info_state for t in transitions]
-        action_probs = [t.action_probs for t in transitions]
+        if self._prefetch_batches > 0:
+            if self._prefetcher is None:
+                self._prefetcher = Prefetcher(self.sample_sl_batch, self._prefetch_batches)
+            feed_dict = self._prefetcher.get()
+        else:
+            feed_dict = self.sample_sl_batch()
 
         loss, _ = self._sess.run(
                 [self._loss, self._learn_step],
-                feed_dict={
-                        self._info_state_ph: info_states,
-                        self._action_probs_ph: action_probs,
-                        self.is_train: True,
-                })
+                feed_dict=feed_dict)
 
         return loss
 
-class ReservoirBuffer(object):
-    ''' Allows uniform sampling over a stream of data.
-
-    This class supports the storage of arbitrary elements, such as observation
-    tensors, integer actions, etc.
-
-    See https://en.wikipedia.org/wiki/Reservoir_sampling for more details.
-    '''
-
-    def __init__(self, reservoir_buffer_capacity):
-        ''' Initialize the buffer.
-        '''
-        self._reservoir_buffer_capacity = reservoir_buffer_capacity
-        self._data = []
-        self._add_calls = 0
-
-    def add(self, element):
-        ''' Potentially adds `element` to the reservoir buffer.
-
-        Args:
-            element (object): data to be added to the reservoir buffer.
-        '''
-        if len(self._data) < self._reservoir_buffer_capacity:
-            self._data.append(element)
-        else:
-            idx = np.random.randint(0, self._add_calls + 1)
-            if idx < self._reservoir_buffer_capacity:
-                self._data[idx] = element
-        self._add_calls += 1
-
-    def sample(self, num_samples):
-        ''' Returns `num_samples` uniformly sampled from the buffer.
-
-        Args:
-            num_samples (int): The number of samples to draw.
+    def sample_sl_batch(self):
+        ''' Sample a minibatch from the reservoir buffer and build the feed dict
+            of the average policy update
 
         Returns:
-            An iterable over `num_samples` random elements of the buffer.
-
-        Raises:
-            ValueError: If there are less than `num_samples` elements in the buffer
-        '''
-        if len(self._data) < num_samples:
-            raise ValueError("{} elements could not be sampled from size {}".format(
-                    num_samples, len(self._data)))
-        return random.sample(self._data, num_samples)
-
-    def clear(self):
-        ''' Clear the buffer
+            (dict): The feed dict
         '''
-        self._data = []
-        self._add_calls = 0
-
-    def __len__(self):
-        return len(self._data)
-
-    def __iter__(self):
-        return iter(self._data)
+        transitions = self._reservoir_buffer.sample(self._batch_size)
+        return {
+                self._info_state_ph: transitions.info_state,
+                self._action_probs_ph: transitions.action_probs,
+                self.is_train: True,
+        }
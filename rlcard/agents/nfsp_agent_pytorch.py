@@ -27,8 +27,9 @@ import torch.nn as nn
 import torch.nn.functional as F
 
 from rlcard.agents.dqn_agent_pytorch import DQNAgent
-from rlcard.agents.nfsp_agent import ReservoirBuffer
 from rlcard.utils.utils import remove_illegal
+from rlcard.utils.prefetcher import Prefetcher
+from rlcard.utils.replay_memory import ReservoirBuffer
 
 Transition = collections.namedtuple('Transition', 'info_state action_probs')
 
@@ -65,7 +66,9 @@ class NFSPAgent(object):
                  q_train_every=1,
                  q_mlp_layers=None,
                  evaluate_with='average_policy',
-                 device=None):
+                 device=None,
+                 prefetch_batches=0,
+                 pack_obs=False):
         ''' Initialize the NFSP agent.
 
         Args:
@@ -93,6 +96,11 @@ class NFSPAgent(object):
             q_train_step (int): Train the model every X steps.
             q_mlp_layers (list): The layer sizes of inner DQN agent.
             device (torch.device): Whether to use the cpu or gpu
+            prefetch_batches (int): The number of minibatches of the average policy and of
+              the inner DQN agent that are converted to tensors in background threads.
+              With 0, they are sampled in the training steps
+            pack_obs (boolean): Store the binary observations bit-packed in the reservoir buffer
+              and in the replay memory of the inner DQN agent
         '''
         self.use_raw = False
         self._scope = scope
@@ -104,8 +112,10 @@ class NFSPAgent(object):
         self._sl_learning_rate = sl_learning_rate
         self._anticipatory_param = anticipatory_param
         self._min_buffer_size_to_learn = min_buffer_size_to_learn
+        self._prefetch_batches = prefetch_batches
+        self._prefetcher = None
 
-        self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity)
+        self._reservoir_buffer = ReservoirBuffer(reservoir_buffer_capacity, ['info_state'] if pack_obs else [])
         self._prev_timestep = None
         self._prev_action = None
         self.evaluate_with = evaluate_with
@@ -125,7 +135,7 @@ class NFSPAgent(object):
         self._rl_agent = DQNAgent(scope+'_dqn', q_replay_memory_size, q_replay_memory_init_size, \
             q_update_target_estimator_every, q_discount_factor, q_epsilon_start, q_epsilon_end, \
             q_epsilon_decay_steps, q_batch_size, action_num, state_shape, q_train_every, q_mlp_layers, \
-            rl_learning_rate, device)
+            rl_learning_rate, device, prefetch_batches=prefetch_batches, pack_obs=pack_obs)
 
         # Build the average policy supervised model
         self._build_model()
@@ -206,6 +216,63 @@ class NFSPAgent(object):
             raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
         return action, probs
 
+    def batch_step(self, states):
+        ''' Returns the actions to be taken for a batch of states with one
+            forward pass.
+
+        Args:
+            states (list): A list of state dictionaries
+
+        Returns:
+            actions (list): A list of action ids
+        '''
+        obs = np.array([state['obs'] for state in states])
+        if self._mode == MODE.best_response:
+            probs = self._rl_agent.batch_predict(obs)
+            for o, p in zip(obs, probs):
+                self._add_transition(o, p)
+
+        elif self._mode == MODE.average_policy:
+            probs = self._batch_act(obs)
+
+        actions = []
+        for p, state in zip(probs, states):
+            p = remove_illegal(p, state['legal_actions'])
+            actions.append(np.random.choice(len(p), p=p))
+        return actions
+
+    def batch_eval_step(self, states):
+        ''' Use the average policy for evaluating a batch of states
+
+        Args:
+            states (list): A list of state dictionaries
+
+        Returns:
+            actions (list): A list of action ids
+            probs (list): A list of the action probabilities for each state
+        '''
+        if self.evaluate_with == 'best_response':
+            return self._rl_agent.batch_eval_step(states)
+        elif self.evaluate_with == 'average_policy':
+            batch_probs = self._batch_act(np.array([state['obs'] for state in states]))
+            actions, probs = [], []
+            for p, state in zip(batch_probs, states):
+                p = remove_illegal(p, state['legal_actions'])
+                actions.append(np.random.choice(len(p), p=p))
+                probs.append(p)
+        else:
+            raise ValueError("'evaluate_with' should be either 'average_policy' or 'best_response'.")
+        return actions, probs
+
+    def close(self):
+        ''' Stop the background threads of the prefetchers of the average
+            policy and of the inner DQN agent, if any
+        '''
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+        self._rl_agent.close()
+
     def sample_episode_policy(self):
         ''' Sample average/best_response policy
         '''
@@ -223,13 +290,23 @@ class NFSPAgent(object):
         Returns:
             action_probs (numpy.array): The predicted action probability.
         '''
-        info_state = np.expand_dims(info_state, axis=0)
-        info_state = torch.from_numpy(info_state).float().to(self.device)
+        return self._batch_act(np.expand_dims(info_state, axis=0))[0]
+
+    def _batch_act(self, info_states):
+        ''' Predict action probabilities for a batch of observations
+            Not connected to computation graph
+        Args:
+            info_states (numpy.array): A batch of obervations.
+
+        Returns:
+            action_probs (numpy.array): The predicted action probabilities.
+        '''
+        info_states = torch.from_numpy(info_states).float().to(self.device)
 
         with torch.no_grad():
-            log_action_probs = self.policy_network(info_state).cpu().numpy()
+            log_action_probs = self.policy_network(info_states).cpu().numpy()
 
-        action_probs = np.exp(log_action_probs)[0]
+        action_probs = np.exp(log_action_probs)
 
         return action_probs
 
@@ -260,19 +337,16 @@ class NFSPAgent(object):
                 len(self._reservoir_buffer) < self._min_buffer_size_to_learn):
             return None
 
-        transitions = self._reservoir_buffer.sample(self._batch_size)
-        info_states = [t.info_state for t in transitions]
-        action_probs = [t.action_probs for t in transitions]
+        if self._prefetch_batches > 0:
+            if self._prefetcher is None:
+                self._prefetcher = Prefetcher(self.sample_sl_batch, self._prefetch_batches)
+            info_states, eval_action_probs = self._prefetcher.get()
+        else:
+            info_states, eval_action_probs = self.sample_sl_batch()
 
         self.policy_network_optimizer.zero_grad()
         self.policy_network.train()
 
-        # (batch, state_size)
-        info_states = torch.from_numpy(np.array(info_states)).float().to(self.device)
-
-        # (batch, action_num)
-        eval_action_probs = torch.from_numpy(np.array(action_probs)).float().to(self.device)
-
         # (batch, action_num)
         log_forecast_action_probs = self.policy_network(info_states)
 
@@ -285,6 +359,18 @@ class NFSPAgent(object):
 
         return ce_loss
 
+    def sample_sl_batch(self):
+        ''' Sample a minibatch from the reservoir buffer and convert it to tensors
+
+        Returns:
+            info_states (torch.Tensor): (batch, state_size) the states
+            action_probs (torch.Tensor): (batch, action_num) the action probabilities
+        '''
+        transitions = self._reservoir_buffer.sample(self._batch_size)
+        info_states = torch.from_numpy(transitions.info_state).float().to(self.device)
+        action_probs = torch.from_numpy(transitions.action_probs).float().to(self.device)
+        return info_states, action_probs
+
     def get_state_dict(self):
         ''' Get the state dict to save models
 
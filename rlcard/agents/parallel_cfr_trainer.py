@@ -0,0 +1,168 @@
+''' Train CFR agents with multiple processes
+'''
+import time
+import multiprocessing as mp
+
+import numpy as np
+
+from rlcard.utils import assign_task
+
+class ParallelCFRTrainer(object):
+    ''' Shard the chance-sampled traversals of a CFRAgent across processes.
+        Each worker plays its own deals against the policy of the agent and
+        accumulates the regrets and the strategy sums in local arrays. The
+        deltas of all the workers are summed into the table of the agent
+        every sync_every iterations of each worker. Between two reductions,
+        a worker updates its local policy with its own regrets only.
+
+        One call of `train` counts as process_num * sync_every iterations of
+        the agent. The update rule of the agent is applied when reducing:
+        the regrets are floored once for CFR+ (the updates are not alternating),
+        and the discounts of the iterations are applied at once for Linear CFR
+        and DCFR.
+    '''
+
+    def __init__(self, agent, process_num, sync_every=1, seed=None, config=None):
+        ''' Initialize the trainer and start the workers
+
+        Args:
+            agent (CFRAgent): The agent to be trained
+            process_num (int): The number of worker processes
+            sync_every (int): The number of iterations that each worker does
+              between two reductions
+            seed (int): If set, worker i seeds its env with seed + i * 1000
+            config (dict): Additional configurations of the envs of the workers.
+              The infoset_key, suit_isomorphism and chance_nodes settings are
+              always taken from the env of the agent
+        '''
+        self.agent = agent
+        self.process_num = process_num
+        self.sync_every = sync_every
+        self.train_time = 0.0
+        self.iterations = 0
+
+        agent_config = {'update_rule': agent.update_rule,
+                        'prune_threshold': agent.prune_threshold,
+                        'prune_warmup': agent.prune_warmup,
+                        'explore_every': agent.explore_every}
+        # The workers must find the same information sets as the agent
+        env_config = dict(config or {})
+        for key in ['infoset_key', 'suit_isomorphism', 'chance_nodes']:
+            env_config[key] = getattr(agent.env, key, False)
+        env_config['allow_step_back'] = True
+        ctx = mp.get_context('spawn')
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(self.process_num)])
+        self.ps = []
+        for i, (work_remote, remote) in enumerate(zip(self.work_remotes, self.remotes)):
+            worker_config = dict(env_config)
+            worker_config['seed'] = None if seed is None else seed + i * 1000
+            self.ps.append(ctx.Process(target=worker, args=(work_remote, remote, agent.env.name, worker_config, agent_config)))
+        for p in self.ps:
+            p.daemon = True  # if the main process crashes, we should not cause things to hang
+            p.start()
+        for remote in self.work_remotes:
+            remote.close()
+
+        # The number of information sets of the agent known by the workers
+        self.synced_size = 0
+
+    @property
+    def iterations_per_second(self):
+        ''' The average number of iterations of the agent done per second of training
+        '''
+        if self.train_time == 0:
+            return 0.0
+        return self.iterations / self.train_time
+
+    def train(self):
+        ''' Let every worker do sync_every iterations, then reduce the deltas
+            into the table of the agent and update its policy
+        '''
+        self.agent._check_trainable()
+        start = time.time()
+        agent = self.agent
+        table = agent.table
+
+        # Send the new information sets and the regrets to the workers
+        new_keys = table.keys[self.synced_size:]
+        regrets = table.regrets[:table.size]
+        iteration = agent.iteration
+        for i, remote in enumerate(self.remotes):
+            remote.send(('train', (new_keys, regrets, iteration + i * self.sync_every, self.sync_every)))
+        self.synced_size = table.size
+
+        # Sum the deltas. The information sets found by the workers are appended to the table
+        for remote in self.remotes:
+            local_keys, regret_deltas, strategy_deltas, visited_nodes, pruned_subtrees = remote.recv()
+            agent.visited_nodes += visited_nodes
+            agent.pruned_subtrees += pruned_subtrees
+            shared_size = len(regret_deltas) - len(local_keys)
+            infoset_ids = np.arange(len(regret_deltas))
+            infoset_ids[shared_size:] = [table.get_id(key) for key in local_keys]
+            np.add.at(table.regrets, infoset_ids, regret_deltas)
+            np.add.at(table.strategy_sums, infoset_ids, strategy_deltas)
+
+        agent.iteration += self.process_num * self.sync_every
+        if agent.update_rule == 'cfr+':
+            table.floor_regrets()
+        elif agent.update_rule in ['linear', 'dcfr']:
+            positive_weight, negative_weight, strategy_weight = 1.0, 1.0, 1.0
+            for t in range(iteration + 1, agent.iteration + 1):
+                positive_weight *= t ** agent.alpha / (t ** agent.alpha + 1)
+                negative_weight *= t ** agent.beta / (t ** agent.beta + 1)
+                strategy_weight *= (t / (t + 1)) ** agent.gamma
+            table.discount(positive_weight, negative_weight, strategy_weight)
+        agent.update_policy()
+        self.train_time += time.time() - start
+        self.iterations += self.process_num * self.sync_every
+
+    def close(self):
+        ''' Stop the workers
+        '''
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for p in self.ps:
+            p.join()
+
+def worker(remote, parent_remote, env_id, config, agent_config):
+    import rlcard
+    from rlcard.agents.cfr_agent import CFRAgent
+    env = rlcard.make(env_id, config)
+    # The update rule only decides the weights of the strategy sums here
+    agent = CFRAgent(env, **agent_config)
+    table = agent.table
+    parent_remote.close()
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'train':
+                new_keys, regrets, iteration, iteration_num = data
+                # Forget the information sets that were only found by this
+                # worker, and start from the regrets of the agent
+                shared_size = len(regrets)
+                table.truncate(shared_size - len(new_keys))
+                for key in new_keys:
+                    table.get_id(key)
+                table.regrets[:shared_size] = regrets
+                table.strategy_sums[:shared_size] = 0
+                table.update_policy()
+
+                agent.visited_nodes = agent.pruned_subtrees = 0
+                for i in range(iteration_num):
+                    agent.iteration = iteration + i + 1
+                    for player_id in range(env.player_num):
+                        env.reset()
+                        agent.traverse_tree(np.ones(env.player_num), player_id)
+                    table.update_policy()
+
+                regret_deltas = table.regrets[:table.size].copy()
+                regret_deltas[:shared_size] -= regrets
+                remote.send((table.keys[shared_size:], regret_deltas, table.strategy_sums[:table.size].copy(),
+                             agent.visited_nodes, agent.pruned_subtrees))
+            elif cmd == 'close':
+                remote.close()
+                break
+            else:
+                raise NotImplementedError
+    except KeyboardInterrupt:
+        print('ParallelCFRTrainer worker: got KeyboardInterrupt')
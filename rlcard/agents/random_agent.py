@@ -42,3 +42,31 @@ class RandomAgent(object):
         for i in state['legal_actions']:
             probs[i] = 1/len(state['legal_actions'])
         return self.step(state), probs
+
+    def batch_step(self, states):
+        ''' Predict the actions given a batch of states
+
+        Args:
+            states (list): A list of state dictionaries
+
+        Returns:
+            actions (list): The actions predicted (randomly chosen) by the random agent
+        '''
+        return [self.step(state) for state in states]
+
+    def batch_eval_step(self, states):
+        ''' Predict the actions given a batch of states for evaluation
+
+        Args:
+            states (list): A list of state dictionaries
+
+        Returns:
+            actions (list): The actions predicted (randomly chosen) by the random agent
+            probs (list): The list of action probabilities for each state
+        '''
+        actions, probs = [], []
+        for state in states:
+            action, prob = self.eval_step(state)
+            actions.append(action)
+            probs.append(prob)
+        return actions, probs
@@ -1,5 +1,9 @@
 ''' Game-related and Env-related base classes
 '''
+from enum import Enum
+import types
+
+import numpy as np
 
 class Card(object):
     '''
@@ -12,6 +16,8 @@ class Card(object):
 
     suit = None
     rank = None
+    # Cards are never changed during a game, so game snapshots share them
+    snapshot_shared = True
     valid_suit = ['S', 'H', 'D', 'C', 'BJ', 'RJ']
     valid_rank = ['A', '2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K']
 
@@ -184,3 +190,306 @@ class Game(object):
         '''
         raise NotImplementedError
 
+    def snapshot(self):
+        ''' Take a snapshot of the current state of the game. The containers
+            and the objects of the game (round, dealer, players, etc.) are
+            copied, while the cards and the other immutable values are shared
+            with the game. The random number generator is also shared.
+
+        Returns:
+            (dict): The snapshot, which can be restored any number of times
+        '''
+        memo = {id(self): _GAME}
+        return copy_game_state(self.__dict__, memo)
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot. The snapshot is copied, so it is
+            left untouched and can be restored again later.
+
+        Args:
+            snapshot (dict): A snapshot returned by `snapshot`
+
+        Note: The game can not step back beyond the restored state.
+        '''
+        memo = {id(_GAME): self}
+        self.__dict__.update(copy_game_state(snapshot, memo))
+
+
+
+# Placeholder of the game itself in snapshots
+_GAME = object()
+
+_SHARED_TYPES = (type(None), bool, int, float, complex, str, bytes, frozenset, range, type, Enum,
+                 np.generic, np.random.RandomState, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+# Whether the values of a class are shared by the copies, cached by class
+_shared_classes = {}
+
+
+def _is_shared(cls):
+    shared = _shared_classes.get(cls)
+    if shared is None:
+        shared = issubclass(cls, _SHARED_TYPES) or getattr(cls, 'snapshot_shared', False)
+        _shared_classes[cls] = shared
+    return shared
+
+
+def copy_game_state(value, memo):
+    ''' Copy the state of a game without copying the cards. Lists, dicts,
+        sets, numpy arrays and game objects are copied, and the references
+        between them are kept. Cards (classes with `snapshot_shared` set),
+        enums, numbers, strings and random number generators are shared. A
+        journal is replaced by an empty one, so the copy starts with no step
+        back history.
+
+    Args:
+        value (object): The value to be copied
+        memo (dict): The copies made so far, keyed by the ids of the originals
+
+    Returns:
+        (object): The copy of the value
+    '''
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    cls = type(value)
+    if _is_shared(cls):
+        return value
+
+    if cls is list or cls is JournaledList:
+        if cls is list:
+            result = []
+        else:
+            result = JournaledList(copy_game_state(value.journal, memo))
+        memo[key] = result
+        list.extend(result, [item if _is_shared(type(item)) else copy_game_state(item, memo) for item in value])
+    elif cls is dict:
+        result = {}
+        memo[key] = result
+        for k, item in value.items():
+            result[k] = item if _is_shared(type(item)) else copy_game_state(item, memo)
+    elif cls is tuple:
+        result = tuple([copy_game_state(item, memo) for item in value])
+        memo[key] = result
+    elif cls is set:
+        result = set(value)
+        memo[key] = result
+    elif cls is np.ndarray:
+        result = value.copy()
+        memo[key] = result
+    elif cls is Journal:
+        result = Journal(value.enabled)
+        memo[key] = result
+    elif hasattr(value, '__dict__'):
+        result = cls.__new__(cls)
+        memo[key] = result
+        result.__dict__.update(copy_game_state(value.__dict__, memo))
+    else:
+        result = value
+    return result
+
+
+_MISSING = object()
+
+# Kinds of the entries in a journal
+_SET_ATTR, _SET_ITEM, _RESTORE_ITEMS, _POP, _INSERT = range(5)
+
+
+class Journal(object):
+    ''' Journal records the changes made to the game objects so that the
+        game can step back by reversing them. Unlike saving a deep copy of
+        the game at every step, the memory used by one step is proportional
+        to the number of fields the action changes.
+
+        A step starts with `mark`. The fields that an action may assign are
+        recorded with `record` and `record_item`, while the lists that are
+        modified in place (e.g., the deck and the hands) are wrapped once
+        with `track` so that their changes are recorded automatically.
+        `undo` then reverses everything recorded since the last mark.
+
+    Note: A journal that is not enabled records nothing and `track` returns
+          the lists untouched, so the games pay no cost if step back is off.
+    '''
+
+    def __init__(self, enabled=True):
+        ''' Initialize the journal
+
+        Args:
+            enabled (boolean): False if nothing should be recorded
+        '''
+        self.enabled = enabled
+        self.entries = []
+        self.marks = []
+
+    def __len__(self):
+        ''' Return the number of steps that can be reversed
+        '''
+        return len(self.marks)
+
+    def mark(self):
+        ''' Start recording a new step
+        '''
+        if self.enabled:
+            self.marks.append(len(self.entries))
+
+    def record(self, obj, *names):
+        ''' Record the current values of some attributes of an object
+
+        Args:
+            obj (object): The object whose attributes will be changed
+            names (str): The names of the attributes
+        '''
+        if self.enabled:
+            for name in names:
+                self.entries.append((_SET_ATTR, obj, name, getattr(obj, name, _MISSING)))
+
+    def record_item(self, container, key):
+        ''' Record the current value of one item of a list or a dict
+
+        Args:
+            container (list or dict): The container whose item will be changed
+            key (int or object): The index or the key of the item
+        '''
+        if self.enabled:
+            if isinstance(container, dict):
+                value = container.get(key, _MISSING)
+            else:
+                value = container[key]
+            self.entries.append((_SET_ITEM, container, key, value))
+
+    def record_items(self, items):
+        ''' Record all the items of a list, which is useful for small lists or
+            for rare changes such as shuffling
+
+        Args:
+            items (list): The list that will be changed
+        '''
+        if self.enabled:
+            self.entries.append((_RESTORE_ITEMS, items, None, list(items)))
+
+    def track(self, items):
+        ''' Wrap a list so that its in-place changes are recorded
+
+        Args:
+            items (list): The list to be tracked
+
+        Returns:
+            (list): A JournaledList with the same items, or the list itself
+              if the journal is not enabled
+        '''
+        if not self.enabled:
+            return items
+        return JournaledList(self, items)
+
+    def undo(self):
+        ''' Reverse the changes recorded since the last mark
+
+        Returns:
+            (boolean): True if there was a step to reverse
+        '''
+        if not self.marks:
+            return False
+        position = self.marks.pop()
+        entries = self.entries
+        while len(entries) > position:
+            kind, target, key, value = entries.pop()
+            if kind == _SET_ATTR:
+                if value is _MISSING:
+                    if hasattr(target, key):
+                        delattr(target, key)
+                else:
+                    setattr(target, key, value)
+            elif kind == _SET_ITEM:
+                if isinstance(target, list):
+                    list.__setitem__(target, key, value)
+                elif value is _MISSING:
+                    del target[key]
+                else:
+                    target[key] = value
+            elif kind == _RESTORE_ITEMS:
+                list.__setitem__(target, slice(None), value)
+            elif kind == _POP:
+                list.pop(target, key)
+            else:
+                list.insert(target, key, value)
+        return True
+
+    def clear(self):
+        ''' Forget all the recorded steps
+        '''
+        self.entries = []
+        self.marks = []
+
+
+class JournaledList(list):
+    ''' A list whose in-place changes are recorded in a journal. Appending to
+        and popping from the list take one entry each, while other changes
+        (e.g., shuffling) save a copy of the items.
+
+    Note: Copies of a journaled list are plain lists that are not tracked.
+    '''
+
+    def __init__(self, journal, items=()):
+        ''' Initialize the list
+
+        Args:
+            journal (Journal): The journal that records the changes
+            items (iterable): The initial items
+        '''
+        super(JournaledList, self).__init__(items)
+        self.journal = journal
+
+    def __reduce_ex__(self, protocol):
+        return (list, (list(self),))
+
+    def append(self, value):
+        list.append(self, value)
+        self.journal.entries.append((_POP, self, -1, None))
+
+    def pop(self, index=-1):
+        if index < 0:
+            index += len(self)
+        value = list.pop(self, index)
+        self.journal.entries.append((_INSERT, self, index, value))
+        return value
+
+    def insert(self, index, value):
+        if index < 0:
+            index += len(self)
+        index = min(max(index, 0), len(self))
+        list.insert(self, index, value)
+        self.journal.entries.append((_POP, self, index, None))
+
+    def remove(self, value):
+        self.pop(self.index(value))
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            self.journal.record_items(self)
+        else:
+            self.journal.entries.append((_SET_ITEM, self, key, self[key]))
+        list.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self.journal.record_items(self)
+        list.__delitem__(self, key)
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def extend(self, values):
+        self.journal.record_items(self)
+        list.extend(self, values)
+
+    def clear(self):
+        self.journal.record_items(self)
+        list.clear(self)
+
+    def sort(self, *args, **kwargs):
+        self.journal.record_items(self)
+        list.sort(self, *args, **kwargs)
+
+    def reverse(self):
+        self.journal.record_items(self)
+        list.reverse(self)
@@ -2,6 +2,7 @@
 '''
 from rlcard.envs.env import Env
 from rlcard.envs.vec_env import VecEnv
+from rlcard.envs.batched_env import BatchedEnv
 from rlcard.envs.registration import register, make
 
 register(
@@ -0,0 +1,136 @@
+'''
+A wrapper for stepping multiple environments in lockstep within a single process
+'''
+import numpy as np
+
+class BatchedEnv(object):
+    '''
+    The wrapper for a batch of environments that live in the current
+    process. Unlike `VecEnv`, no state is sent across processes. The
+    observations of all the environments are written into one
+    preallocated array together with a legal action mask, and the
+    environments are reset automatically once a game is over. This is
+    suitable for cheap games such as Blackjack, Leduc Hold'em and
+    Limit Hold'em, where the inter-process communication costs more
+    than the game logic. The batched environment does not support going
+    backward in the game tree.
+    '''
+
+    def __init__(self, env_id, config):
+        ''' Initialize the BatchedEnv class
+
+        Args:
+            env_id (string): The id of the environment, e.g., 'blackjack'
+            config (dict): The same as the config in Env
+        '''
+        from rlcard.envs.registration import registry
+        self.num = config['env_num']
+        self.envs = [registry.make(env_id, config) for _ in range(self.num)]
+
+        # A counter for the timesteps
+        self.timestep = 0
+
+        # Get the number of players/actions/state_shape in this game
+        self.player_num = self.envs[0].player_num
+        self.action_num = self.envs[0].action_num
+        self.state_shape = self.envs[0].state_shape
+
+        # Preallocated buffers that are overwritten at every step
+        self.obs = np.zeros([self.num] + list(self.state_shape), dtype=np.float32)
+        self.legal_actions_mask = np.zeros((self.num, self.action_num), dtype=bool)
+        self.player_ids = np.zeros(self.num, dtype=int)
+        self.rewards = np.zeros((self.num, self.player_num), dtype=np.float32)
+        self.dones = np.zeros(self.num, dtype=bool)
+
+        self._seed(config['seed'])
+
+    def set_agents(self, agents):
+        ''' Set the agents for all the environments
+
+        Args:
+            agents (list): List of Agent classes
+        '''
+        self.agents = agents
+        for env in self.envs:
+            env.set_agents(agents)
+
+    def reset(self):
+        ''' Start a new game in all the environments
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (numpy.array): The observations with shape (env_num, *state_shape)
+                (numpy.array): The legal action masks with shape (env_num, action_num)
+                (numpy.array): The IDs of the current players with shape (env_num,)
+
+        Note: The returned arrays are the internal buffers of the batched
+              environment and will be overwritten by the next call to `step`.
+        '''
+        for i, env in enumerate(self.envs):
+            state, player_id = env.reset()
+            self._write_state(i, state, player_id)
+        return self.obs, self.legal_actions_mask, self.player_ids
+
+    def step(self, actions, raw_action=False):
+        ''' Step forward all the environments. The environments whose games
+            are over are reset automatically, and the returned observations
+            are then the initial observations of the new games.
+
+        Args:
+            actions (list or numpy.array): The actions taken by the current players, one for each environment
+            raw_action (boolean): True if the actions are raw actions
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (numpy.array): The observations with shape (env_num, *state_shape)
+                (numpy.array): The legal action masks with shape (env_num, action_num)
+                (numpy.array): The IDs of the current players with shape (env_num,)
+                (numpy.array): The payoffs with shape (env_num, player_num). They are
+                  non-zero only for the environments that just finished a game
+                (numpy.array): The flags with shape (env_num,) that are True if a game
+                  is over in the corresponding environment
+
+        Note: The returned arrays are the internal buffers of the batched
+              environment and will be overwritten by the next call to `step`.
+        '''
+        self.rewards.fill(0)
+        self.dones.fill(False)
+        for i, env in enumerate(self.envs):
+            state, player_id = env.step(actions[i], raw_action)
+            if env.is_over():
+                self.rewards[i] = env.get_payoffs()
+                self.dones[i] = True
+                state, player_id = env.reset()
+            self._write_state(i, state, player_id)
+        self.timestep += self.num
+        return self.obs, self.legal_actions_mask, self.player_ids, self.rewards, self.dones
+
+    def run(self, is_training=False):
+        ''' Run X complete games, where X is the number of environemnts.
+            The input/output are the same as VecEnv.
+        '''
+        trajectories = [[] for _ in range(self.player_num)]
+        payoffs = []
+        for env in self.envs:
+            trs, payoff = env.run(is_training)
+            for i in range(self.player_num):
+                trajectories[i].extend(trs[i])
+            payoffs.append(payoff)
+        self.timestep = sum([env.timestep for env in self.envs])
+        return trajectories, payoffs
+
+    def _write_state(self, i, state, player_id):
+        ''' Write the state of the i-th environment into the buffers
+        '''
+        self.obs[i] = state['obs']
+        self.legal_actions_mask[i] = False
+        self.legal_actions_mask[i, state['legal_actions']] = True
+        self.player_ids[i] = player_id
+
+    def _seed(self, seed=None):
+        seeds = [None for _ in range(self.num)]
+        if seed is not None:
+            seeds = [env._seed(seed+i*1000) for i, env in enumerate(self.envs)]
+        return seeds
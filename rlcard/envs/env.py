@@ -1,5 +1,12 @@
+import copy
+import numpy as np
+
+from rlcard.core import copy_game_state
 from rlcard.utils import *
 
+# The player ID at the chance nodes
+CHANCE_PLAYER_ID = -1
+
 class Env(object):
     '''
     The base Env class. For all the environments in RLCard,
@@ -17,11 +24,32 @@ class Env(object):
                 'env_num' (int) - If env_num>1, the environment wil be run
                   with multiple processes. Note the implementation is
                   in `vec_env.py`.
+                'process_num' (int) - If env_num>1, the environments are
+                  split over process_num processes. If None, each
+                  environment has its own process.
+                'batched' (boolean) - If True and env_num>1, the
+                  environments will be stepped in lockstep in the current
+                  process. Note the implementation is in `batched_env.py`.
+                'shared_memory' (boolean) - If True and env_num>1, the
+                  workers write the observations, legal actions, rewards
+                  and done flags into shared memory instead of sending
+                  them through pipes. Requires Python 3.8 or later.
                 'allow_step_back' (boolean) - True if allowing
                  step_back.
                 'allow_raw_data' (boolean) - True if allow
                  raw obs in state['raw_obs'] and raw legal actions in
                  state['raw_legal_actions'].
+                'infoset_key' (boolean) - True if adding the key of the
+                 information set of the player in state['infoset_key'],
+                 see `get_infoset_key`.
+                'suit_isomorphism' (boolean) - True if the cards in the
+                 observations and the information set keys are mapped to
+                 their suit isomorphism class. Only supported by Leduc
+                 Hold'em and Limit Hold'em.
+                'chance_nodes' (boolean) - True if the chance events (e.g.,
+                 the deals) are exposed as chance nodes instead of being
+                 sampled, see `get_chance_outcomes`. Only supported by
+                 Leduc Hold'em, with env_num=1.
                 'single_agent_mode' (boolean) - True if single agent mode,
                  i.e., the other players are pretrained models.
                 'active_player' (int) - If 'singe_agent_mode' is True,
@@ -38,6 +66,17 @@ class Env(object):
         '''
         self.allow_step_back = self.game.allow_step_back = config['allow_step_back']
         self.allow_raw_data = config['allow_raw_data']
+        self.infoset_key = config['infoset_key']
+        self.suit_isomorphism = config['suit_isomorphism']
+        if self.suit_isomorphism and self.name not in ['leduc-holdem', 'limit-holdem']:
+            raise ValueError('{} does not support suit_isomorphism'.format(self.name))
+        self.chance_nodes = config['chance_nodes']
+        if self.chance_nodes:
+            if not hasattr(self.game, 'step_chance'):
+                raise ValueError('{} does not support chance_nodes'.format(self.name))
+            if config['single_agent_mode']:
+                raise ValueError('chance_nodes is not supported in single agent mode')
+            self.game.chance_nodes = True
         self.record_action = config['record_action']
         if self.record_action:
             self.action_recorder = []
@@ -97,7 +136,7 @@ class Env(object):
             if not self.game.is_over():
                 break
 
-        return self._extract_state(state)
+        return self._add_infoset_key(self._extract_state(state), player_id)
 
     def step(self, action, raw_action=False):
         ''' Step forward
@@ -122,8 +161,10 @@ class Env(object):
         if self.record_action:
             self.action_recorder.append([self.get_player_id(), action])
         next_state, player_id = self.game.step(action)
+        if self.is_chance_node():
+            return None, CHANCE_PLAYER_ID
 
-        return self._extract_state(next_state), player_id
+        return self._add_infoset_key(self._extract_state(next_state), player_id), player_id
 
     def step_back(self):
         ''' Take one step backward.
@@ -142,11 +183,89 @@ class Env(object):
         if not self.game.step_back():
             return False
 
+        if self.is_chance_node():
+            return None, CHANCE_PLAYER_ID
         player_id = self.get_player_id()
         state = self.get_state(player_id)
 
         return state, player_id
 
+    def clone(self):
+        ''' Make a copy of the environment at the current state, which can be
+            stepped independently, e.g., for rollouts or tree search that
+            branch from one state. The game is copied with `copy_game_state`,
+            so the cards are shared instead of deep copied. The agents, the
+            pre-trained models and the random number generator are shared
+            with this environment.
+
+        Returns:
+            (Env): The copy of the environment
+
+        Note: The copy can not step back beyond the state it is cloned from.
+              To branch from the same state many times, it is cheaper to
+              take one `snapshot` of the game and `restore` it.
+        '''
+        env = copy.copy(self)
+        env.game = copy.copy(self.game)
+        env.game.__dict__.update(copy_game_state(self.game.__dict__, {id(self.game): env.game}))
+        if self.record_action:
+            env.action_recorder = list(self.action_recorder)
+        return env
+
+    def is_chance_node(self):
+        ''' Check whether the current node is a chance node. It is always
+            False unless the env is made with `chance_nodes=True`.
+
+        Returns:
+            (boolean): True if the next event is a chance event
+        '''
+        return self.chance_nodes and self.game.is_chance_node()
+
+    def get_chance_outcomes(self):
+        ''' Get the outcomes of the current chance node, e.g., to compute the
+            exact expected values in CFR instead of sampling the deals
+
+        Returns:
+            (list): A list of (outcome, probability) tuples
+        '''
+        return self.game.get_chance_outcomes()
+
+    def step_chance(self, outcome):
+        ''' Apply an outcome of the current chance node. It can be reversed
+            with `step_back` like the actions.
+
+        Args:
+            outcome (object): One of the outcomes of `get_chance_outcomes`
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (dict): The next state, or None at a chance node
+                (int): The ID of the next player, or CHANCE_PLAYER_ID at a chance node
+        '''
+        self.game.step_chance(outcome)
+        if self.is_chance_node():
+            return None, CHANCE_PLAYER_ID
+        player_id = self.get_player_id()
+        return self.get_state(player_id), player_id
+
+    def sample_chance(self):
+        ''' Sample the outcomes of the chance nodes with the random number
+            generator of the env until a player has to act
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (dict): The next state
+                (int): The ID of the next player
+        '''
+        while self.is_chance_node():
+            outcomes = self.get_chance_outcomes()
+            index = self.np_random.choice(len(outcomes), p=[prob for _, prob in outcomes])
+            self.step_chance(outcomes[index][0])
+        player_id = self.get_player_id()
+        return self.get_state(player_id), player_id
+
     def set_agents(self, agents):
         '''
         Set the agents that will interact with the environment.
@@ -186,6 +305,8 @@ class Env(object):
 
         trajectories = [[] for _ in range(self.player_num)]
         state, player_id = self.reset()
+        if self.is_chance_node():
+            state, player_id = self.sample_chance()
 
         # Loop to play the game
         trajectories[player_id].append(state)
@@ -198,6 +319,8 @@ class Env(object):
 
             # Environment steps
             next_state, next_player_id = self.step(action, self.agents[player_id].use_raw)
+            if self.is_chance_node():
+                next_state, next_player_id = self.sample_chance()
             # Save action
             trajectories[player_id].append(action)
 
@@ -234,8 +357,10 @@ class Env(object):
         ''' Get the current player id
 
         Returns:
-            (int): The id of the current player
+            (int): The id of the current player, or CHANCE_PLAYER_ID at a chance node
         '''
+        if self.is_chance_node():
+            return CHANCE_PLAYER_ID
         return self.game.get_player_id()
 
 
@@ -248,7 +373,28 @@ class Env(object):
         Returns:
             (numpy.array): The observed state of the player
         '''
-        return self._extract_state(self.game.get_state(player_id))
+        return self._add_infoset_key(self._extract_state(self.game.get_state(player_id)), player_id)
+
+    def get_infoset_key(self, player_id):
+        ''' Get a compact key of the information set of a player, which is
+            much cheaper to hash and to store than `state['obs'].tostring()`.
+            Tabular agents such as CFRAgent use it instead of the observation
+            if the env is made with `infoset_key=True`.
+
+            The default key packs the observation into bits if it is binary.
+            The envs that can derive the key directly from the game (e.g., the
+            cards and the betting history in Hold'em) override this function.
+
+        Args:
+            player_id (int): The player id
+
+        Returns:
+            (bytes): The key of the information set
+        '''
+        obs = self._extract_state(self.game.get_state(player_id))['obs']
+        if ((obs == 0) | (obs == 1)).all():
+            return np.packbits(obs.astype(np.uint8)).tobytes()
+        return obs.tobytes()
 
     def get_payoffs(self):
         ''' Get the payoffs of players. Must be implemented in the child class.
@@ -287,7 +433,17 @@ class Env(object):
         state, player_id = self.game.init_game()
         if self.record_action:
             self.action_recorder = []
-        return self._extract_state(state), player_id
+        if self.is_chance_node():
+            return None, CHANCE_PLAYER_ID
+        return self._add_infoset_key(self._extract_state(state), player_id), player_id
+
+    def _add_infoset_key(self, extracted_state, player_id):
+        ''' Add the key of the information set to the extracted state if the
+            env is made with `infoset_key=True`
+        '''
+        if self.infoset_key:
+            extracted_state['infoset_key'] = self.get_infoset_key(player_id)
+        return extracted_state
 
     def _load_model(self):
         ''' Load pretrained/rule model
@@ -358,7 +514,7 @@ class Env(object):
             state = self.reset()
             return state, reward, done
 
-        return self._extract_state(state), reward, done
+        return self._add_infoset_key(self._extract_state(state), player_id), reward, done
 
     @staticmethod
     def init_game():
@@ -83,6 +83,25 @@ class LeducholdemEnv(Env):
         '''
         return self.game.get_payoffs()
 
+    def get_infoset_key(self, player_id):
+        ''' Get the key of the information set of a player, made of the hand,
+            the public card and the betting history, e.g., b'SKHQ:rc/c'.
+            The suits never matter in Leduc Hold'em, so only the ranks are
+            kept with suit_isomorphism, e.g., b'KQ:rc/c', as in the observation.
+
+        Args:
+            player_id (int): The player id
+
+        Returns:
+            (bytes): The key of the information set
+        '''
+        cards = [self.game.players[player_id].hand.get_index()]
+        if self.game.public_card:
+            cards.append(self.game.public_card.get_index())
+        if self.suit_isomorphism:
+            cards = [card[1] for card in cards]
+        return ''.join(cards).encode() + b':' + self.game.action_history
+
     def _decode_action(self, action_id):
         ''' Decode the action for applying to the game
 
@@ -5,6 +5,7 @@ import numpy as np
 import rlcard
 from rlcard.envs import Env
 from rlcard.games.limitholdem import Game
+from rlcard.games.limitholdem.utils import canonicalize_cards, sort_cards
 
 DEFAULT_GAME_CONFIG = {
         'game_player_num': 2,
@@ -53,6 +54,8 @@ class LimitholdemEnv(Env):
 
         public_cards = state['public_cards']
         hand = state['hand']
+        if self.suit_isomorphism:
+            hand, public_cards = canonicalize_cards(hand, public_cards)
         raise_nums = state['raise_nums']
         cards = public_cards + hand
         idx = [self.card2index[card] for card in cards]
@@ -77,6 +80,26 @@ class LimitholdemEnv(Env):
         '''
         return self.game.get_payoffs()
 
+    def get_infoset_key(self, player_id):
+        ''' Get the key of the information set of a player, made of the hand,
+            the public cards and the betting history, e.g., b'SAHK:rc/cc/'.
+            The cards of each round are sorted, and with suit_isomorphism,
+            they are canonicalized.
+
+        Args:
+            player_id (int): The player id
+
+        Returns:
+            (bytes): The key of the information set
+        '''
+        hand = [card.get_index() for card in self.game.players[player_id].hand]
+        public_cards = [card.get_index() for card in self.game.public_cards]
+        if self.suit_isomorphism:
+            hand, public_cards = canonicalize_cards(hand, public_cards)
+        else:
+            hand, public_cards = sort_cards(hand, public_cards)
+        return ''.join(hand + public_cards).encode() + b':' + self.game.action_history
+
     def _decode_action(self, action_id):
         ''' Decode the action for applying to the game
 
@@ -6,6 +6,7 @@ import rlcard
 from rlcard.envs import Env
 from rlcard.games.nolimitholdem import Game
 from rlcard.games.nolimitholdem.round import Action
+from rlcard.games.limitholdem.utils import sort_cards
 
 DEFAULT_GAME_CONFIG = {
         'game_player_num': 2,
@@ -83,6 +84,22 @@ class NolimitholdemEnv(Env):
         '''
         return np.array(self.game.get_payoffs())
 
+    def get_infoset_key(self, player_id):
+        ''' Get the key of the information set of a player, made of the hand,
+            the public cards and the betting history, e.g., b'SAHK:rc/cc/'.
+            The cards of each round are sorted.
+
+        Args:
+            player_id (int): The player id
+
+        Returns:
+            (bytes): The key of the information set
+        '''
+        hand = [card.get_index() for card in self.game.players[player_id].hand]
+        public_cards = [card.get_index() for card in self.game.public_cards]
+        hand, public_cards = sort_cards(hand, public_cards)
+        return ''.join(hand + public_cards).encode() + b':' + self.game.action_history
+
     def _decode_action(self, action_id):
         ''' Decode the action for applying to the game
 
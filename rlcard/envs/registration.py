@@ -1,5 +1,5 @@
 import importlib
-from rlcard.envs import VecEnv
+from rlcard.envs import VecEnv, BatchedEnv
 
 # Default Config
 DEFAULT_CONFIG = {
@@ -10,6 +10,12 @@ DEFAULT_CONFIG = {
         'record_action' : False,
         'seed': None,
         'env_num': 1,
+        'process_num': None,
+        'batched': False,
+        'shared_memory': False,
+        'infoset_key': False,
+        'suit_isomorphism': False,
+        'chance_nodes': False,
         }
 
 class EnvSpec(object):
@@ -88,6 +94,10 @@ def make(env_id, config={}):
         env_id (string): The name of the environment
         config (dict): A dictionary of the environment settings
         env_num (int): The number of environments
+        process_num (int): The number of processes that host the environments.
+          If None, each environment has its own process
+        batched (boolean): If True and env_num>1, all the environments
+          are stepped in lockstep in the current process
     '''
     _config = DEFAULT_CONFIG.copy()
     for key in config:
@@ -96,7 +106,12 @@ def make(env_id, config={}):
     # Do some checkings on the modes
     if not isinstance(_config['active_player'], int) or _config['active_player'] < 0:
         raise ValueError('Active player should be a non-negative integer')
+    if _config['chance_nodes'] and _config['env_num'] > 1:
+        # The rollouts of VecEnv and BatchedEnv do not sample the chance nodes
+        raise ValueError('chance_nodes is only supported with env_num=1')
     if _config['env_num'] == 1:
         return registry.make(env_id, _config)
+    elif _config['batched']:
+        return BatchedEnv(env_id, _config)
     else:
         return VecEnv(env_id, _config)
@@ -2,15 +2,20 @@
 A wrapper for running multiple environments with multiple processes
 Reference: https://github.com/openai/baselines/blob/master/baselines/common/vec_env/subproc_vec_env.py
 '''
+import sys
 import multiprocessing as mp
+import numpy as np
 
-from rlcard.utils import reorganize
+from rlcard.utils import reorganize, assign_task
 
 class VecEnv(object):
     '''
     The wrraper for a vector of environments. Here, only the
     basic interfaces of `env` are implemented. The vec environment
-    does not support going backward in the game tree.
+    does not support going backward in the game tree. Each process
+    hosts a slice of the environments and steps them in a loop for
+    every command, so that the number of processes can be much
+    smaller than the number of environments.
     '''
 
     def __init__(self, env_id, config):
@@ -20,13 +25,27 @@ class VecEnv(object):
             env_id (string): The id of the environment, e.g., 'blackjack'
             config (dict): The same as the config in Env
         '''
+        # multiprocessing.shared_memory is new in Python 3.8
+        self.shared_memory = config['shared_memory']
+        if self.shared_memory and sys.version_info < (3, 8):
+            raise ValueError('shared_memory requires Python 3.8 or later')
+
         self.num = config['env_num']
+        self.process_num = min(config['process_num'] or self.num, self.num)
+
+        # Assign the environments to the processes
+        self.slices = []
+        offset = 0
+        for env_num in assign_task(self.num, self.process_num):
+            self.slices.append((offset, env_num))
+            offset += env_num
+        self.env_process = [p for p, (_, env_num) in enumerate(self.slices) for _ in range(env_num)]
 
         # For multiprocessing
         ctx = mp.get_context('spawn')
-        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(self.num)])
-        self.ps = [ctx.Process(target=worker, args=(work_remote, remote, env_id, config))
-                    for (work_remote, remote) in zip(self.work_remotes, self.remotes)]
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(self.process_num)])
+        self.ps = [ctx.Process(target=worker, args=(work_remote, remote, env_id, config, env_num))
+                    for (work_remote, remote, (_, env_num)) in zip(self.work_remotes, self.remotes, self.slices)]
         for p in self.ps:
             p.daemon = True  # if the main process crashes, we should not cause things to hang
             p.start()
@@ -40,147 +59,449 @@ class VecEnv(object):
         self.remotes[0].send(('info', None))
         self.player_num, self.action_num, self.state_shape = self.remotes[0].recv()
 
+        # The shared memory is created at the first reset, which gives the
+        # data type of the observations
+        self.buffers = None
+
+        # The current states of the continuous rollouts
+        self.states = None
+        self.player_ids = None
+        self.waiting = None
+
         self._seed(config['seed'])
 
     def set_agents(self, agents):
         self.agents = agents
 
+    def reset(self):
+        ''' Start a new game in all the environments for the continuous
+            rollouts with `step_async` and `step_wait`.
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (list): The begining states of the environments
+                (list): The begining players of the environments
+        '''
+        self.states, self.player_ids = self._reset(list(range(self.num)), record=True)
+        return self.states, self.player_ids
+
+    def step_async(self, actions, raw_action=False):
+        ''' Send the actions to all the environments without waiting for the
+            results. The environments whose games are over will be reset
+            automatically by the workers.
+
+        Args:
+            actions (list): The actions taken by the current players, one for each environment
+            raw_action (boolean or list): True if the actions are raw actions. It
+              can also be a list with one flag for each environment
+        '''
+        if self.states is None:
+            raise ValueError('Please call reset() before step_async()')
+        if not isinstance(raw_action, (list, tuple)):
+            raw_action = [raw_action for _ in range(self.num)]
+        env_ids = list(range(self.num))
+        self.waiting = self._send('step_auto', env_ids, list(zip(actions, raw_action)))
+
+    def step_wait(self):
+        ''' Wait for the results of `step_async`
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (list): The next states. If a game is over, it is the
+                  begining state of the new game in that environment
+                (list): The IDs of the next players
+                (list): The flags that are True if a game has finished
+                (list): The trajectories of the finished games, organized
+                  as in Env.run. The entry is None if the game is not over
+                (list): The payoffs of the finished games. The entry is
+                  None if the game is not over
+        '''
+        results = self._recv(list(range(self.num)), self.waiting)
+        self.waiting = None
+        self.states, self.player_ids, dones, trajectories, payoffs = [], [], [], [], []
+        for i, (state, player_id, done, trajectory, payoff) in enumerate(results):
+            self.states.append(self._decode_state(i, state))
+            self.player_ids.append(player_id)
+            dones.append(done)
+            trajectories.append(trajectory)
+            payoffs.append(payoff)
+        self.timestep += self.num
+        return self.states, self.player_ids, dones, trajectories, payoffs
+
+    def rollout(self, episode_num, is_training=False):
+        ''' Keep all the environments busy until `episode_num` games are
+            finished. Unlike `run`, the finished environments are reset
+            immediately instead of waiting for the longest game, and the
+            unfinished games are continued by the next call of `rollout`.
+
+        Args:
+            episode_num (int): The number of games to collect
+            is_training (boolean): True if for training purpose
+
+        Returns:
+            (tuple): Tuple containing:
+
+                (list): The transitions for each player stacked over the finished games
+                (list): The payoffs of the finished games
+        '''
+        if self.states is None:
+            self.reset()
+        all_trajectories = [[] for _ in range(self.player_num)]
+        all_payoffs = []
+        while len(all_payoffs) < episode_num:
+            actions = self._agents_step(self.states, self.player_ids, is_training)
+            raw_action = [self.agents[player_id].use_raw for player_id in self.player_ids]
+            self.step_async(actions, raw_action)
+            _, _, dones, trajectories, payoffs = self.step_wait()
+            for i in range(self.num):
+                if dones[i]:
+                    for j in range(self.player_num):
+                        all_trajectories[j].extend(trajectories[i][j])
+                    all_payoffs.append(payoffs[i])
+        return all_trajectories, all_payoffs
+
     def run(self, is_training=False):
         ''' Run X complete games, where X is the number of environemnts.
             The input/output are similar to Env. The difference is that
             The transitions for each player are stacked over the environments
         '''
         trajectories = [[[] for _ in range(self.player_num)] for _ in range(self.num)]
-        ready_trajectories = [None for _ in range(self.num)]
-        active_remotes = [remote for remote in self.remotes]
-        mapping = [i for i in range(self.num)]
-        active_num = self.num
+        states = [None for _ in range(self.num)]
+        player_ids = [None for _ in range(self.num)]
+        active = list(range(self.num))
+
+        # The continuous rollouts are interrupted
+        self.states = None
+        self.player_ids = None
 
         # Reset
-        states = []
-        player_ids = []
-        for state, player_id in send_command_to_all(active_remotes, ('reset', None)):
-            states.append(state)
-            player_ids.append(player_id)
-        for i in range(active_num):
-            trajectories[i][player_ids[i]].append(states[i])
+        for i, state, player_id in zip(active, *self._reset(active)):
+            states[i] = state
+            player_ids[i] = player_id
+            trajectories[i][player_id].append(states[i])
 
         # Loop until all the environments are over
-        while active_num > 0:
+        while len(active) > 0:
             # Agent playes
-            # TODO: Currently we naively feed one obs to the agent. This can be improved via batch
-            commands = []
-            actions = []
-            for i in range(active_num):
-                opt = 'raw_step' if self.agents[player_ids[i]].use_raw else 'step'
-                if not is_training:
-                    action, _ = self.agents[player_ids[i]].eval_step(states[i])
-                else:
-                    action = self.agents[player_ids[i]].step(states[i])
-                commands.append((opt, action))
-                actions.append(action)
+            actions = self._agents_step([states[i] for i in active], [player_ids[i] for i in active], is_training)
 
             # Environment steps
-            next_states, next_player_ids, dones = [], [], []
-            for next_state, next_player_id, done in send_commands_to_all(active_remotes, commands):
-                next_states.append(next_state)
-                next_player_ids.append(next_player_id)
-                dones.append(done)
-
-            # Save action
-            for i in range(active_num):
-                trajectories[i][player_ids[i]].append(actions[i])
+            args = [(actions[k], self.agents[player_ids[i]].use_raw) for k, i in enumerate(active)]
+            results = self._call('step', active, args)
 
-            # Set the state and player
-            states = next_states
-            player_ids = next_player_ids
-
-            # Save state
             finished = []
-            for i in range(active_num):
-                if dones[i]:
-                    # Add a final state to all the players
-                    for j in range(self.player_num):
-                        active_remotes[i].send(('get_state', j))
-                        trajectories[i][j].append(active_remotes[i].recv())
+            for k, i in enumerate(active):
+                # Save action
+                trajectories[i][player_ids[i]].append(actions[k])
+
+                # Set the state and player
+                next_state, next_player_id, done = results[k]
+                states[i] = self._decode_state(i, next_state)
+                player_ids[i] = next_player_id
 
-                    # Save the ready trajectories and mark them as finished
-                    ready_trajectories[mapping[i]] = trajectories[i]
+                # Save state
+                if self._decode_done(i, done):
                     finished.append(i)
                 else:
                     trajectories[i][player_ids[i]].append(states[i])
 
+            # Add a final state to all the players
+            if finished:
+                env_ids = [i for i in finished for _ in range(self.player_num)]
+                player_list = [j for _ in finished for j in range(self.player_num)]
+                for i, j, state in zip(env_ids, player_list, self._call('get_state', env_ids, player_list)):
+                    trajectories[i][j].append(state)
 
             # Pop out the finished ones
-            trajectories = [trajectories[i] for i in range(active_num) if i not in finished]
-            mapping = [mapping[i] for i in range(active_num) if i not in finished]
-            active_remotes = [active_remotes[i] for i in range(active_num) if i not in finished]
-            states = [states[i] for i in range(active_num) if i not in finished]
-            player_ids = [player_ids[i] for i in range(active_num) if i not in finished]
-
-            self.timestep += active_num
-            active_num -= len(finished)
+            self.timestep += len(active)
+            active = [i for i in active if i not in finished]
 
         # Payoffs
-        payoffs = send_command_to_all(self.remotes, ('get_payoffs', None))
+        if self.buffers is not None:
+            payoffs = [self.buffers.rewards[i].copy() for i in range(self.num)]
+        else:
+            payoffs = self._call('get_payoffs', list(range(self.num)))
 
         for i in range(self.num):
-            ready_trajectories[i] = reorganize(ready_trajectories[i], payoffs[i])
+            trajectories[i] = reorganize(trajectories[i], payoffs[i])
 
-        trajectories = [[] for _ in range(self.player_num)]
-        for trs in ready_trajectories:
+        ready_trajectories = [[] for _ in range(self.player_num)]
+        for trs in trajectories:
             for i in range(self.player_num):
-                trajectories[i].extend(trs[i])
-        return trajectories, payoffs
+                ready_trajectories[i].extend(trs[i])
+        return ready_trajectories, payoffs
+
+    def _agents_step(self, states, player_ids, is_training):
+        ''' Let the agents choose the actions for all the active environments.
+            The environments are grouped by the current player so that each
+            agent is called once with a batch of states if it implements
+            `batch_step`/`batch_eval_step`. Otherwise, the agent is called
+            once per state.
+
+        Args:
+            states (list): The states of the active environments
+            player_ids (list): The current players of the active environments
+            is_training (boolean): True if for training purpose
+
+        Returns:
+            (list): The actions for the active environments
+        '''
+        actions = [None for _ in range(len(states))]
+        for player_id in set(player_ids):
+            agent = self.agents[player_id]
+            indices = [i for i in range(len(states)) if player_ids[i] == player_id]
+            batch = [states[i] for i in indices]
+            if not is_training and hasattr(agent, 'batch_eval_step'):
+                batch_actions, _ = agent.batch_eval_step(batch)
+            elif is_training and hasattr(agent, 'batch_step'):
+                batch_actions = agent.batch_step(batch)
+            elif not is_training:
+                batch_actions = [agent.eval_step(state)[0] for state in batch]
+            else:
+                batch_actions = [agent.step(state) for state in batch]
+            for i, action in zip(indices, batch_actions):
+                actions[i] = action
+        return actions
+
+    def close(self):
+        ''' Stop the workers and release the shared memory
+        '''
+        if self.waiting is not None:
+            self._recv(list(range(self.num)), self.waiting)
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for p in self.ps:
+            p.join()
+        if self.buffers is not None:
+            self.buffers.close()
+            self.buffers.unlink()
+            self.buffers = None
+
+    def _reset(self, env_ids, record=False):
+        ''' Reset the given environments. With shared memory, the first reset
+            sends the observations through the pipes and the buffers are
+            created with their data type.
+
+        Args:
+            env_ids (list): The indices of the environments
+            record (boolean): True if the workers record the trajectories
+              for the continuous rollouts
+
+        Returns:
+            (tuple): The begining states and players of the environments
+        '''
+        results = self._call('reset', env_ids, [record for _ in env_ids])
+        states = [self._decode_state(i, state) for i, (state, _) in zip(env_ids, results)]
+        if self.shared_memory and self.buffers is None:
+            obs_dtype = np.asarray(states[0]['obs']).dtype
+            self.buffers = SharedBuffers(self.num, self.player_num, self.action_num, self.state_shape, obs_dtype)
+            for remote, (offset, _) in zip(self.remotes, self.slices):
+                remote.send(('attach', (self.buffers.spec(), offset)))
+            for remote in self.remotes:
+                remote.recv()
+        return states, [player_id for _, player_id in results]
+
+    def _decode_state(self, idx, state):
+        ''' Rebuild the state of the idx-th environment. If shared memory is
+            used, the observation and the legal actions are read from the
+            buffers and the worker only sends the remaining fields.
+        '''
+        if self.buffers is None:
+            return state
+        state['obs'] = self.buffers.obs[idx].copy()
+        state['legal_actions'] = np.flatnonzero(self.buffers.legal_actions_mask[idx]).tolist()
+        return state
+
+    def _decode_done(self, idx, done):
+        if self.buffers is None:
+            return done
+        return bool(self.buffers.dones[idx])
+
+    def _send(self, cmd, env_ids, args=None):
+        ''' Send a command to the processes that host the given environments.
+            Each process receives one message for its slice of environments.
+
+        Args:
+            cmd (string): The command
+            env_ids (list): The indices of the environments
+            args (list): The argument of the command for each environment
+
+        Returns:
+            (list): The requests sent to each process
+        '''
+        requests = [[] for _ in range(self.process_num)]
+        for k, i in enumerate(env_ids):
+            p = self.env_process[i]
+            requests[p].append((i - self.slices[p][0], None if args is None else args[k]))
+        for remote, request in zip(self.remotes, requests):
+            if request:
+                remote.send((cmd, request))
+        return requests
+
+    def _recv(self, env_ids, requests):
+        ''' Receive the results of the requests sent by `_send`
+
+        Returns:
+            (list): The results in the order of `env_ids`
+        '''
+        results = {}
+        for p, (remote, request) in enumerate(zip(self.remotes, requests)):
+            if request:
+                for (local_id, _), result in zip(request, remote.recv()):
+                    results.setdefault(local_id + self.slices[p][0], []).append(result)
+        return [results[i].pop(0) for i in env_ids]
+
+    def _call(self, cmd, env_ids, args=None):
+        ''' Send a command to the given environments and wait for the results
+        '''
+        return self._recv(env_ids, self._send(cmd, env_ids, args))
 
     def _seed(self, seed=None):
         seeds = [None for _ in range(self.num)]
         if seed is not None:
-            commands = [('seed', seed+i*1000) for i in range(self.num)]
-            seeds = send_commands_to_all(self.remotes, commands)
+            env_ids = list(range(self.num))
+            seeds = self._call('seed', env_ids, [seed+i*1000 for i in env_ids])
         return seeds
 
-def send_commands_to_all(remotes, commands):
-    results = []
-    for i, remote in enumerate(remotes):
-        remote.send(commands[i])
-    for remote in remotes:
-        results.append(remote.recv())
-    return results
-
-def send_command_to_all(remotes, command):
-    results = []
-    for remote in remotes:
-        remote.send(command)
-    for remote in remotes:
-        results.append(remote.recv())
-    return results
-
-def worker(remote, parent_remote, env_id, config):
-    def step_env(env, action, use_raw):
-        state, player_id = env.step(action, use_raw)
-        done = env.is_over()
-        return state, player_id, done
+class SharedBuffers(object):
+    ''' The shared memory slabs that hold the observations, legal action
+        masks, rewards and done flags of all the environments. The main
+        process creates the slabs and the workers attach to them by name.
+    '''
+
+    def __init__(self, num, player_num, action_num, state_shape, obs_dtype=np.float32, names=None):
+        ''' Create or attach the shared memory
+
+        Args:
+            num (int): The number of environments
+            player_num (int): The number of players
+            action_num (int): The size of the action space
+            state_shape (list): The shape of the observation
+            obs_dtype (numpy.dtype): The data type of the observation
+            names (list): The names of the existing slabs to attach. If None,
+              new slabs are created
+        '''
+        from multiprocessing import shared_memory
+        self.num = num
+        self.player_num = player_num
+        self.action_num = action_num
+        self.state_shape = list(state_shape)
+        self.obs_dtype = np.dtype(obs_dtype)
+        layouts = [([num] + self.state_shape, self.obs_dtype),
+                   ([num, action_num], np.bool_),
+                   ([num, player_num], np.float32),
+                   ([num], np.bool_)]
+        self.shms = []
+        arrays = []
+        for i, (shape, dtype) in enumerate(layouts):
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            if names is None:
+                shm = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                shm = shared_memory.SharedMemory(name=names[i])
+            self.shms.append(shm)
+            arrays.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+        self.obs, self.legal_actions_mask, self.rewards, self.dones = arrays
+
+    def spec(self):
+        ''' Get the arguments for attaching the slabs in another process
+        '''
+        return (self.num, self.player_num, self.action_num, self.state_shape, self.obs_dtype, [shm.name for shm in self.shms])
+
+    def write_state(self, idx, state):
+        ''' Write the observation and legal actions of a state into the slabs
+
+        Returns:
+            (dict): The remaining fields of the state that should go through the pipe
+        '''
+        self.obs[idx] = state['obs']
+        self.legal_actions_mask[idx] = False
+        self.legal_actions_mask[idx, state['legal_actions']] = True
+        return {key: state[key] for key in state if key not in ('obs', 'legal_actions')}
+
+    def close(self):
+        self.obs = self.legal_actions_mask = self.rewards = self.dones = None
+        for shm in self.shms:
+            shm.close()
+
+    def unlink(self):
+        for shm in self.shms:
+            shm.unlink()
+
+def worker(remote, parent_remote, env_id, config, env_num=1):
     from rlcard.envs.registration import registry
-    env = registry.make(env_id, config)
+    envs = [registry.make(env_id, config) for _ in range(env_num)]
+    trajectories = [None for _ in range(env_num)]
+    buffers, offset = None, None
+    def pack_state(i, state):
+        if buffers is None:
+            return state
+        return buffers.write_state(offset+i, state)
+    def reset_env(i, record=True):
+        state, player_id = envs[i].reset()
+        # Only the continuous rollouts need the trajectories of the workers
+        trajectories[i] = None
+        if record:
+            trajectories[i] = [[] for _ in range(envs[i].player_num)]
+            trajectories[i][player_id].append(state)
+        if buffers is not None:
+            buffers.dones[offset+i] = False
+            buffers.rewards[offset+i] = 0
+        return state, player_id
+    def step_env(i, action, use_raw):
+        state, player_id = envs[i].step(action, use_raw)
+        done = envs[i].is_over()
+        if buffers is not None:
+            buffers.dones[offset+i] = done
+            if done:
+                buffers.rewards[offset+i] = envs[i].get_payoffs()
+        return pack_state(i, state), player_id, done
+    def step_env_auto(i, action, use_raw):
+        env = envs[i]
+        trajectories[i][env.get_player_id()].append(action)
+        state, player_id = env.step(action, use_raw)
+        if not env.is_over():
+            trajectories[i][player_id].append(state)
+            if buffers is not None:
+                buffers.dones[offset+i] = False
+            return pack_state(i, state), player_id, False, None, None
+        payoffs = env.get_payoffs()
+        for j in range(env.player_num):
+            trajectories[i][j].append(env.get_state(j))
+        finished = reorganize(trajectories[i], payoffs)
+        state, player_id = reset_env(i)
+        if buffers is not None:
+            buffers.dones[offset+i] = True
+            buffers.rewards[offset+i] = payoffs
+        return pack_state(i, state), player_id, True, finished, payoffs
     parent_remote.close()
     try:
         while True:
             cmd, data = remote.recv()
             if cmd == 'reset':
-                remote.send(env.reset())
-            elif cmd == 'step_raw':
-                remote.send(step_env(env, data, True))
+                results = []
+                for i, record in data:
+                    state, player_id = reset_env(i, record)
+                    results.append((pack_state(i, state), player_id))
+                remote.send(results)
+            elif cmd == 'step_auto':
+                remote.send([step_env_auto(i, action, use_raw) for i, (action, use_raw) in data])
             elif cmd == 'step':
-                remote.send(step_env(env, data, False))
+                remote.send([step_env(i, action, use_raw) for i, (action, use_raw) in data])
             elif cmd == 'seed':
-                remote.send(env._seed(data))
+                remote.send([envs[i]._seed(seed) for i, seed in data])
             elif cmd == 'get_state':
-                remote.send(env.get_state(data))
+                remote.send([envs[i].get_state(player_id) for i, player_id in data])
             elif cmd == 'get_payoffs':
-                remote.send(env.get_payoffs())
+                remote.send([envs[i].get_payoffs() for i, _ in data])
             elif cmd == 'info':
-                remote.send((env.player_num, env.action_num, env.state_shape))
+                remote.send((envs[0].player_num, envs[0].action_num, envs[0].state_shape))
+            elif cmd == 'attach':
+                spec, offset = data
+                buffers = SharedBuffers(*spec[:5], names=spec[5])
+                remote.send(None)
             elif cmd == 'close':
                 remote.close()
                 break
@@ -189,4 +510,6 @@ def worker(remote, parent_remote, env_id, config):
     except KeyboardInterrupt:
         print('SubprocVecEnv worker: got KeyboardInterrupt')
     finally:
-        del env
+        if buffers is not None:
+            buffers.close()
+        del envs
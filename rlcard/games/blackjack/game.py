@@ -1,11 +1,11 @@
-from copy import deepcopy
 import numpy as np
 
+from rlcard.core import Game, Journal
 from rlcard.games.blackjack import Dealer
 from rlcard.games.blackjack import Player
 from rlcard.games.blackjack import Judger
 
-class BlackjackGame(object):
+class BlackjackGame(Game):
 
     def __init__(self, allow_step_back=False):
         ''' Initialize the class Blackjack Game
@@ -47,7 +47,13 @@ class BlackjackGame(object):
         for i in range(self.player_num):
             self.winner['player' + str(i)] = 0
 
-        self.history = []
+        # Save the hisory for stepping back to the last state.
+        self.history = Journal(self.allow_step_back)
+        self.dealer.deck = self.history.track(self.dealer.deck)
+        self.dealer.hand = self.history.track(self.dealer.hand)
+        for player in self.players:
+            player.hand = self.history.track(player.hand)
+
         self.game_pointer = 0
 
         return self.get_state(self.game_pointer), self.game_pointer
@@ -63,10 +69,12 @@ class BlackjackGame(object):
             int: next plater's id
         '''
         if self.allow_step_back:
-            p = deepcopy(self.players[self.game_pointer])
-            d = deepcopy(self.dealer)
-            w = deepcopy(self.winner)
-            self.history.append((d, p, w))
+            # First record the fields that the action may change
+            self.history.mark()
+            self.history.record(self, 'game_pointer')
+            self.history.record(self.players[self.game_pointer], 'status', 'score')
+            self.history.record(self.dealer, 'status', 'score')
+            self.history.record_item(self.winner, 'player' + str(self.game_pointer))
 
         next_state = {}
         # Play hit
@@ -111,11 +119,7 @@ class BlackjackGame(object):
         Returns:
             Status (bool): check if the step back is success or not
         '''
-        #while len(self.history) > 0:
-        if len(self.history) > 0:
-            self.dealer, self.players[self.game_pointer], self.winner = self.history.pop()
-            return True
-        return False
+        return self.history.undo()
 
     def get_player_num(self):
         ''' Return the number of players in blackjack
@@ -6,6 +6,7 @@ import functools
 from heapq import merge
 import numpy as np
 
+from rlcard.core import Game
 from rlcard.utils import get_downstream_player_id, get_upstream_player_id
 from rlcard.games.doudizhu.utils import cards2str, doudizhu_sort_card
 from rlcard.games.doudizhu import Player
@@ -13,7 +14,7 @@ from rlcard.games.doudizhu import Round
 from rlcard.games.doudizhu import Judger
 
 
-class DoudizhuGame(object):
+class DoudizhuGame(Game):
     ''' Provide game APIs for env to run doudizhu and get corresponding state
     information.
 
@@ -39,7 +39,7 @@ class GinRummyGame(Game):
         elif self.settings.dealer_for_round == DealerForRound.South:
             dealer_id = 1
         self.actions = []
-        self.round = GinRummyRound(dealer_id=dealer_id, np_random=self.np_random)
+        self.round = GinRummyRound(dealer_id=dealer_id, np_random=self.np_random, allow_step_back=self.allow_step_back)
         for i in range(2):
             num = 11 if i == 0 else 10
             player = self.round.players[(dealer_id + 1 + i) % 2]
@@ -76,8 +76,14 @@ class GinRummyGame(Game):
 
     def step_back(self):
         ''' Takes one step backward and restore to the last state
+
+        Returns:
+            (bool): True if the game steps back successfully
         '''
-        raise NotImplementedError
+        if not self.allow_step_back or not self.round.step_back():
+            return False
+        self.actions.pop()
+        return True
 
     def get_player_num(self):
         ''' Return the number of players in the game
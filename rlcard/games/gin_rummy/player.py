@@ -83,6 +83,17 @@ class GinRummyPlayer(object):
         self._reduce_meld_kinds_by_rank_id(card=card)
         self._reduce_run_kinds_by_suit_id(card=card)
 
+    def get_meld_memo(self, card: Card):
+        # the memoized melds that adding or removing card would change; used for taking back a move
+        rank_id = utils.get_rank_id(card)
+        suit_id = utils.get_suit_id(card=card)
+        return list(self.meld_kinds_by_rank_id[rank_id]), self.meld_run_by_suit_id[suit_id]
+
+    def set_meld_memo(self, card: Card, meld_memo):
+        rank_id = utils.get_rank_id(card)
+        suit_id = utils.get_suit_id(card=card)
+        self.meld_kinds_by_rank_id[rank_id], self.meld_run_by_suit_id[suit_id] = meld_memo
+
     def __str__(self):
         return "N" if self.player_id == 0 else "S"
 
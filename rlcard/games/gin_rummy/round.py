@@ -32,7 +32,7 @@ from rlcard.games.gin_rummy.utils import utils
 
 class GinRummyRound(object):
 
-    def __init__(self, dealer_id: int, np_random):
+    def __init__(self, dealer_id: int, np_random, allow_step_back: bool = False):
         ''' Initialize the round class
 
             The round class maintains the following instances:
@@ -43,6 +43,8 @@ class GinRummyRound(object):
                 5) going_out_action: knock or gin or None
                 6) going_out_player_id: id of player who went out or None
                 7) move_sheet: history of the moves of the player (including the deal_hand_move)
+                8) undo_sheet: what is needed to take back each move of the player in move_sheet
+                   (only recorded if allow_step_back is True)
 
             The round class maintains a list of moves made by the players in self.move_sheet.
             move_sheet is similar to a chess score sheet.
@@ -52,8 +54,10 @@ class GinRummyRound(object):
 
         Args:
             dealer_id: int
+            allow_step_back: bool
         '''
         self.np_random = np_random
+        self.allow_step_back = allow_step_back
         self.dealer_id = dealer_id
         self.dealer = GinRummyDealer(self.np_random)
         self.players = [GinRummyPlayer(player_id=0, np_random=self.np_random), GinRummyPlayer(player_id=1, np_random=self.np_random)]
@@ -62,6 +66,7 @@ class GinRummyRound(object):
         self.going_out_action = None  # going_out_action: int or None
         self.going_out_player_id = None  # going_out_player_id: int or None
         self.move_sheet = []  # type: List[GinRummyMove]
+        self.undo_sheet = []  # type: List[tuple]
         player_dealing = GinRummyPlayer(player_id=dealer_id, np_random=self.np_random)
         shuffled_deck = self.dealer.shuffled_deck
         self.move_sheet.append(DealHandMove(player_dealing=player_dealing, shuffled_deck=shuffled_deck))
@@ -77,6 +82,7 @@ class GinRummyRound(object):
         if not len(current_player.hand) == 10:
             raise GinRummyProgramError("len(current_player.hand) is {}: should be 10.".format(len(current_player.hand)))
         card = self.dealer.stock_pile.pop()
+        self._record_undo(card=card)
         self.move_sheet.append(DrawCardMove(current_player, action=action, card=card))
         current_player.add_card_to_hand(card=card)
 
@@ -88,6 +94,7 @@ class GinRummyRound(object):
         if not len(current_player.hand) == 10:
             raise GinRummyProgramError("len(current_player.hand) is {}: should be 10.".format(len(current_player.hand)))
         card = self.dealer.discard_pile.pop()
+        self._record_undo(card=card)
         self.move_sheet.append(PickupDiscardMove(current_player, action, card=card))
         current_player.add_card_to_hand(card=card)
         current_player.known_cards.append(card)
@@ -96,6 +103,7 @@ class GinRummyRound(object):
         # when current_player takes DeclareDeadHandAction step, the move is recorded and executed
         # north becomes current_player to score his hand
         current_player = self.players[self.current_player_id]
+        self._record_undo()
         self.move_sheet.append(DeclareDeadHandMove(current_player, action))
         self.going_out_action = action
         self.going_out_player_id = self.current_player_id
@@ -110,8 +118,9 @@ class GinRummyRound(object):
         current_player = self.players[self.current_player_id]
         if not len(current_player.hand) == 11:
             raise GinRummyProgramError("len(current_player.hand) is {}: should be 11.".format(len(current_player.hand)))
-        self.move_sheet.append(DiscardMove(current_player, action))
         card = action.card
+        self._record_undo(card=card)
+        self.move_sheet.append(DiscardMove(current_player, action))
         current_player.remove_card_from_hand(card=card)
         if card in current_player.known_cards:
             current_player.known_cards.remove(card)
@@ -123,12 +132,13 @@ class GinRummyRound(object):
         # opponent knows that the card is no longer in current_player hand
         # north becomes current_player to score his hand
         current_player = self.players[self.current_player_id]
-        self.move_sheet.append(KnockMove(current_player, action))
-        self.going_out_action = action
-        self.going_out_player_id = self.current_player_id
         if not len(current_player.hand) == 11:
             raise GinRummyProgramError("len(current_player.hand) is {}: should be 11.".format(len(current_player.hand)))
         card = action.card
+        self._record_undo(card=card)
+        self.move_sheet.append(KnockMove(current_player, action))
+        self.going_out_action = action
+        self.going_out_player_id = self.current_player_id
         current_player.remove_card_from_hand(card=card)
         if card in current_player.known_cards:
             current_player.known_cards.remove(card)
@@ -139,13 +149,14 @@ class GinRummyRound(object):
         # opponent knows that the card is no longer in current_player hand
         # north becomes current_player to score his hand
         current_player = self.players[self.current_player_id]
-        self.move_sheet.append(GinMove(current_player, action))
-        self.going_out_action = action
-        self.going_out_player_id = self.current_player_id
         if not len(current_player.hand) == 11:
             raise GinRummyProgramError("len(current_player.hand) is {}: should be 11.".format(len(current_player.hand)))
         _, gin_cards = judge.get_going_out_cards(current_player.hand, going_out_deadwood_count)
         card = gin_cards[0]
+        self._record_undo(card=card)
+        self.move_sheet.append(GinMove(current_player, action))
+        self.going_out_action = action
+        self.going_out_player_id = self.current_player_id
         current_player.remove_card_from_hand(card=card)
         if card in current_player.known_cards:
             current_player.known_cards.remove(card)
@@ -160,6 +171,7 @@ class GinRummyRound(object):
         best_meld_clusters = melding.get_best_meld_clusters(hand=current_player.hand)
         best_meld_cluster = [] if not best_meld_clusters else best_meld_clusters[0]
         deadwood_count = utils.get_deadwood_count(hand=current_player.hand, meld_cluster=best_meld_cluster)
+        self._record_undo()
         self.move_sheet.append(ScoreNorthMove(player=current_player,
                                               action=action,
                                               best_meld_cluster=best_meld_cluster,
@@ -176,8 +188,58 @@ class GinRummyRound(object):
         best_meld_clusters = melding.get_best_meld_clusters(hand=current_player.hand)
         best_meld_cluster = [] if not best_meld_clusters else best_meld_clusters[0]
         deadwood_count = utils.get_deadwood_count(hand=current_player.hand, meld_cluster=best_meld_cluster)
+        self._record_undo()
         self.move_sheet.append(ScoreSouthMove(player=current_player,
                                               action=action,
                                               best_meld_cluster=best_meld_cluster,
                                               deadwood_count=deadwood_count))
         self.is_over = True
+
+    def step_back(self) -> bool:
+        # take back the last move of move_sheet; the deal_hand_move cannot be taken back
+        # return True if a move was taken back
+        if not self.undo_sheet:
+            return False
+        move = self.move_sheet.pop()
+        current_player_id, going_out_action, going_out_player_id, is_over, card, hand_index, known_index, meld_memo = self.undo_sheet.pop()
+        current_player = self.players[current_player_id]
+        if isinstance(move, DrawCardMove):
+            current_player.hand.pop()
+            self.dealer.stock_pile.append(card)
+        elif isinstance(move, PickupDiscardMove):
+            current_player.hand.pop()
+            current_player.known_cards.pop()
+            self.dealer.discard_pile.append(card)
+        elif card is not None:  # discard, knock or gin
+            if isinstance(move, DiscardMove):
+                self.dealer.discard_pile.pop()
+            current_player.hand.insert(hand_index, card)
+            if known_index is not None:
+                current_player.known_cards.insert(known_index, card)
+        if card is not None:
+            current_player.set_meld_memo(card=card, meld_memo=meld_memo)
+        self.current_player_id = current_player_id
+        self.going_out_action = going_out_action
+        self.going_out_player_id = going_out_player_id
+        self.is_over = is_over
+        return True
+
+    # private methods
+
+    def _record_undo(self, card=None):
+        # record what is needed to take back the move that current_player is about to make with card
+        # card is either already taken from a pile (draw, pick up) or still in the hand (discard, knock, gin)
+        if not self.allow_step_back:
+            return
+        current_player = self.players[self.current_player_id]
+        hand_index = None
+        known_index = None
+        meld_memo = None
+        if card is not None:
+            meld_memo = current_player.get_meld_memo(card=card)
+            if card in current_player.hand:
+                hand_index = current_player.hand.index(card)
+            if card in current_player.known_cards:
+                known_index = current_player.known_cards.index(card)
+        self.undo_sheet.append((self.current_player_id, self.going_out_action, self.going_out_player_id, self.is_over,
+                                card, hand_index, known_index, meld_memo))
@@ -7,6 +7,7 @@ from rlcard.games.leducholdem import Judger
 from rlcard.games.leducholdem import Round
 
 from rlcard.games.limitholdem import Game
+from rlcard.games.limitholdem.game import ACTION_CODES
 
 class LeducholdemGame(Game):
 
@@ -38,6 +39,10 @@ class LeducholdemGame(Game):
 
         self.num_players = 2
 
+        # If True, the small blind and the cards are not dealt randomly, but
+        # chosen with step_chance at the chance nodes
+        self.chance_nodes = False
+
     def init_game(self):
         ''' Initialilze the game of Limit Texas Hold'em
 
@@ -48,6 +53,9 @@ class LeducholdemGame(Game):
 
                 (dict): The first state of the game
                 (int): Current player's id
+
+        Note: With chance_nodes, the game starts at a chance node, and the
+              state and the player are None
         '''
         # Initilize a dealer that can deal cards
         self.dealer = Dealer(self.np_random)
@@ -58,17 +66,7 @@ class LeducholdemGame(Game):
         # Initialize a judger class which will decide who wins in the end
         self.judger = Judger(self.np_random)
 
-        # Prepare for the first round
-        for i in range(self.num_players):
-            self.players[i].hand = self.dealer.deal_card()
-        # Randomly choose a small blind and a big blind
-        s = self.np_random.randint(0, self.num_players)
-        b = (s + 1) % self.num_players
-        self.players[b].in_chips = self.big_blind
-        self.players[s].in_chips = self.small_blind
         self.public_card = None
-        # The player with small blind plays the first
-        self.game_pointer = s
 
         # Initilize a bidding round, in the first round, the big blind and the small blind needs to
         # be passed to the round for processing.
@@ -77,18 +75,99 @@ class LeducholdemGame(Game):
                            num_players=self.num_players,
                            np_random=self.np_random)
 
-        self.round.start_new_round(game_pointer=self.game_pointer, raised=[p.in_chips for p in self.players])
-
         # Count the round. There are 2 rounds in each game.
         self.round_counter = 0
 
         # Save the hisory for stepping back to the last state.
         self.history = []
 
+        # The betting actions of all the players, with '/' between the rounds
+        self.action_history = b''
+
+        if self.chance_nodes:
+            # The small blind is chosen first, then the hands are dealt
+            self.game_pointer = None
+            return None, None
+
+        # Prepare for the first round
+        for i in range(self.num_players):
+            self.players[i].hand = self.dealer.deal_card()
+        # Randomly choose a small blind and a big blind
+        self._post_blinds(self.np_random.randint(0, self.num_players))
+
         state = self.get_state(self.game_pointer)
 
         return state, self.game_pointer
 
+    def _post_blinds(self, s):
+        ''' Post the blinds and start the first round
+
+        Args:
+            s (int): The player with the small blind, who plays the first
+        '''
+        b = (s + 1) % self.num_players
+        self.players[b].in_chips = self.big_blind
+        self.players[s].in_chips = self.small_blind
+        self.game_pointer = s
+        self.round.start_new_round(game_pointer=self.game_pointer, raised=[p.in_chips for p in self.players])
+
+    def is_chance_node(self):
+        ''' Check if the next event is a chance event, which is only the case
+            with chance_nodes
+
+        Returns:
+            (boolean): True if the small blind, a hand or the public card is to be dealt
+        '''
+        if not self.chance_nodes or self.is_over():
+            return False
+        if self.game_pointer is None or any(player.hand is None for player in self.players):
+            return True
+        return self.round_counter == 1 and self.public_card is None
+
+    def get_chance_outcomes(self):
+        ''' Get the outcomes of the current chance node
+
+        Returns:
+            (list): A list of (outcome, probability) tuples. The outcomes are
+              the player with the small blind or the indexes of the cards (e.g., 'SJ')
+        '''
+        if self.game_pointer is None:
+            return [(player_id, 1.0 / self.num_players) for player_id in range(self.num_players)]
+        return [(card.get_index(), 1.0 / len(self.dealer.deck)) for card in self.dealer.deck]
+
+    def step_chance(self, outcome):
+        ''' Apply an outcome of the current chance node
+
+        Args:
+            outcome (int or str): One of the outcomes of get_chance_outcomes
+        '''
+        if self.allow_step_back:
+            self._save_history()
+
+        if self.game_pointer is None:
+            self._post_blinds(outcome)
+            return
+        card_indexes = [card.get_index() for card in self.dealer.deck]
+        card = self.dealer.deck.pop(card_indexes.index(outcome))
+        for player in self.players:
+            if player.hand is None:
+                player.hand = card
+                return
+        self.public_card = card
+
+    def _save_history(self):
+        ''' Save the fields that a step may change for step_back
+        '''
+        r = copy(self.round)
+        r_raised = copy(self.round.raised)
+        gp = self.game_pointer
+        r_c = self.round_counter
+        d_deck = copy(self.dealer.deck)
+        p = copy(self.public_card)
+        ps = [copy(self.players[i]) for i in range(self.num_players)]
+        ps_hand = [copy(self.players[i].hand) for i in range(self.num_players)]
+        self.history.append((r, r_raised, gp, r_c, d_deck, p, ps, ps_hand, self.action_history))
+
     def step(self, action):
         ''' Get the next state
 
@@ -103,24 +182,20 @@ class LeducholdemGame(Game):
         '''
         if self.allow_step_back:
             # First snapshot the current state
-            r = copy(self.round)
-            r_raised = copy(self.round.raised)
-            gp = self.game_pointer
-            r_c = self.round_counter
-            d_deck = copy(self.dealer.deck)
-            p = copy(self.public_card)
-            ps = [copy(self.players[i]) for i in range(self.num_players)]
-            ps_hand = [copy(self.players[i].hand) for i in range(self.num_players)]
-            self.history.append((r, r_raised, gp, r_c, d_deck, p, ps, ps_hand))
+            self._save_history()
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
+        self.action_history += ACTION_CODES[action]
 
         # If a round is over, we deal more public cards
         if self.round.is_over():
+            self.action_history += b'/'
             # For the first round, we deal 1 card as public card. Double the raise amount for the second round
             if self.round_counter == 0:
-                self.public_card = self.dealer.deal_card()
+                # With chance_nodes, the public card is dealt with step_chance
+                if not self.chance_nodes:
+                    self.public_card = self.dealer.deal_card()
                 self.round.raise_amount = 2 * self.raise_amount
 
             self.round_counter += 1
@@ -179,7 +254,7 @@ class LeducholdemGame(Game):
             (bool): True if the game steps back successfully
         '''
         if len(self.history) > 0:
-            self.round, r_raised, self.game_pointer, self.round_counter, d_deck, self.public_card, self.players, ps_hand = self.history.pop()
+            self.round, r_raised, self.game_pointer, self.round_counter, d_deck, self.public_card, self.players, ps_hand, self.action_history = self.history.pop()
             self.round.raised = r_raised
             self.dealer.deck = d_deck
             for i, hand in enumerate(ps_hand):
@@ -1,12 +1,15 @@
-from copy import deepcopy, copy
 import numpy as np
 
+from rlcard.core import Game, Journal
 from rlcard.games.limitholdem import Dealer
 from rlcard.games.limitholdem import Player, PlayerStatus
 from rlcard.games.limitholdem import Judger
 from rlcard.games.limitholdem import Round
 
-class LimitholdemGame(object):
+# The betting actions in the action history, as in the ACPC protocol
+ACTION_CODES = {'call': b'c', 'check': b'c', 'raise': b'r', 'fold': b'f'}
+
+class LimitholdemGame(Game):
 
     def __init__(self, allow_step_back=False, num_players=2):
         ''' Initialize the class limitholdem Game
@@ -62,6 +65,11 @@ class LimitholdemGame(object):
         # Initilize public cards
         self.public_cards = []
 
+        # Save the hisory for stepping back to the last state.
+        self.history = Journal(self.allow_step_back)
+        self.dealer.deck = self.history.track(self.dealer.deck)
+        self.public_cards = self.history.track(self.public_cards)
+
         # Randomly choose a small blind and a big blind
         s = self.np_random.randint(0, self.num_players)
         b = (s + 1) % self.num_players
@@ -83,14 +91,14 @@ class LimitholdemGame(object):
         # Count the round. There are 4 rounds in each game.
         self.round_counter = 0
 
-        # Save the hisory for stepping back to the last state.
-        self.history = []
-
-        state = self.get_state(self.game_pointer)
-
         # Save betting history
         self.history_raise_nums = [0 for _ in range(4)]
 
+        # The betting actions of all the players, with '/' between the rounds
+        self.action_history = b''
+
+        state = self.get_state(self.game_pointer)
+
         return state, self.game_pointer
 
     def step(self, action):
@@ -106,24 +114,24 @@ class LimitholdemGame(object):
                 (int): next plater's id
         '''
         if self.allow_step_back:
-            # First snapshot the current state
-            r = deepcopy(self.round)
-            b = self.game_pointer
-            r_c = self.round_counter
-            d = deepcopy(self.dealer)
-            p = deepcopy(self.public_cards)
-            ps = deepcopy(self.players)
-            rn = copy(self.history_raise_nums)
-            self.history.append((r, b, r_c, d, p, ps, rn))
+            # First record the fields that the action may change
+            self.history.mark()
+            self.history.record(self, 'game_pointer', 'round_counter', 'action_history')
+            self.history.record(self.round, 'game_pointer', 'have_raised', 'not_raise_num', 'raise_amount', 'raised', 'player_folded')
+            self.history.record_item(self.round.raised, self.round.game_pointer)
+            self.history.record(self.players[self.round.game_pointer], 'in_chips', 'status')
+            self.history.record_item(self.history_raise_nums, self.round_counter)
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
+        self.action_history += ACTION_CODES[action]
 
         # Save the current raise num to history
         self.history_raise_nums[self.round_counter] = self.round.have_raised
 
         # If a round is over, we deal more public cards
         if self.round.is_over():
+            self.action_history += b'/'
             # For the first round, we deal 3 cards
             if self.round_counter == 0:
                 self.public_cards.append(self.dealer.deal_card())
@@ -151,10 +159,7 @@ class LimitholdemGame(object):
         Returns:
             (bool): True if the game steps back successfully
         '''
-        if len(self.history) > 0:
-            self.round, self.game_pointer, self.round_counter, self.dealer, self.public_cards, self.players, self.history_raises_nums = self.history.pop()
-            return True
-        return False
+        return self.history.undo()
 
     def get_player_num(self):
         ''' Return the number of players in Limit Texas Hold'em
@@ -612,3 +612,55 @@ def final_compare(hands, potential_winner_index, all_players):
             return determine_winner([4, 3, 2, 1, 0], equal_hands, all_players, potential_winner_index)
         if hand.category in [5, 9]:
             return determine_winner_straight(equal_hands, all_players, potential_winner_index)
+
+# The suits and the ranks of the canonical cards
+CANONICAL_SUITS = 'SHDC'
+RANK_ORDER = {rank: i for i, rank in enumerate('23456789TJQKA')}
+
+def sort_cards(hand, public_cards=()):
+    '''
+    Sort the hand, the flop, the turn and the river separately, by suit,
+    then from the highest rank, as canonicalize_cards does. The order in
+    which the cards of a round are dealt does not matter, while the order
+    of the rounds is kept.
+    Args:
+        hand (list): The hand, e.g., ['HK', 'DQ']
+        public_cards (list): The public cards in the order they are dealt
+    Returns:
+        (tuple): The sorted hand and public cards
+    '''
+    groups = [hand, public_cards[:3], public_cards[3:4], public_cards[4:]]
+    sorted_groups = [sorted(group, key=lambda card: (CANONICAL_SUITS.index(card[0]), -RANK_ORDER[card[1]]))
+                     for group in groups]
+    return sorted_groups[0], sorted_groups[1] + sorted_groups[2] + sorted_groups[3]
+
+def canonicalize_cards(hand, public_cards=()):
+    '''
+    Map the cards to the canonical representative of their suit isomorphism
+    class. Two deals that only differ by a permutation of the suits, e.g.,
+    ['SA', 'SK'] and ['HA', 'HK'], are strategically identical and have the
+    same canonical cards. The hand, the flop, the turn and the river are
+    canonicalized as separate groups, so the order of the rounds is kept.
+
+    The suits are sorted by the ranks they hold in each group, and renamed
+    to 'S', 'H', 'D' and 'C' in this order. The suits with the same ranks in
+    every group are interchangeable, so the result does not depend on the
+    order of the ties.
+    Args:
+        hand (list): The hand, e.g., ['HK', 'DQ']
+        public_cards (list): The public cards in the order they are dealt
+    Returns:
+        (tuple): The canonical hand and public cards. The cards of each group
+          are sorted by suit, then from the highest rank
+    '''
+    groups = [hand, public_cards[:3], public_cards[3:4], public_cards[4:]]
+    signatures = {}
+    for suit in CANONICAL_SUITS:
+        signatures[suit] = tuple(tuple(sorted(RANK_ORDER[card[1]] for card in group if card[0] == suit))
+                                 for group in groups)
+    order = sorted(CANONICAL_SUITS, key=signatures.get, reverse=True)
+    suit_map = {suit: CANONICAL_SUITS[i] for i, suit in enumerate(order)}
+    canonical_groups = [sorted((suit_map[card[0]] + card[1] for card in group),
+                               key=lambda card: (CANONICAL_SUITS.index(card[0]), -RANK_ORDER[card[1]]))
+                        for group in groups]
+    return canonical_groups[0], canonical_groups[1] + canonical_groups[2] + canonical_groups[3]
@@ -5,6 +5,9 @@ class MahjongCard(object):
             'trait': ['1', '2', '3', '4', '5', '6', '7', '8', '9', 'green', 'red', 'white', 'east', 'west', 'north', 'south']
             }
 
+    # Cards are never changed during a game, so game snapshots share them
+    snapshot_shared = True
+
     def __init__(self, card_type, trait):
         ''' Initialize the class of MahjongCard
 
@@ -1,12 +1,12 @@
 import numpy as np
-from copy import deepcopy
 
+from rlcard.core import Game, Journal
 from rlcard.games.mahjong import Dealer
 from rlcard.games.mahjong import Player
 from rlcard.games.mahjong import Round
 from rlcard.games.mahjong import Judger
 
-class MahjongGame(object):
+class MahjongGame(Game):
 
     def __init__(self, allow_step_back=False):
         '''Initialize the class MajongGame
@@ -40,7 +40,12 @@ class MahjongGame(object):
             self.dealer.deal_cards(player, 13)
 
         # Save the hisory for stepping back to the last state.
-        self.history = []
+        self.history = Journal(self.allow_step_back)
+        self.dealer.deck = self.history.track(self.dealer.deck)
+        self.dealer.table = self.history.track(self.dealer.table)
+        for player in self.players:
+            player.hand = self.history.track(player.hand)
+            player.pile = self.history.track(player.pile)
 
         self.dealer.deal_cards(self.players[self.round.current_player], 1)
         state = self.get_state(self.round.current_player)
@@ -59,12 +64,11 @@ class MahjongGame(object):
                 (dict): next player's state
                 (int): next plater's id
         '''
-        # First snapshot the current state
+        # First record the fields that the action may change
         if self.allow_step_back:
-            hist_dealer = deepcopy(self.dealer)
-            hist_round = deepcopy(self.round)
-            hist_players = deepcopy(self.players)
-            self.history.append((hist_dealer, hist_players, hist_round))
+            self.history.mark()
+            self.history.record(self, 'cur_state')
+            self.history.record(self.round, 'current_player', 'last_player', 'player_before_act', 'valid_act', 'last_cards')
         self.round.proceed_round(self.players, action)
         state = self.get_state(self.round.current_player)
         self.cur_state = state
@@ -76,10 +80,7 @@ class MahjongGame(object):
         Returns:
             (bool): True if the game steps back successfully
         '''
-        if not self.history:
-            return False
-        self.dealer, self.players, self.round = self.history.pop()
-        return True
+        return self.history.undo()
 
     def get_state(self, player_id):
         ''' Return player's state
@@ -1,7 +1,7 @@
 from enum import Enum
 
 import numpy as np
-from copy import deepcopy
+from rlcard.core import Journal
 from rlcard.games.limitholdem import Game
 from rlcard.games.limitholdem import PlayerStatus
 
@@ -11,6 +11,12 @@ from rlcard.games.nolimitholdem import Judger
 from rlcard.games.nolimitholdem import Round, Action
 
 
+# The betting actions in the action history. Check and call are both 'c' as
+# in the ACPC protocol
+ACTION_CODES = {Action.FOLD: b'f', Action.CHECK: b'c', Action.CALL: b'c',
+                Action.RAISE_HALF_POT: b'h', Action.RAISE_POT: b'p', Action.ALL_IN: b'a'}
+
+
 class Stage(Enum):
 
     PREFLOP = 0
@@ -79,6 +85,11 @@ class NolimitholdemGame(Game):
         self.public_cards = []
         self.stage = Stage.PREFLOP
 
+        # Save the hisory for stepping back to the last state.
+        self.history = Journal(self.allow_step_back)
+        self.dealer.deck = self.history.track(self.dealer.deck)
+        self.public_cards = self.history.track(self.public_cards)
+
         # Big blind and small blind
         s = (self.dealer_id + 1) % self.num_players
         b = (self.dealer_id + 2) % self.num_players
@@ -97,8 +108,8 @@ class NolimitholdemGame(Game):
         # Count the round. There are 4 rounds in each game.
         self.round_counter = 0
 
-        # Save the hisory for stepping back to the last state.
-        self.history = []
+        # The betting actions of all the players, with '/' between the rounds
+        self.action_history = b''
 
         state = self.get_state(self.game_pointer)
 
@@ -131,17 +142,17 @@ class NolimitholdemGame(Game):
             raise Exception('Action not allowed')
 
         if self.allow_step_back:
-            # First snapshot the current state
-            r = deepcopy(self.round)
-            b = self.game_pointer
-            r_c = self.round_counter
-            d = deepcopy(self.dealer)
-            p = deepcopy(self.public_cards)
-            ps = deepcopy(self.players)
-            self.history.append((r, b, r_c, d, p, ps))
+            # First record the fields that the action may change
+            self.history.mark()
+            self.history.record(self, 'game_pointer', 'round_counter', 'stage', 'action_history')
+            self.history.record(self.round, 'game_pointer', 'not_raise_num', 'not_playing_num', 'raised')
+            self.history.record_item(self.round.raised, self.round.game_pointer)
+            self.history.record(self.players[self.round.game_pointer], 'in_chips', 'remained_chips', 'status')
+            self.history.record(self.dealer, 'pot')
 
         # Then we proceed to the next round
         self.game_pointer = self.round.proceed_round(self.players, action)
+        self.action_history += ACTION_CODES[action]
 
         players_in_bypass = [1 if player.status in (PlayerStatus.FOLDED, PlayerStatus.ALLIN) else 0 for player in self.players]
         if self.num_players - sum(players_in_bypass) == 1:
@@ -152,6 +163,7 @@ class NolimitholdemGame(Game):
 
         # If a round is over, we deal more public cards
         if self.round.is_over():
+            self.action_history += b'/'
             # Game pointer goes to the first player not in bypass after the dealer, if there is one
             self.game_pointer = (self.dealer_id + 1) % self.num_players
             if sum(players_in_bypass) < self.num_players:
@@ -205,17 +217,6 @@ class NolimitholdemGame(Game):
         state['stage'] = self.stage
         return state
 
-    def step_back(self):
-        ''' Return to the previous state of the game
-
-        Returns:
-            (bool): True if the game steps back successfully
-        '''
-        if len(self.history) > 0:
-            self.round, self.game_pointer, self.round_counter, self.dealer, self.public_cards, self.players = self.history.pop()
-            return True
-        return False
-
     def get_player_num(self):
         ''' Return the number of players in No Limit Texas Hold'em
 
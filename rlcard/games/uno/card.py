@@ -8,6 +8,9 @@ class UnoCard(object):
                       'skip', 'reverse', 'draw_2', 'wild', 'wild_draw_4']
             }
 
+    # Cards are never changed during a game, so game snapshots share them
+    snapshot_shared = True
+
     def __init__(self, card_type, color, trait):
         ''' Initialize the class of UnoCard
 
@@ -1,12 +1,12 @@
-from copy import deepcopy
 import numpy as np
 
+from rlcard.core import Game, Journal
 from rlcard.games.uno import Dealer
 from rlcard.games.uno import Player
 from rlcard.games.uno import Round
 
 
-class UnoGame(object):
+class UnoGame(Game):
 
     def __init__(self, allow_step_back=False):
         self.allow_step_back = allow_step_back
@@ -36,6 +36,9 @@ class UnoGame(object):
         for player in self.players:
             self.dealer.deal_cards(player, 7)
 
+        # Save the hisory for stepping back to the last state.
+        self.history = Journal(self.allow_step_back)
+
         # Initialize a Round
         self.round = Round(self.dealer, self.num_players, self.np_random)
 
@@ -43,8 +46,11 @@ class UnoGame(object):
         top_card = self.round.flip_top_card()
         self.round.perform_top_card(self.players, top_card)
 
-        # Save the hisory for stepping back to the last state.
-        self.history = []
+        # Track the piles of cards that are changed in place
+        self.dealer.deck = self.history.track(self.dealer.deck)
+        self.round.played_cards = self.history.track(self.round.played_cards)
+        for player in self.players:
+            player.hand = self.history.track(player.hand)
 
         player_id = self.round.current_player
         state = self.get_state(player_id)
@@ -64,11 +70,9 @@ class UnoGame(object):
         '''
 
         if self.allow_step_back:
-            # First snapshot the current state
-            his_dealer = deepcopy(self.dealer)
-            his_round = deepcopy(self.round)
-            his_players = deepcopy(self.players)
-            self.history.append((his_dealer, his_players, his_round))
+            # First record the fields that the action may change
+            self.history.mark()
+            self.history.record(self.round, 'target', 'current_player', 'direction', 'is_over', 'winner')
 
         self.round.proceed_round(self.players, action)
         player_id = self.round.current_player
@@ -81,10 +85,7 @@ class UnoGame(object):
         Returns:
             (bool): True if the game steps back successfully
         '''
-        if not self.history:
-            return False
-        self.dealer, self.players, self.round = self.history.pop()
-        return True
+        return self.history.undo()
 
     def get_state(self, player_id):
         ''' Return player's state
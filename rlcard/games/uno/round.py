@@ -1,3 +1,5 @@
+from copy import copy
+
 from rlcard.games.uno.card import UnoCard
 from rlcard.games.uno.utils import cards2list, WILD, WILD_DRAW_4
 
@@ -30,6 +32,7 @@ class UnoRound(object):
         '''
         top = self.dealer.flip_top_card()
         if top.trait == 'wild':
+            top = copy(top)
             top.color = self.np_random.choice(UnoCard.info['color'])
         self.target = top
         self.played_cards.append(top)
@@ -161,7 +164,7 @@ class UnoRound(object):
         '''
         self.dealer.deck.extend(self.played_cards)
         self.dealer.shuffle()
-        self.played_cards = []
+        self.played_cards.clear()
 
     def _perform_draw_action(self, players):
         # replace deck if there is no card in draw pile
@@ -175,6 +178,8 @@ class UnoRound(object):
 
         # draw a wild card
         if card.type == 'wild':
+            # color a copy since step_back and the game snapshots share the cards
+            card = copy(card)
             card.color = self.np_random.choice(UnoCard.info['color'])
             self.target = card
             self.played_cards.append(card)
@@ -0,0 +1,229 @@
+''' A single-file checkpoint format for tabular CFR that can be memory-mapped
+
+The file starts with a magic string, the length of a JSON header and the
+header. It is followed by the sections, each aligned to 64 bytes:
+
+    key_offsets (int64, size + 1): The offsets of the keys in `keys`
+    keys (uint8): The concatenated keys, sorted in ascending order
+    strategy_sums (float32, size x action_num): The unnormalized average policy
+    regrets (float32, size x action_num): The cumulative regrets
+
+The rows of the matrices follow the order of the sorted keys, so an
+information set is found by a binary search over the keys. Evaluation only
+needs the keys and the strategy sums, which are memory-mapped and shared
+through the page cache by all the processes that open the same file.
+'''
+import json
+import mmap
+import collections.abc
+
+import numpy as np
+
+from rlcard.utils.infoset_table import InfosetTable
+
+MAGIC = b'RLCFRCK1'
+ALIGNMENT = 64
+SECTIONS = ['key_offsets', 'keys', 'strategy_sums', 'regrets']
+
+
+def _encode_key(key):
+    if isinstance(key, str):
+        return key.encode('utf-8')
+    return bytes(key)
+
+
+def save_checkpoint(path, table, iteration):
+    ''' Save an InfosetTable and the iteration into one file
+
+    Args:
+        path (str): The path of the file
+        table (InfosetTable): The table to save
+        iteration (int): The number of iterations done
+    '''
+    key_type = 'str' if table.keys and isinstance(table.keys[0], str) else 'bytes'
+    encoded_keys = [_encode_key(key) for key in table.keys]
+    order = sorted(range(table.size), key=encoded_keys.__getitem__)
+    key_offsets = np.zeros(table.size + 1, dtype=np.int64)
+    key_offsets[1:] = np.cumsum([len(encoded_keys[i]) for i in order])
+    arrays = {
+        'key_offsets': key_offsets,
+        'keys': np.frombuffer(b''.join(encoded_keys[i] for i in order), dtype=np.uint8),
+        'strategy_sums': table.strategy_sums[order].astype(np.float32),
+        'regrets': table.regrets[order].astype(np.float32),
+    }
+
+    # The offsets of the sections depend on the length of the header, so the
+    # header is built until it does not change
+    # If all the keys have the same length, e.g., `obs.tostring()`, the
+    # offsets are not needed to find a key
+    key_lengths = set(len(key) for key in encoded_keys)
+    key_length = key_lengths.pop() if len(key_lengths) == 1 else None
+    header = {'version': 1, 'action_num': table.action_num, 'size': table.size,
+              'iteration': iteration, 'key_type': key_type, 'key_length': key_length,
+              'sections': {}}
+    header_bytes = b''
+    while True:
+        offset = _align(len(MAGIC) + 8 + len(header_bytes))
+        sections = {}
+        for name in SECTIONS:
+            array = arrays[name]
+            sections[name] = [offset, array.dtype.str, list(array.shape)]
+            offset = _align(offset + array.nbytes)
+        header['sections'] = sections
+        new_header_bytes = json.dumps(header).encode('utf-8')
+        stable = len(new_header_bytes) == len(header_bytes)
+        header_bytes = new_header_bytes
+        if stable:
+            break
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for name in SECTIONS:
+            f.seek(sections[name][0])
+            f.write(arrays[name].tobytes())
+        f.truncate(offset)
+
+
+class CFRCheckpoint(object):
+    ''' A checkpoint opened with memory mapping. Only the pages that are
+        looked up are read from the disk.
+    '''
+
+    def __init__(self, path):
+        ''' Open a checkpoint
+
+        Args:
+            path (str): The path of the file
+        '''
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError('{} is not a CFR checkpoint'.format(path))
+            header_length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            self.header = json.loads(f.read(header_length).decode('utf-8'))
+        self.action_num = self.header['action_num']
+        self.size = self.header['size']
+        self.iteration = self.header['iteration']
+        self.key_offsets = self._map('key_offsets')
+        self.keys = self._map('keys')
+        self.strategy_sums = self._map('strategy_sums')
+
+        # The binary search slices the keys from a raw mmap, which is much
+        # cheaper than slicing numpy arrays
+        self._keys_start = self.header['sections']['keys'][0]
+        self._offsets = self.key_offsets.tolist() if self.header['key_length'] is None else None
+        self._buffer = None
+        if self.size > 0:
+            with open(path, 'rb') as f:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def regrets(self):
+        ''' The regrets are only mapped when they are needed, e.g., to resume training
+        '''
+        return self._map('regrets')
+
+    def __len__(self):
+        return self.size
+
+    def key(self, infoset_id):
+        ''' Get the key of a row, as it was in the table
+        '''
+        key = self._encoded_key(infoset_id)
+        if self.header['key_type'] == 'str':
+            return key.decode('utf-8')
+        return key
+
+    def find(self, key):
+        ''' Binary search the row of an information set
+
+        Args:
+            key (str or bytes): The key of the information set
+
+        Returns:
+            (int): The row of the information set, or -1 if it is not in the checkpoint
+        '''
+        key = _encode_key(key)
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self._encoded_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.size and self._encoded_key(low) == key:
+            return low
+        return -1
+
+    def view(self, name):
+        ''' Get a read-only dict-like view of the strategy sums or the regrets,
+            like InfosetTable.view
+
+        Args:
+            name (str): 'strategy_sums' or 'regrets'
+
+        Returns:
+            (CheckpointView): The view
+        '''
+        return CheckpointView(self, name)
+
+    def to_table(self):
+        ''' Load the checkpoint into an InfosetTable to resume training. The
+            policy is recomputed from the regrets.
+
+        Returns:
+            (InfosetTable): The table
+        '''
+        table = InfosetTable(self.action_num, capacity=max(self.size, 1))
+        for i in range(self.size):
+            table.get_id(self.key(i))
+        table.strategy_sums[:self.size] = self.strategy_sums
+        table.regrets[:self.size] = self.regrets
+        table.update_policy()
+        return table
+
+    def _encoded_key(self, infoset_id):
+        key_length = self.header['key_length']
+        if key_length is None:
+            start, end = self._offsets[infoset_id], self._offsets[infoset_id + 1]
+        else:
+            start, end = infoset_id * key_length, (infoset_id + 1) * key_length
+        return self._buffer[self._keys_start + start:self._keys_start + end]
+
+    def _map(self, name):
+        offset, dtype, shape = self.header['sections'][name]
+        if np.prod(shape) == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=tuple(shape))
+
+
+class CheckpointView(collections.abc.Mapping):
+    ''' A read-only dict-like view of one matrix of a CFRCheckpoint
+    '''
+
+    def __init__(self, checkpoint, name):
+        self.checkpoint = checkpoint
+        self.name = name
+        self.matrix = getattr(checkpoint, name)
+
+    def __getitem__(self, key):
+        infoset_id = self.checkpoint.find(key)
+        if infoset_id < 0:
+            raise KeyError(key)
+        return self.matrix[infoset_id]
+
+    def __contains__(self, key):
+        return self.checkpoint.find(key) >= 0
+
+    def __iter__(self):
+        for i in range(self.checkpoint.size):
+            yield self.checkpoint.key(i)
+
+    def __len__(self):
+        return self.checkpoint.size
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
@@ -3,6 +3,8 @@ import numpy as np
 from rlcard.agents.best_response_agent import BRAgent
 from copy import deepcopy
 
+from rlcard.utils.game_tree import compile_game_tree, DECISION
+
 
 def exploitability(env, agent, evaluate_num):
     avg_exp = 0.0
@@ -27,3 +29,120 @@ def exploitability(env, agent, evaluate_num):
         avg_exp += expoit
     avg_exp /= evaluate_num
     return avg_exp
+
+
+def tabular_policy(tree, policy):
+    ''' Convert a tabular policy into the action probabilities of the
+        information sets of a game tree
+
+    Args:
+        tree (GameTree): The game tree
+        policy (dict): A dict-like policy state_str -> action probabilities,
+          e.g., the average_policy of CFRAgent. The probabilities do not need
+          to be normalized. The missing states are played uniformly
+
+    Returns:
+        (numpy.array): The action probabilities with shape (infoset_num, action_num)
+    '''
+    probs = np.ones((tree.infoset_num, tree.action_num))
+    for infoset_id, key in enumerate(tree.infoset_keys):
+        if key in policy:
+            probs[infoset_id] = policy[key]
+    return probs
+
+
+def best_response(tree, policy, player_id):
+    ''' Compute the best response of a player against a policy of the other
+        players with one top-down pass for the reach probabilities and one
+        bottom-up pass for the values. The information sets of the best
+        responder are aggregated by the key and the action history, so the
+        best response has perfect recall.
+
+    Args:
+        tree (GameTree): The game tree
+        policy (numpy.array): The action probabilities of the information
+          sets of the tree, see tabular_policy
+        player_id (int): The best responder
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (float): The value of the best response
+            (numpy.array): The best action at each node of the best
+              responder, -1 at the other nodes
+    '''
+    weights = tree.edge_probs(policy)
+    edge_parents = tree.edge_parents
+    is_responder = (tree.node_types == DECISION) & (tree.players == player_id)
+    responder_edges = is_responder[edge_parents]
+    edges_by_depth = tree.edges_by_depth()
+
+    # The information sets of the best responder
+    responder_nodes = np.nonzero(is_responder)[0]
+    histories = tree.history_ids()
+    responder_infosets = np.full(tree.node_num, -1, dtype=np.int64)
+    _, responder_infosets[responder_nodes] = np.unique(
+        np.stack([tree.infoset_ids[responder_nodes], histories[responder_nodes]], axis=1),
+        axis=0, return_inverse=True)
+
+    # The reach probabilities of the chance and the other players
+    reaches = np.zeros(tree.node_num)
+    reaches[0] = 1.0
+    for edges in edges_by_depth:
+        reaches[tree.children[edges]] = reaches[edge_parents[edges]] * np.where(responder_edges[edges], 1.0, weights[edges])
+
+    values = tree.payoffs[:, player_id].copy()
+    best_actions = np.full(tree.node_num, -1, dtype=np.int64)
+    for edges in reversed(edges_by_depth):
+        other_edges = edges[~responder_edges[edges]]
+        np.add.at(values, edge_parents[other_edges], weights[other_edges] * values[tree.children[other_edges]])
+
+        own_edges = edges[responder_edges[edges]]
+        if len(own_edges) == 0:
+            continue
+        parents = edge_parents[own_edges]
+        actions = tree.actions[own_edges]
+        infosets, rows = np.unique(responder_infosets[parents], return_inverse=True)
+        action_values = np.full((len(infosets), tree.action_num), -np.inf)
+        action_values[rows, actions] = 0.0
+        np.add.at(action_values, (rows, actions), reaches[parents] * values[tree.children[own_edges]])
+        best = np.argmax(action_values, axis=1)
+        chosen = actions == best[rows]
+        values[parents[chosen]] = values[tree.children[own_edges[chosen]]]
+        best_actions[parents[chosen]] = actions[chosen]
+    return values[0], best_actions
+
+
+def nash_conv(tree, policy):
+    ''' Compute the sum over the players of the gains of their best responses
+
+    Args:
+        tree (GameTree): The game tree
+        policy (numpy.array): The action probabilities of the information
+          sets of the tree, see tabular_policy
+
+    Returns:
+        (float): The NashConv of the policy
+    '''
+    on_policy_values = tree.expected_payoffs(policy)
+    return sum(best_response(tree, policy, player_id)[0] - on_policy_values[player_id]
+               for player_id in range(tree.player_num))
+
+
+def exact_exploitability(env, policy, cache_path=None):
+    ''' Compute the exact exploitability of a tabular policy, i.e., the
+        NashConv divided by the number of players. Unlike `exploitability`,
+        no game is sampled, and the game tree is compiled (or loaded from
+        cache_path) and traversed once per player.
+
+    Args:
+        env (Env): The env, which must allow step_back
+        policy (dict): A dict-like policy state_str -> action probabilities,
+          e.g., the average_policy of CFRAgent
+        cache_path (str): The cache of the compiled game tree, see compile_game_tree
+
+    Returns:
+        (float): The exploitability of the policy
+    '''
+    tree = compile_game_tree(env, cache_path=cache_path)
+    return nash_conv(tree, tabular_policy(tree, policy)) / tree.player_num
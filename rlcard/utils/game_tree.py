@@ -0,0 +1,398 @@
+''' Compile the game tree of a small game into flat arrays
+'''
+import os
+import pickle
+import itertools
+
+import numpy as np
+
+from rlcard.utils.utils import get_state_key
+
+# The types of the nodes
+CHANCE = 0
+DECISION = 1
+TERMINAL = 2
+
+# Increase it whenever the layout of GameTree changes, so that the trees
+# cached on the disk are compiled again
+TREE_VERSION = 3
+
+
+class GameTree(object):
+    ''' A game tree stored in flat arrays. The nodes are numbered in
+        pre-order, so a parent always has a smaller ID than its children.
+        The outgoing edges of node i are the edges
+        child_offsets[i]:child_offsets[i+1].
+
+        Node arrays:
+            node_types (numpy.array): CHANCE, DECISION or TERMINAL
+            players (numpy.array): The acting player, -1 if it is not a decision node
+            infoset_ids (numpy.array): The information set of the acting player,
+              -1 if it is not a decision node
+            depths (numpy.array): The number of edges from the root
+            child_offsets (numpy.array): The offsets of the outgoing edges
+            payoffs (numpy.array): The payoffs of all the players at the terminal nodes
+
+        Edge arrays:
+            children (numpy.array): The node that the edge leads to
+            actions (numpy.array): The action of the edge, -1 for the chance edges
+            chance_probs (numpy.array): The probability of the chance edges, 0
+              for the action edges
+
+        Information set lists:
+            infoset_keys (list): The key of each information set as in
+              CFRAgent, i.e., `state['infoset_key']` if infoset_key is True,
+              otherwise `state['obs'].tostring()`. The information sets of
+              different players may have the same key
+            infoset_players (numpy.array): The player of each information set
+            infoset_key (boolean): True if the env was made with `infoset_key=True`
+            suit_isomorphism (boolean): True if the env was made with `suit_isomorphism=True`
+            chance_nodes (boolean): True if the env was made with `chance_nodes=True`
+    '''
+
+    def __init__(self, name, player_num, action_num, node_types, players, infoset_ids,
+                 depths, child_offsets, payoffs, children, actions, chance_probs,
+                 infoset_keys, infoset_players, infoset_key=False, suit_isomorphism=False,
+                 chance_nodes=False):
+        self.version = TREE_VERSION
+        self.name = name
+        self.player_num = player_num
+        self.action_num = action_num
+        self.node_types = node_types
+        self.players = players
+        self.infoset_ids = infoset_ids
+        self.depths = depths
+        self.child_offsets = child_offsets
+        self.payoffs = payoffs
+        self.children = children
+        self.actions = actions
+        self.chance_probs = chance_probs
+        self.infoset_keys = infoset_keys
+        self.infoset_players = infoset_players
+        self.infoset_key = infoset_key
+        self.suit_isomorphism = suit_isomorphism
+        self.chance_nodes = chance_nodes
+
+    @property
+    def node_num(self):
+        return len(self.node_types)
+
+    @property
+    def infoset_num(self):
+        return len(self.infoset_keys)
+
+    @property
+    def edge_parents(self):
+        ''' The node that each edge starts from
+        '''
+        return np.repeat(np.arange(self.node_num), np.diff(self.child_offsets))
+
+    def edges_by_depth(self):
+        ''' Group the edges by the depths of their parents
+
+        Returns:
+            (list): The indices of the edges whose parents are at depth d, for
+              each depth d from 0 to the maximum depth minus one
+        '''
+        edge_depths = self.depths[self.edge_parents]
+        order = np.argsort(edge_depths, kind='stable')
+        boundaries = np.searchsorted(edge_depths[order], np.arange(1, self.depths.max()))
+        return np.split(order, boundaries)
+
+    def history_ids(self):
+        ''' Number the action histories from the root. The actions of all the
+            games in RLCard are public, so the key of the information set of
+            the acting player together with the action history identifies
+            the information set with perfect recall, even if the key alone
+            (e.g., `obs.tostring()`) does not encode the history.
+
+        Returns:
+            (numpy.array): The ID of the action history of each node. The
+              chance edges do not change the history
+        '''
+        histories = np.zeros(self.node_num, dtype=np.int64)
+        history_num = 1
+        edge_parents = self.edge_parents
+        for edges in self.edges_by_depth():
+            parents = edge_parents[edges]
+            children = self.children[edges]
+            is_action = self.actions[edges] >= 0
+            histories[children[~is_action]] = histories[parents[~is_action]]
+            pairs = histories[parents[is_action]] * self.action_num + self.actions[edges][is_action]
+            _, inverse = np.unique(pairs, return_inverse=True)
+            histories[children[is_action]] = history_num + inverse
+            history_num += len(inverse) and inverse.max() + 1
+        return histories
+
+    def edge_probs(self, policy):
+        ''' Get the probability of taking each edge under a policy
+
+        Args:
+            policy (numpy.array): The action probabilities of each information
+              set, with shape (infoset_num, action_num). The probabilities are
+              normalized over the legal actions, and uniform if they are all zeros
+
+        Returns:
+            (numpy.array): The probability of each edge
+        '''
+        edge_parents = self.edge_parents
+        is_action = self.actions >= 0
+        action_parents = edge_parents[is_action]
+        probs = self.chance_probs.copy()
+        action_probs = policy[self.infoset_ids[action_parents], self.actions[is_action]]
+        totals = np.zeros(self.node_num)
+        np.add.at(totals, action_parents, action_probs)
+        counts = np.diff(self.child_offsets)
+        probs[is_action] = np.where(totals[action_parents] > 0,
+                                    action_probs / np.maximum(totals[action_parents], 1e-300),
+                                    1.0 / counts[action_parents])
+        return probs
+
+    def expected_payoffs(self, policy):
+        ''' Compute the expected payoffs of all the players when they all
+            follow the policy. The values are propagated from the deepest
+            nodes to the root one depth at a time.
+
+        Args:
+            policy (numpy.array): The action probabilities of each information
+              set, with shape (infoset_num, action_num)
+
+        Returns:
+            (numpy.array): The expected payoffs of the players
+        '''
+        weights = self.edge_probs(policy)
+        edge_parents = self.edge_parents
+        edge_depths = self.depths[edge_parents]
+        values = self.payoffs.copy()
+        for depth in range(self.depths.max() - 1, -1, -1):
+            edges = np.nonzero(edge_depths == depth)[0]
+            np.add.at(values, edge_parents[edges], weights[edges, None] * values[self.children[edges]])
+        return values[0]
+
+    def save(self, path):
+        ''' Save the tree to a file
+
+        Args:
+            path (str): The path of the file
+        '''
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path):
+        ''' Load a tree from a file
+
+        Args:
+            path (str): The path of the file
+
+        Returns:
+            (GameTree): The tree
+        '''
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+class GameTreeBuilder(object):
+    ''' Walk a game with step and step_back, and record the nodes and edges
+    '''
+
+    def __init__(self, env, max_nodes):
+        self.env = env
+        self.max_nodes = max_nodes
+        self.node_types = []
+        self.players = []
+        self.infoset_ids = []
+        self.depths = []
+        self.payoffs = {}
+        self.edges = []
+        self.infoset_index = {}
+        self.infoset_keys = []
+        self.infoset_players = []
+
+    def add_node(self, node_type, depth, player=-1, infoset_id=-1):
+        node = len(self.node_types)
+        if node >= self.max_nodes:
+            raise ValueError('The game tree of {} has more than {} nodes'.format(self.env.name, self.max_nodes))
+        self.node_types.append(node_type)
+        self.players.append(player)
+        self.infoset_ids.append(infoset_id)
+        self.depths.append(depth)
+        self.edges.append([])
+        return node
+
+    def add_chance_node(self, deals, deal_fn):
+        ''' Add the root chance node whose children are the deals
+
+        Args:
+            deals (list): A list of (probability, deal) tuples
+            deal_fn (function): Reset the env and apply a deal to it
+        '''
+        node = self.add_node(CHANCE, 0)
+        for prob, deal in deals:
+            deal_fn(self.env, deal)
+            self.edges[node].append((self.expand(1), -1, prob))
+        return node
+
+    def expand(self, depth):
+        ''' Add the node of the current state of the env and its subtree
+
+        Args:
+            depth (int): The depth of the node
+
+        Returns:
+            (int): The ID of the node
+        '''
+        if self.env.is_over():
+            node = self.add_node(TERMINAL, depth)
+            self.payoffs[node] = self.env.get_payoffs()
+            return node
+
+        if self.env.is_chance_node():
+            node = self.add_node(CHANCE, depth)
+            for outcome, prob in self.env.get_chance_outcomes():
+                self.env.step_chance(outcome)
+                try:
+                    self.edges[node].append((self.expand(depth + 1), -1, prob))
+                finally:
+                    self.env.step_back()
+            return node
+
+        player = self.env.get_player_id()
+        state = self.env.get_state(player)
+        key = get_state_key(state)
+        # The observations of different players may be the same
+        infoset_id = self.infoset_index.get((player, key))
+        if infoset_id is None:
+            infoset_id = len(self.infoset_keys)
+            self.infoset_index[(player, key)] = infoset_id
+            self.infoset_keys.append(key)
+            self.infoset_players.append(player)
+
+        node = self.add_node(DECISION, depth, player, infoset_id)
+        for action in state['legal_actions']:
+            self.env.step(action)
+            try:
+                self.edges[node].append((self.expand(depth + 1), action, 0.0))
+            finally:
+                self.env.step_back()
+        return node
+
+    def build(self):
+        ''' Convert the recorded nodes and edges into a GameTree
+        '''
+        child_offsets = np.zeros(len(self.node_types) + 1, dtype=np.int64)
+        child_offsets[1:] = np.cumsum([len(edges) for edges in self.edges])
+        edges = [edge for node_edges in self.edges for edge in node_edges]
+        payoffs = np.zeros((len(self.node_types), self.env.player_num))
+        for node, payoff in self.payoffs.items():
+            payoffs[node] = payoff
+        return GameTree(name=self.env.name,
+                        player_num=self.env.player_num,
+                        action_num=self.env.action_num,
+                        node_types=np.array(self.node_types, dtype=np.int8),
+                        players=np.array(self.players, dtype=np.int8),
+                        infoset_ids=np.array(self.infoset_ids, dtype=np.int32),
+                        depths=np.array(self.depths, dtype=np.int32),
+                        child_offsets=child_offsets,
+                        payoffs=payoffs,
+                        children=np.array([edge[0] for edge in edges], dtype=np.int32),
+                        actions=np.array([edge[1] for edge in edges], dtype=np.int32),
+                        chance_probs=np.array([edge[2] for edge in edges], dtype=np.float64),
+                        infoset_keys=self.infoset_keys,
+                        infoset_players=np.array(self.infoset_players, dtype=np.int8),
+                        infoset_key=self.env.infoset_key,
+                        suit_isomorphism=getattr(self.env, 'suit_isomorphism', False),
+                        chance_nodes=self.env.chance_nodes)
+
+
+def leduc_holdem_deals(env):
+    ''' Enumerate the deals of Leduc Hold'em, i.e., the player with the
+        small blind, the hands and the public card
+
+    Returns:
+        (list): A list of (probability, deal) tuples
+    '''
+    from rlcard.games.leducholdem import Dealer
+    deck = Dealer(np.random.RandomState(0)).deck
+    deck.sort(key=lambda card: (card.rank, card.suit))
+    deals = [(small_blind, cards)
+             for small_blind in range(env.player_num)
+             for cards in itertools.permutations(range(len(deck)), env.player_num + 1)]
+    return [(1.0 / len(deals), deal) for deal in deals]
+
+
+def deal_leduc_holdem(env, deal):
+    ''' Reset the env of Leduc Hold'em and apply a deal to it
+    '''
+    from rlcard.games.leducholdem import Dealer
+    small_blind, cards = deal
+    env.reset()
+    game = env.game
+    deck = Dealer(np.random.RandomState(0)).deck
+    deck.sort(key=lambda card: (card.rank, card.suit))
+    for player, card in zip(game.players, cards):
+        player.hand = deck[card]
+        player.in_chips = 0
+    # The public card is the next card dealt
+    game.dealer.deck = [card for i, card in enumerate(deck) if i not in cards] + [deck[cards[-1]]]
+    big_blind = (small_blind + 1) % game.num_players
+    game.players[big_blind].in_chips = game.big_blind
+    game.players[small_blind].in_chips = game.small_blind
+    game.game_pointer = small_blind
+    game.round.start_new_round(game_pointer=small_blind, raised=[p.in_chips for p in game.players])
+
+
+# The functions that enumerate and apply the deals of each env
+DEALS = {
+    'leduc-holdem': (leduc_holdem_deals, deal_leduc_holdem),
+}
+
+
+def compile_game_tree(env, cache_path=None, from_current_state=False, max_nodes=10000000):
+    ''' Compile the game tree of an env into flat arrays
+
+    Args:
+        env (Env): The env, which must allow step_back
+        cache_path (str): If set, the tree is loaded from this file when it
+          was compiled before, and saved to it otherwise
+        from_current_state (boolean): If True, the tree is rooted at the
+          current state of the env instead of enumerating the deals. It can
+          be used for the endgames of the games whose deals can not be
+          enumerated, e.g., Simple Doudizhu. If the env is made with
+          chance_nodes, the deals are the outcomes of its chance nodes
+        max_nodes (int): Raise an error if the tree has more nodes
+
+    Returns:
+        (GameTree): The game tree
+    '''
+    if cache_path is not None and not from_current_state and os.path.exists(cache_path):
+        tree = GameTree.load(cache_path)
+        # The settings of the env change the information sets and the chance nodes
+        if tree.version == TREE_VERSION and tree.name == env.name and tree.infoset_key == env.infoset_key \
+                and tree.suit_isomorphism == getattr(env, 'suit_isomorphism', False) \
+                and tree.chance_nodes == env.chance_nodes:
+            return tree
+
+    if not env.allow_step_back:
+        raise ValueError('Compiling the game tree requires allow_step_back')
+
+    builder = GameTreeBuilder(env, max_nodes)
+    if from_current_state:
+        builder.expand(0)
+    elif env.chance_nodes:
+        # The deals are the outcomes of the chance nodes
+        env.reset()
+        builder.expand(0)
+    else:
+        if env.name not in DEALS:
+            raise ValueError('The deals of {} can not be enumerated, set from_current_state to compile the subtree of a state'.format(env.name))
+        enumerate_deals, deal_fn = DEALS[env.name]
+        builder.add_chance_node(enumerate_deals(env), deal_fn)
+    tree = builder.build()
+
+    if cache_path is not None and not from_current_state:
+        tree.save(cache_path)
+    return tree
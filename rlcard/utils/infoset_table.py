@@ -0,0 +1,201 @@
+''' Array-backed storage of information sets for tabular CFR
+'''
+import collections.abc
+
+import numpy as np
+
+
+class InfosetTable(object):
+    ''' A table of the information sets visited by tabular CFR. The keys of
+        the information sets (e.g., `obs.tostring()`) are interned to dense
+        integer IDs, and the regrets, the strategy sums (the unnormalized
+        average policy) and the current policy of all the information sets
+        are stored in contiguous 2-D arrays whose rows are indexed by the
+        IDs. Regret matching is then one vectorized pass over the table.
+    '''
+
+    def __init__(self, action_num, capacity=1024):
+        ''' Initialize the table
+
+        Args:
+            action_num (int): The number of actions in the game
+            capacity (int): The number of rows allocated at the beginning. The
+              arrays are doubled whenever they are full
+        '''
+        self.action_num = action_num
+        self.index = {}
+        self.keys = []
+        self.size = 0
+        self.regrets = np.zeros((capacity, action_num))
+        self.strategy_sums = np.zeros((capacity, action_num))
+        self.policy = np.full((capacity, action_num), 1.0 / action_num)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get_id(self, key):
+        ''' Get the ID of an information set, and add it if it is new
+
+        Args:
+            key (hashable): The key of the information set
+
+        Returns:
+            (int): The ID of the information set
+        '''
+        infoset_id = self.index.get(key)
+        if infoset_id is None:
+            infoset_id = self.size
+            if infoset_id == len(self.regrets):
+                self._grow()
+            self.index[key] = infoset_id
+            self.keys.append(key)
+            self.size += 1
+        return infoset_id
+
+    def find(self, key):
+        ''' Get the ID of an information set without adding it
+
+        Args:
+            key (hashable): The key of the information set
+
+        Returns:
+            (int): The ID of the information set, or -1 if it is not in the table
+        '''
+        return self.index.get(key, -1)
+
+    def truncate(self, size):
+        ''' Remove the information sets whose IDs are not smaller than size
+
+        Args:
+            size (int): The number of information sets to keep
+        '''
+        for key in self.keys[size:]:
+            del self.index[key]
+        del self.keys[size:]
+        self.regrets[size:self.size] = 0
+        self.strategy_sums[size:self.size] = 0
+        self.policy[size:self.size] = 1.0 / self.action_num
+        self.size = min(self.size, size)
+
+    def update_policy(self):
+        ''' Apply regret matching to all the information sets. The actions
+            are played in proportion to their positive regrets, or uniformly
+            if no action has a positive regret.
+        '''
+        positive_regrets = np.maximum(self.regrets[:self.size], 0)
+        positive_regret_sums = positive_regrets.sum(axis=1, keepdims=True)
+        has_positive = positive_regret_sums[:, 0] > 0
+        policy = self.policy[:self.size]
+        policy[:] = 1.0 / self.action_num
+        policy[has_positive] = positive_regrets[has_positive] / positive_regret_sums[has_positive]
+
+    def regret_matching(self, infoset_id):
+        ''' Apply regret matching to one information set, for the algorithms
+            that only update the visited information sets (e.g., MCCFR)
+
+        Args:
+            infoset_id (int): The ID of the information set
+
+        Returns:
+            (numpy.array): The updated row of the policy
+        '''
+        positive_regret = np.maximum(self.regrets[infoset_id], 0)
+        positive_regret_sum = positive_regret.sum()
+        if positive_regret_sum > 0:
+            self.policy[infoset_id] = positive_regret / positive_regret_sum
+        else:
+            self.policy[infoset_id] = 1.0 / self.action_num
+        return self.policy[infoset_id]
+
+    def floor_regrets(self):
+        ''' Set the negative regrets to zero, as in CFR+
+        '''
+        np.maximum(self.regrets[:self.size], 0, out=self.regrets[:self.size])
+
+    def discount(self, positive_weight, negative_weight, strategy_weight):
+        ''' Multiply the regrets and the strategy sums by the weights, as in
+            Linear CFR and Discounted CFR
+
+        Args:
+            positive_weight (float): The weight of the positive regrets
+            negative_weight (float): The weight of the negative regrets
+            strategy_weight (float): The weight of the strategy sums
+        '''
+        regrets = self.regrets[:self.size]
+        regrets *= np.where(regrets > 0, positive_weight, negative_weight)
+        self.strategy_sums[:self.size] *= strategy_weight
+
+    def average_policy(self):
+        ''' Compute the normalized average policy of all the information sets
+
+        Returns:
+            (numpy.array): The average policy with shape (size, action_num). The
+              rows whose strategy sums are all zeros are uniform
+        '''
+        strategy_sums = self.strategy_sums[:self.size]
+        totals = strategy_sums.sum(axis=1, keepdims=True)
+        average_policy = np.full(strategy_sums.shape, 1.0 / self.action_num)
+        has_sum = totals[:, 0] > 0
+        average_policy[has_sum] = strategy_sums[has_sum] / totals[has_sum]
+        return average_policy
+
+    def view(self, name):
+        ''' Get a read-only dict-like view of one of the arrays, keyed by the
+            keys of the information sets
+
+        Args:
+            name (str): 'regrets', 'strategy_sums' or 'policy'
+
+        Returns:
+            (InfosetView): The view
+        '''
+        return InfosetView(self, name)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['index']
+        for name in ['regrets', 'strategy_sums', 'policy']:
+            state[name] = state[name][:self.size].copy()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+
+    def _grow(self):
+        ''' Double the number of rows of the arrays
+        '''
+        capacity = max(2 * len(self.regrets), 1)
+        for name, fill in [('regrets', 0.0), ('strategy_sums', 0.0), ('policy', 1.0 / self.action_num)]:
+            array = np.full((capacity, self.action_num), fill)
+            array[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+
+
+class InfosetView(collections.abc.Mapping):
+    ''' A read-only dict-like view of one array of an InfosetTable. Getting an
+        item returns the row of the information set, which is a view of the
+        array and always reflects the latest values.
+    '''
+
+    def __init__(self, table, name):
+        self.table = table
+        self.name = name
+
+    def __getitem__(self, key):
+        infoset_id = self.table.find(key)
+        if infoset_id < 0:
+            raise KeyError(key)
+        return getattr(self.table, self.name)[infoset_id]
+
+    def __contains__(self, key):
+        return key in self.table.index
+
+    def __iter__(self):
+        return iter(self.table.keys)
+
+    def __len__(self):
+        return self.table.size
@@ -0,0 +1,237 @@
+''' Local Best Response (LBR) for No-Limit Texas Hold'em
+
+LBR (Lisy and Bowling, 2017) lower-bounds the exploitability of a policy
+that is too large for an exact best response. LBR plays against the policy
+and keeps a belief over the hole cards of the opponent, which is updated
+with the action probabilities of the policy after every action of the
+opponent. At each of its decisions, LBR estimates its probability of
+winning against the belief with Monte Carlo rollouts of the board, and the
+probability that the opponent folds to each raise by querying the policy,
+then greedily takes the action with the highest value, assuming that the
+game is checked down to the showdown after a call.
+'''
+import itertools
+import multiprocessing as mp
+
+import numpy as np
+
+from rlcard.games.limitholdem.utils import compare_hands
+from rlcard.games.nolimitholdem.round import Action
+from rlcard.utils.utils import init_standard_deck, assign_task
+
+
+class LocalBestResponse(object):
+    ''' Play LBR against an agent in a No-Limit Texas Hold'em env
+    '''
+
+    def __init__(self, env, agent, range_size=None, rollout_num=100, seed=None):
+        ''' Initialize LBR
+
+        Args:
+            env (Env): A two-player no-limit-holdem env, which must allow step_back
+            agent (object): The agent to evaluate. Its eval_step must return the
+              action and the probabilities of all the actions
+            range_size (int): If set, the belief over the hole cards of the
+              opponent is kept on a random sample of range_size hands instead of
+              all the 1326 hands. The policy is queried for all the hands of the
+              belief at every action of the opponent and every raise of LBR, in
+              one batch if the agent has batch_eval_step, so a small range trades
+              precision for speed with neural agents
+            rollout_num (int): The number of rollouts to estimate the probability of winning
+            seed (int): The seed of the sampling of LBR
+        '''
+        if env.name != 'no-limit-holdem' or env.player_num != 2:
+            raise ValueError('LBR only supports two-player no-limit-holdem')
+        if not env.allow_step_back:
+            raise ValueError('LBR needs an env with allow_step_back')
+        self.env = env
+        self.agent = agent
+        self.range_size = range_size
+        self.rollout_num = rollout_num
+        self.np_random = np.random.RandomState(seed)
+
+        self.deck = init_standard_deck()
+        self.card_indexes = [card.get_index() for card in self.deck]
+        self.card_ids = {index: i for i, index in enumerate(self.card_indexes)}
+        self.all_hands = np.array(list(itertools.combinations(range(len(self.deck)), 2)))
+
+    def play(self, player_id):
+        ''' Play one game with LBR in the seat player_id and the agent in the other seat
+
+        Args:
+            player_id (int): The seat of LBR
+
+        Returns:
+            (float): The payoff of LBR
+        '''
+        env = self.env
+        opponent_id = 1 - player_id
+        env.reset()
+        hand = self._card_ids(env.game.players[player_id].hand)
+
+        # The belief over the hole cards of the opponent
+        hands = self.all_hands[~np.isin(self.all_hands, hand).any(axis=1)]
+        if self.range_size is not None and self.range_size < len(hands):
+            hands = hands[self.np_random.choice(len(hands), self.range_size, replace=False)]
+        weights = np.ones(len(hands))
+
+        while not env.is_over():
+            board = self._card_ids(env.game.public_cards)
+            weights[np.isin(hands, board).any(axis=1)] = 0
+            if weights.sum() == 0:
+                # The belief only contained hands that are excluded by the
+                # board or that the agent never plays like this
+                weights[~np.isin(hands, board).any(axis=1)] = 1
+            state = env.get_state(env.get_player_id())
+            if env.get_player_id() == player_id:
+                action = self._best_action(state, player_id, hand, board, hands, weights)
+            else:
+                action, _ = self.agent.eval_step(state)
+                weights *= self._opponent_probs(opponent_id, hands, weights, action)
+            env.step(action)
+        return env.get_payoffs()[player_id]
+
+    def _best_action(self, state, player_id, hand, board, hands, weights):
+        ''' Choose the action with the highest estimated value. The values are
+            relative to the chips that LBR has already put in the pot.
+        '''
+        env = self.env
+        players = env.game.players
+        pot = sum(player.in_chips for player in players)
+        asked = max(player.in_chips for player in players) - players[player_id].in_chips
+        win_prob = self._win_probability(hand, board, hands, weights)
+
+        values = {}
+        for action in state['legal_actions']:
+            if action == Action.FOLD.value:
+                values[action] = 0.0
+            elif action in (Action.CHECK.value, Action.CALL.value):
+                values[action] = win_prob * pot - (1 - win_prob) * asked
+            else:
+                in_chips = players[player_id].in_chips
+                opponent_chips = players[1 - player_id].remained_chips
+                env.step(action)
+                # The chips that the opponent has to add to call the raise
+                raised = min(players[player_id].in_chips - in_chips - asked, opponent_chips)
+                fold_prob = 0.0
+                if not env.is_over() and env.get_player_id() == 1 - player_id:
+                    fold_probs = self._opponent_probs(1 - player_id, hands, weights, Action.FOLD.value)
+                    fold_prob = np.dot(weights, fold_probs) / weights.sum()
+                env.step_back()
+                values[action] = fold_prob * pot + (1 - fold_prob) * \
+                    (win_prob * (pot + raised) - (1 - win_prob) * (asked + raised))
+        # Do not fold if the values are tied
+        return max(values, key=lambda action: (values[action], action != Action.FOLD.value))
+
+    def _win_probability(self, hand, board, hands, weights):
+        ''' Estimate the probability that LBR wins at the showdown, counting
+            the ties as half wins, by sampling the hand of the opponent from
+            the belief and the rest of the board uniformly
+        '''
+        samples = self.np_random.choice(len(hands), self.rollout_num, p=weights / weights.sum())
+        unknown = np.ones(len(self.deck), dtype=bool)
+        unknown[hand + board] = False
+        wins = 0.0
+        for opponent_hand in hands[samples]:
+            remaining = unknown.copy()
+            remaining[opponent_hand] = False
+            rollout = board + list(self.np_random.choice(np.nonzero(remaining)[0], 5 - len(board), replace=False))
+            winners = compare_hands([[self.card_indexes[i] for i in hand + rollout],
+                                     [self.card_indexes[i] for i in list(opponent_hand) + rollout]])
+            wins += winners[0] / sum(winners)
+        return wins / self.rollout_num
+
+    def _opponent_probs(self, opponent_id, hands, weights, action):
+        ''' Get the probability that the agent takes the action in the current
+            state with each hand of the belief. The hands with zero weights
+            are not queried. The agent is queried with one batch_eval_step
+            call if it has the method.
+        '''
+        env = self.env
+        opponent = env.game.players[opponent_id]
+        real_hand = opponent.hand
+        indexes = np.nonzero(weights)[0]
+        states = []
+        try:
+            for i in indexes:
+                opponent.hand = [self.deck[card_id] for card_id in hands[i]]
+                states.append(env.get_state(opponent_id))
+        finally:
+            opponent.hand = real_hand
+        if hasattr(self.agent, 'batch_eval_step'):
+            _, batch_probs = self.agent.batch_eval_step(states)
+        else:
+            batch_probs = [self.agent.eval_step(state)[1] for state in states]
+        probs = np.zeros(len(hands))
+        probs[indexes] = [action_probs[action] for action_probs in batch_probs]
+        return probs
+
+    def _card_ids(self, cards):
+        return [self.card_ids[card.get_index()] for card in cards]
+
+
+def lbr_exploitability(env, agent, evaluate_num, process_num=1, range_size=None,
+                       rollout_num=100, seed=None, config=None, z=1.96):
+    ''' Estimate a lower bound of the exploitability of an agent in
+        No-Limit Texas Hold'em with LBR. LBR alternates the seats, and the
+        games are split among process_num worker processes.
+
+    Args:
+        env (Env): A two-player no-limit-holdem env
+        agent (object or function): The agent to evaluate, or a function that
+          returns it. With process_num > 1, the agent (or the function) is
+          pickled to the workers, so agents that can not be pickled, such as
+          the TensorFlow agents, should be given as a module-level function
+          that loads the checkpoint
+        evaluate_num (int): The number of games to play
+        process_num (int): The number of worker processes. With 1, the games
+          are played in the current process
+        range_size (int): The size of the belief of LBR, see LocalBestResponse
+        rollout_num (int): The number of rollouts of each decision of LBR
+        seed (int): If set, worker i seeds its env and LBR with seed + i * 1000
+        config (dict): Additional configurations of the envs of the workers,
+          which override the infoset_key, suit_isomorphism and chance_nodes
+          settings of env
+        z (float): The z-score of the confidence interval, 1.96 for 95%
+
+    Returns:
+        (tuple): Tuple containing:
+
+            (float): The average payoff of LBR per game
+            (float): The half-width of the confidence interval of the average
+    '''
+    # The agent plays in envs with the same settings as the given env
+    env_config = {key: getattr(env, key, False) for key in ['infoset_key', 'suit_isomorphism', 'chance_nodes']}
+    env_config.update(config or {})
+    env_config['allow_step_back'] = True
+    tasks = []
+    first_seat = 0
+    for i, game_num in enumerate(assign_task(evaluate_num, process_num)):
+        worker_config = dict(env_config)
+        worker_config['seed'] = None if seed is None else seed + i * 1000
+        tasks.append((env.name, worker_config, agent, game_num, first_seat, range_size, rollout_num, worker_config['seed']))
+        first_seat = (first_seat + game_num) % 2
+
+    if process_num == 1:
+        payoffs = [worker(tasks[0])]
+    else:
+        with mp.get_context('spawn').Pool(process_num) as pool:
+            payoffs = pool.map(worker, tasks)
+    payoffs = np.concatenate(payoffs)
+    if len(payoffs) < 2:
+        return float(payoffs.mean()), float('inf')
+    return float(payoffs.mean()), float(z * payoffs.std(ddof=1) / np.sqrt(len(payoffs)))
+
+def worker(task):
+    import random
+    import rlcard
+    env_id, config, agent, game_num, first_seat, range_size, rollout_num, seed = task
+    # Stochastic agents sample their actions with the global generators
+    if seed is not None:
+        np.random.seed(seed)
+        random.seed(seed)
+    if not hasattr(agent, 'eval_step'):
+        agent = agent()
+    env = rlcard.make(env_id, config)
+    lbr = LocalBestResponse(env, agent, range_size=range_size, rollout_num=rollout_num, seed=seed)
+    return np.array([lbr.play((first_seat + i) % 2) for i in range(game_num)], dtype=np.float64)
@@ -0,0 +1,72 @@
+''' Background preparation of training minibatches
+'''
+import inspect
+import queue
+import threading
+import weakref
+
+
+class Prefetcher(object):
+    ''' A daemon thread that keeps a queue of minibatches ready for training.
+        The minibatches are sampled and converted while the main thread steps
+        the environments and runs the optimizer, so a minibatch may be up to
+        queue_size batches older than the buffer it is sampled from. The
+        buffers must be safe to sample while they are written.
+
+        If sample_fn is a bound method, e.g., of an agent, the thread only
+        keeps a weak reference to its object, so that the thread does not
+        keep the object alive. The thread stops once the object is deleted.
+    '''
+
+    def __init__(self, sample_fn, queue_size=2):
+        ''' Start the thread
+
+        Args:
+            sample_fn (function): A function without arguments that returns a minibatch
+            queue_size (int): The number of minibatches kept ready
+        '''
+        if inspect.ismethod(sample_fn):
+            self._sample_ref = weakref.WeakMethod(sample_fn)
+        else:
+            self._sample_ref = lambda: sample_fn
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def get(self):
+        ''' Get the next minibatch, waiting for it if the queue is empty. An
+            exception raised by sample_fn is raised again here.
+
+        Returns:
+            (object): The minibatch
+        '''
+        batch, error = self.queue.get()
+        if error is not None:
+            raise error
+        return batch
+
+    def close(self):
+        ''' Stop the thread. The minibatches in the queue are discarded.
+        '''
+        self._stop.set()
+        self.thread.join()
+
+    def _run(self):
+        error = None
+        while error is None and not self._stop.is_set():
+            sample_fn = self._sample_ref()
+            if sample_fn is None:
+                break
+            try:
+                item = (sample_fn(), None)
+            except Exception as e:
+                error = e
+                item = (None, e)
+            del sample_fn
+            while not self._stop.is_set() and self._sample_ref() is not None:
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
@@ -0,0 +1,574 @@
+''' Array-backed replay memories for the DQN, NFSP and Deep CFR agents
+'''
+import random
+import threading
+
+import numpy as np
+
+
+def _pack(obs, batch=False):
+    ''' Pack a binary observation, or a batch of them, into bits
+    '''
+    obs = np.asarray(obs)
+    if not ((obs == 0) | (obs == 1)).all():
+        raise ValueError('Only the observations that contain zeros and ones can be packed')
+    obs = obs.astype(bool)
+    if batch:
+        return np.packbits(obs.reshape(len(obs), -1), axis=1)
+    return np.packbits(obs.ravel())
+
+
+def _unpack(packed, shape, dtype):
+    ''' Unpack a batch of packed observations to their shape and dtype
+    '''
+    obs = np.unpackbits(packed, axis=1, count=int(np.prod(shape)))
+    return obs.reshape((len(packed),) + tuple(shape)).astype(dtype)
+
+
+class Memory(object):
+    ''' A ring buffer of transitions. The fields of the transitions are
+        stored in arrays that are allocated when the first transition is
+        saved, so saving overwrites the oldest transition in O(1) once the
+        memory is full, and sampling gathers each field with one fancy index.
+        Saving and sampling hold a lock, so that a Prefetcher can sample
+        in another thread.
+
+        Binary observations, such as the one-hot planes of Dou Dizhu, Mahjong
+        and UNO, can be stored bit-packed with pack_obs. With dedup_next_state,
+        the next state of a transition is not stored if it is the state of the
+        following transition, which is the case within an episode, and it is
+        read from the row of the following transition instead.
+    '''
+
+    def __init__(self, memory_size, batch_size, action_num=None, pack_obs=False, dedup_next_state=False):
+        ''' Initialize
+
+        Args:
+            memory_size (int): the size of the memory buffer
+            batch_size (int): the size of the sampled minibatches
+            action_num (int): the number of actions. If set, the legal actions
+              of the next states are stored as boolean masks
+            pack_obs (boolean): store the states with np.packbits. The states
+              must only contain zeros and ones, and they are unpacked to their
+              original shape and dtype when they are sampled
+            dedup_next_state (boolean): do not store the next states that are
+              the states of the following transitions
+        '''
+        self.memory_size = memory_size
+        self.batch_size = batch_size
+        self.action_num = action_num
+        self.pack_obs = pack_obs
+        self.dedup_next_state = dedup_next_state
+        self.size = 0
+        self.position = 0
+        self.obs_shape = None
+        self.obs_dtype = None
+        self.states = None
+        self.actions = np.zeros(memory_size, dtype=np.int64)
+        self.rewards = np.zeros(memory_size, dtype=np.float32)
+        self.next_states = None
+        self.dones = np.zeros(memory_size, dtype=bool)
+        self.legal_actions = None
+        if action_num is not None:
+            self.legal_actions = np.zeros((memory_size, action_num), dtype=bool)
+        if dedup_next_state:
+            # Whether the next state of a row is the state of the following row.
+            # Otherwise, it is the next state of the last saved transition or
+            # it is in next_state_overflow
+            self.next_follows = np.zeros(memory_size, dtype=bool)
+            self.next_state_overflow = {}
+            self._pending_row = None
+            self._pending_next_state = None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def save(self, state, action, reward, next_state, done, legal_actions=None):
+        ''' Save transition into memory
+
+        Args:
+            state (numpy.array): the current state
+            action (int): the performed action ID
+            reward (float): the reward received
+            next_state (numpy.array): the next state after performing the action
+            done (boolean): whether the episode is finished
+            legal_actions (list): the legal actions of the next state. All the
+              actions are legal if it is not given
+        '''
+        if self.memory_size == 0:
+            return
+        with self.lock:
+            self._save(state, action, reward, next_state, done, legal_actions)
+
+    def _save(self, state, action, reward, next_state, done, legal_actions):
+        if self.states is None:
+            self._allocate(np.asarray(state))
+        i = self.position
+        state = self._encode(state)
+        next_state = self._encode(next_state)
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.dones[i] = done
+        if self.dedup_next_state:
+            self._link(i, state, next_state)
+        else:
+            self.next_states[i] = next_state
+        if self.legal_actions is not None:
+            if legal_actions is None:
+                self.legal_actions[i] = True
+            else:
+                self.legal_actions[i] = False
+                self.legal_actions[i, list(legal_actions)] = True
+        self.position = (self.position + 1) % self.memory_size
+        self.size = min(self.size + 1, self.memory_size)
+
+    def _allocate(self, state):
+        self.obs_shape = state.shape
+        self.obs_dtype = state.dtype
+        if self.pack_obs:
+            shape = ((state.size + 7) // 8,)
+            dtype = np.uint8
+        else:
+            shape, dtype = state.shape, state.dtype
+        self.states = np.zeros((self.memory_size,) + shape, dtype=dtype)
+        if not self.dedup_next_state:
+            self.next_states = np.zeros((self.memory_size,) + shape, dtype=dtype)
+
+    def _encode(self, obs):
+        if not self.pack_obs:
+            return np.asarray(obs)
+        return _pack(obs)
+
+    def _decode(self, batch):
+        if not self.pack_obs:
+            return batch
+        return _unpack(batch, self.obs_shape, self.obs_dtype)
+
+    def _link(self, i, state, next_state):
+        ''' Resolve the next state of the previous transition against the
+            state of the transition in row i, and keep the next state of row i
+            until the following transition is saved
+        '''
+        self.next_follows[i] = False
+        self.next_state_overflow.pop(i, None)
+        previous = self._pending_row
+        if previous is not None and previous != i:
+            if np.array_equal(self._pending_next_state, state):
+                self.next_follows[previous] = True
+            else:
+                self.next_state_overflow[previous] = self._pending_next_state
+        self._pending_row = i
+        self._pending_next_state = np.array(next_state, dtype=self.states.dtype)
+
+    def sample(self):
+        ''' Sample a minibatch from the replay memory
+
+        Returns:
+            state_batch (numpy.array): a batch of states
+            action_batch (numpy.array): a batch of actions
+            reward_batch (numpy.array): a batch of rewards
+            next_state_batch (numpy.array): a batch of states
+            done_batch (numpy.array): a batch of dones
+            legal_actions_batch (numpy.array): a batch of the masks of the legal
+              actions of the next states, or None if action_num is not set
+        '''
+        with self.lock:
+            indexes = np.array(random.sample(range(self.size), self.batch_size), dtype=np.int64)
+            return self._gather(indexes)
+
+    def _gather(self, indexes):
+        if self.dedup_next_state:
+            next_states = self.states[(indexes + 1) % self.memory_size]
+            for k in np.nonzero(~self.next_follows[indexes])[0]:
+                i = indexes[k]
+                next_states[k] = self._pending_next_state if i == self._pending_row else self.next_state_overflow[i]
+        else:
+            next_states = self.next_states[indexes]
+        legal_actions_batch = None if self.legal_actions is None else self.legal_actions[indexes]
+        return self._decode(self.states[indexes]), self.actions[indexes], self.rewards[indexes], \
+            self._decode(next_states), self.dones[indexes], legal_actions_batch
+
+
+class SumTree(object):
+    ''' An array-based binary tree whose internal nodes hold the sums of the
+        priorities of their leaves. The number of leaves is rounded up to a
+        power of two, the root is at index 1 and the children of node i are
+        at 2i and 2i+1, so updating and sampling are batched over the levels
+        of the tree in O(log n).
+    '''
+
+    def __init__(self, capacity):
+        ''' Initialize
+
+        Args:
+            capacity (int): the number of priorities
+        '''
+        self.capacity = capacity
+        self.leaf_num = 1
+        while self.leaf_num < capacity:
+            self.leaf_num *= 2
+        self.tree = np.zeros(2 * self.leaf_num)
+
+    def total(self):
+        ''' Get the sum of all the priorities
+        '''
+        return self.tree[1]
+
+    def get(self, indexes):
+        ''' Get the priorities of the indexes
+        '''
+        return self.tree[self.leaf_num + np.asarray(indexes)]
+
+    def update(self, indexes, priorities):
+        ''' Set the priorities of a batch of indexes
+
+        Args:
+            indexes (numpy.array): the indexes of the priorities
+            priorities (numpy.array): the new priorities
+        '''
+        nodes = self.leaf_num + np.asarray(indexes, dtype=np.int64)
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] > 0:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values):
+        ''' Find the indexes whose prefix sums of the priorities contain the values
+
+        Args:
+            values (numpy.array): values in [0, total)
+
+        Returns:
+            (numpy.array): the indexes
+        '''
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.leaf_num:
+            left = 2 * nodes
+            go_right = values >= self.tree[left]
+            values -= self.tree[left] * go_right
+            nodes = left + go_right
+        return nodes - self.leaf_num
+
+
+class PrioritizedMemory(Memory):
+    ''' A replay memory that samples the transitions in proportion to their
+        priorities, the absolute TD errors to the power of alpha, as in
+        prioritized experience replay (Schaul et al., 2016). New transitions
+        get the maximum priority so that they are sampled at least once.
+    '''
+
+    def __init__(self, memory_size, batch_size, action_num=None, alpha=0.6, epsilon=1e-6,
+                 pack_obs=False, dedup_next_state=False):
+        ''' Initialize
+
+        Args:
+            memory_size (int): the size of the memory buffer
+            batch_size (int): the size of the sampled minibatches
+            action_num (int): the number of actions, see Memory
+            alpha (float): how much the priorities are used, 0 is uniform sampling
+            epsilon (float): the constant added to the TD errors so that all
+              the transitions can be sampled
+            pack_obs (boolean): store the states bit-packed, see Memory
+            dedup_next_state (boolean): do not store the next states that are
+              the states of the following transitions, see Memory
+        '''
+        super(PrioritizedMemory, self).__init__(memory_size, batch_size, action_num, pack_obs, dedup_next_state)
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(memory_size)
+        # The number of times each row is written, to detect the rows that
+        # are overwritten between sampling and updating the priorities
+        self.write_counts = np.zeros(memory_size, dtype=np.int64)
+
+    def _save(self, state, action, reward, next_state, done, legal_actions):
+        self.tree.update([self.position], [self.max_priority])
+        self.write_counts[self.position] += 1
+        super(PrioritizedMemory, self)._save(state, action, reward, next_state, done, legal_actions)
+
+    def sample(self, beta=0.4):
+        ''' Sample a minibatch with one uniform draw in each of batch_size
+            segments of equal priority mass
+
+        Args:
+            beta (float): the exponent of the importance-sampling weights, which
+              fully correct the bias of the sampling with 1
+
+        Returns:
+            state_batch, action_batch, reward_batch, next_state_batch, done_batch,
+            legal_actions_batch: see Memory.sample
+            weight_batch (numpy.array): the importance-sampling weights,
+              normalized by their maximum
+            indexes (numpy.array): the indexes of the transitions, to update
+              their priorities
+            write_counts (numpy.array): the write counts of the rows of the
+              transitions, see update_priorities
+        '''
+        with self.lock:
+            total = self.tree.total()
+            segment = total / self.batch_size
+            values = (np.arange(self.batch_size) + np.random.uniform(size=self.batch_size)) * segment
+            # Rounding may push the last values past the stored transitions
+            indexes = np.minimum(self.tree.find(values), self.size - 1)
+            probs = self.tree.get(indexes) / total
+            weights = (self.size * probs) ** -beta
+            weights = (weights / weights.max()).astype(np.float32)
+            return self._gather(indexes) + (weights, indexes, self.write_counts[indexes])
+
+    def update_priorities(self, indexes, td_errors, write_counts=None):
+        ''' Update the priorities of sampled transitions from their TD errors
+
+        Args:
+            indexes (numpy.array): the indexes returned by sample
+            td_errors (numpy.array): the TD errors of the transitions
+            write_counts (numpy.array): the write counts returned by sample. If
+              set, the rows that have been overwritten since the minibatch was
+              sampled, e.g., while it waited in a Prefetcher, are skipped
+        '''
+        indexes = np.asarray(indexes)
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        with self.lock:
+            if write_counts is not None:
+                unchanged = self.write_counts[indexes] == write_counts
+                indexes, priorities = indexes[unchanged], priorities[unchanged]
+                if len(indexes) == 0:
+                    return
+            # A transition that is sampled several times keeps its last TD error
+            self.tree.update(indexes, priorities)
+            self.max_priority = max(self.max_priority, priorities.max())
+
+
+class ColumnBuffer(object):
+    ''' The base of the buffers that store their elements in preallocated
+        columns. An element is a namedtuple (or a single value), and each of
+        its fields is stored in an array with one row per element, whose
+        shape and dtype are taken from the first added element. The floats
+        are stored in float32, which is what the networks take. Sampling
+        returns an element of the same type whose fields are the contiguous
+        arrays of the sampled rows. Adding and sampling hold a lock, so that
+        a Prefetcher can sample in another thread. The binary fields, such
+        as the one-hot planes of the observations, can be stored bit-packed.
+    '''
+
+    def __init__(self, capacity, packed_fields=()):
+        ''' Initialize the buffer
+
+        Args:
+            capacity (int): the maximum number of elements
+            packed_fields (list): the names of the fields that are stored with
+              np.packbits. They must only contain zeros and ones, and they are
+              unpacked to their original shape and dtype when they are sampled
+        '''
+        self.capacity = capacity
+        self.packed_fields = packed_fields
+        self.size = 0
+        self.columns = None
+        self.element_type = None
+        self.packed = None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self._element(i)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def add(self, element):
+        ''' Add an element
+
+        Args:
+            element (namedtuple or object): the element
+        '''
+        with self.lock:
+            if self.columns is None:
+                self._allocate(element, [np.asarray(field) for field in self._fields(element)])
+            rows, _ = self._rows(1)
+            for column, packed, field in zip(self.columns, self.packed, self._fields(element)):
+                column[rows] = _pack(field) if packed else field
+
+    def add_batch(self, batch):
+        ''' Add a batch of elements at once
+
+        Args:
+            batch (namedtuple or numpy.array): the elements in the form returned
+              by sample, i.e., a namedtuple whose fields are arrays with the
+              elements in the first axis, or a single array
+        '''
+        with self.lock:
+            fields = [np.asarray(field) for field in self._fields(batch)]
+            if self.columns is None:
+                self._allocate(batch, [field[0] for field in fields])
+            rows, offsets = self._rows(len(fields[0]))
+            for column, packed, field in zip(self.columns, self.packed, fields):
+                column[rows] = _pack(field[offsets], batch=True) if packed else field[offsets]
+
+    def sample(self, num_samples):
+        ''' Returns `num_samples` uniformly sampled from the buffer.
+
+        Args:
+            num_samples (int): number of samples to draw.
+
+        Returns:
+            (namedtuple or numpy.array): the sampled elements, whose fields are arrays
+
+        Raises:
+            ValueError: If there are less than `num_samples` elements in the buffer
+        '''
+        with self.lock:
+            if self.size < num_samples:
+                raise ValueError("{} elements could not be sampled from size {}".format(
+                    num_samples, self.size))
+            indexes = np.array(random.sample(range(self.size), num_samples), dtype=np.int64)
+            return self._gather(indexes)
+
+    def clear(self):
+        ''' Clear the buffer. The columns are kept to be reused
+        '''
+        with self.lock:
+            self.size = 0
+
+    def _rows(self, num):
+        ''' Get the rows to write a batch of num elements to, and the offsets
+            of the elements of the batch that are written to them
+        '''
+        raise NotImplementedError
+
+    @staticmethod
+    def _fields(element):
+        return element if hasattr(element, '_fields') else (element,)
+
+    def _allocate(self, element, fields):
+        self.element_type = type(element) if hasattr(element, '_fields') else None
+        names = element._fields if self.element_type is not None else [None]
+        self.columns = []
+        self.packed = []
+        for name, field in zip(names, fields):
+            dtype = np.float32 if np.issubdtype(field.dtype, np.floating) else field.dtype
+            if name in self.packed_fields:
+                # The shape and the dtype to unpack to
+                self.packed.append((field.shape, dtype))
+                self.columns.append(np.zeros((self.capacity, (field.size + 7) // 8), dtype=np.uint8))
+            else:
+                self.packed.append(None)
+                self.columns.append(np.zeros((self.capacity,) + field.shape, dtype=dtype))
+
+    def _gather(self, indexes):
+        fields = [column[indexes] if packed is None else _unpack(column[indexes], *packed)
+                  for column, packed in zip(self.columns, self.packed)]
+        if self.element_type is None:
+            return fields[0]
+        return self.element_type(*fields)
+
+    def _element(self, index):
+        fields = self._gather(np.array([index]))
+        fields = fields if self.element_type is not None else (fields,)
+        fields = [field[0].item() if field.ndim == 1 else field[0] for field in fields]
+        if self.element_type is None:
+            return fields[0]
+        return self.element_type(*fields)
+
+
+class ReservoirBuffer(ColumnBuffer):
+    ''' Allows uniform sampling over a stream of data.
+
+    Once the buffer is full, the n-th added element replaces a random element
+    with probability capacity / n, so that the buffer is always a uniform
+    sample of all the added elements. The replacements of a batch are drawn
+    at once.
+
+    See https://en.wikipedia.org/wiki/Reservoir_sampling for more details.
+    '''
+
+    def __init__(self, reservoir_buffer_capacity, packed_fields=()):
+        ''' Initialize the buffer.
+
+        Args:
+            reservoir_buffer_capacity (int): the maximum number of elements
+            packed_fields (list): the names of the binary fields that are
+              stored bit-packed, see ColumnBuffer
+        '''
+        super(ReservoirBuffer, self).__init__(reservoir_buffer_capacity, packed_fields)
+        self._add_calls = 0
+
+    def clear(self):
+        ''' Clear the buffer
+        '''
+        with self.lock:
+            self.size = 0
+            self._add_calls = 0
+
+    def _rows(self, num):
+        fill = min(num, self.capacity - self.size)
+        rows = self.size + np.arange(fill)
+        offsets = np.arange(fill)
+        self.size += fill
+        if fill < num:
+            # The element of the c-th call replaces a uniform index in [0, c]
+            calls = self._add_calls + np.arange(fill, num)
+            indexes = (np.random.uniform(size=num - fill) * (calls + 1)).astype(np.int64)
+            replaced = indexes < self.capacity
+            # The last element wins if several elements replace the same row
+            replaced_rows, last = np.unique(indexes[replaced][::-1], return_index=True)
+            rows = np.concatenate([rows, replaced_rows])
+            offsets = np.concatenate([offsets, np.arange(fill, num)[replaced][::-1][last]])
+        self._add_calls += num
+        return rows, offsets
+
+
+class FixedSizeRingBuffer(ColumnBuffer):
+    ''' ReplayBuffer of fixed size with a FIFO replacement policy.
+
+    Stored transitions can be sampled uniformly.
+
+    The underlying datastructure is a ring buffer, allowing O(1) adding and
+    sampling.
+    '''
+
+    def __init__(self, replay_buffer_capacity, packed_fields=()):
+        ''' Initialize the buffer
+
+        Args:
+            replay_buffer_capacity (int): the maximum number of elements
+            packed_fields (list): the names of the binary fields that are
+              stored bit-packed, see ColumnBuffer
+        '''
+        super(FixedSizeRingBuffer, self).__init__(replay_buffer_capacity, packed_fields)
+        self._next_entry_index = 0
+
+    def clear(self):
+        ''' Clear the buffer
+        '''
+        with self.lock:
+            self.size = 0
+            self._next_entry_index = 0
+
+    def _rows(self, num):
+        # Only the last capacity elements of a large batch are kept
+        offsets = np.arange(max(num - self.capacity, 0), num)
+        rows = (self._next_entry_index + np.arange(len(offsets))) % self.capacity
+        self._next_entry_index = (self._next_entry_index + len(offsets)) % self.capacity
+        self.size = min(self.size + len(offsets), self.capacity)
+        return rows, offsets
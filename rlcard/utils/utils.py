@@ -341,6 +341,20 @@ def set_global_seed(seed):
         import random
         random.seed(seed)
 
+def get_state_key(state):
+    ''' Get the key of the information set of a state for the tabular agents
+
+    Args:
+        state (dict): A state returned by the env
+
+    Returns:
+        (bytes): state['infoset_key'] if the env is made with `infoset_key=True`,
+          otherwise the bytes of the observation
+    '''
+    if 'infoset_key' in state:
+        return state['infoset_key']
+    return state['obs'].tobytes()
+
 def remove_illegal(action_probs, legal_actions):
     ''' Remove illegal actions and normalize the
         probability vector
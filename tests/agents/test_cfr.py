@@ -1,4 +1,6 @@
 import unittest
+import os
+import pickle
 import numpy as np
 
 import rlcard
@@ -19,6 +21,52 @@ class TestNFSP(unittest.TestCase):
 
         self.assertIn(action, [0, 2])
 
+    def test_train_with_chance_nodes(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True, 'chance_nodes': True,
+                                                  'infoset_key': True, 'suit_isomorphism': True})
+        agent = CFRAgent(env)
+        agent.train()
+        # All the deals are traversed in one iteration
+        self.assertEqual(len(agent.table), 288)
+        state, _ = env.sample_chance()
+        action, _ = agent.eval_step(state)
+        self.assertIn(action, state['legal_actions'])
+
+    def test_update_rules(self):
+        for update_rule in ['cfr+', 'linear', 'dcfr']:
+            env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+            agent = CFRAgent(env, update_rule=update_rule)
+            for _ in range(20):
+                agent.train()
+            for obs in agent.average_policy:
+                self.assertTrue((agent.average_policy[obs] >= 0).all())
+                np.testing.assert_allclose(agent.policy[obs].sum(), 1.0)
+            if update_rule == 'cfr+':
+                for obs in agent.regrets:
+                    self.assertTrue((agent.regrets[obs] >= 0).all())
+
+        with self.assertRaises(ValueError):
+            CFRAgent(env, update_rule='cfr++')
+
+    def test_pruning(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True, 'seed':0})
+        agent = CFRAgent(env, prune_threshold=-1.0, prune_warmup=20, explore_every=5)
+        for _ in range(20):
+            agent.train()
+        self.assertEqual(agent.pruned_subtrees, 0)
+        full_visited_nodes = agent.visited_nodes
+
+        for _ in range(4):
+            agent.train()
+        self.assertGreater(agent.pruned_subtrees, 0)
+        self.assertLess(agent.visited_nodes - full_visited_nodes, 4 * full_visited_nodes / 20)
+
+        # Every explore_every-th iteration traverses all the subtrees
+        pruned_subtrees = agent.pruned_subtrees
+        agent.train()
+        self.assertEqual(agent.iteration % 5, 0)
+        self.assertEqual(agent.pruned_subtrees, pruned_subtrees)
+
     def test_save_and_load(self):
         env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
         agent = CFRAgent(env)
@@ -35,3 +83,36 @@ class TestNFSP(unittest.TestCase):
         self.assertEqual(len(agent.regrets), len(new_agent.regrets))
         self.assertEqual(agent.iteration, new_agent.iteration)
 
+        eval_agent = CFRAgent(env)
+        eval_agent.load(eval_only=True)
+        self.assertEqual(len(agent.average_policy), len(eval_agent.average_policy))
+        self.assertEqual(agent.iteration, eval_agent.iteration)
+        for obs in agent.average_policy:
+            np.testing.assert_allclose(eval_agent.average_policy[obs], agent.average_policy[obs], rtol=1e-6)
+            state = {'obs': np.frombuffer(obs), 'legal_actions': [0, 1]}
+            np.testing.assert_allclose(eval_agent.eval_step(state)[1], agent.eval_step(state)[1], rtol=1e-5)
+        with self.assertRaises(ValueError):
+            eval_agent.train()
+        with self.assertRaises(ValueError):
+            eval_agent.save()
+
+    def test_load_dicts(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        agent = CFRAgent(env, model_path='./cfr_model')
+        for _ in range(10):
+            agent.train()
+        os.makedirs(agent.model_path, exist_ok=True)
+        for name in ['policy', 'average_policy', 'regrets']:
+            with open(os.path.join(agent.model_path, name + '.pkl'), 'wb') as f:
+                pickle.dump({obs: probs.copy() for obs, probs in getattr(agent, name).items()}, f)
+        with open(os.path.join(agent.model_path, 'iteration.pkl'), 'wb') as f:
+            pickle.dump(agent.iteration, f)
+        for name in ['infoset_table.pkl', 'cfr_checkpoint.bin']:
+            if os.path.exists(os.path.join(agent.model_path, name)):
+                os.remove(os.path.join(agent.model_path, name))
+
+        new_agent = CFRAgent(env, model_path='./cfr_model')
+        new_agent.load()
+        self.assertEqual(len(agent.regrets), len(new_agent.regrets))
+        for obs in agent.average_policy:
+            np.testing.assert_array_equal(agent.average_policy[obs], new_agent.average_policy[obs])
@@ -75,8 +75,8 @@ class TestUtilsMethos(unittest.TestCase):
         # Test add data
         for i in range(50):
             buf.add(i)
-        self.assertIn(49, buf._data)
-        self.assertNotIn(1, buf._data)
+        self.assertIn(49, list(buf))
+        self.assertNotIn(1, list(buf))
 
         # Test sample
         self.assertEqual(len(buf.sample(3)), 3)
@@ -65,3 +65,79 @@ class TestDQN(unittest.TestCase):
 
         sess.close()
         tf.reset_default_graph()
+
+    def test_train_prioritized(self):
+
+        sess = tf.InteractiveSession()
+        tf.Variable(0, name='global_step', trainable=False)
+        agent = DQNAgent(sess=sess,
+                         scope='dqn',
+                         replay_memory_size=200,
+                         replay_memory_init_size=100,
+                         update_target_estimator_every=100,
+                         state_shape=[2],
+                         mlp_layers=[10,10],
+                         prioritized_replay=True,
+                         mask_next_actions=True)
+        sess.run(tf.global_variables_initializer())
+
+        for _ in range(300):
+            ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]}, np.random.randint(2), np.random.randint(2), {'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]}, True]
+            agent.feed(ts)
+        self.assertEqual(agent.train_t, 201)
+        self.assertGreater(agent.memory.max_priority, 0)
+        self.assertTrue(agent.memory.legal_actions.all())
+
+        predicted_action = agent.step({'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]})
+        self.assertGreaterEqual(predicted_action, 0)
+        self.assertLessEqual(predicted_action, 1)
+
+        sess.close()
+        tf.reset_default_graph()
+
+    def test_train_prefetch(self):
+
+        sess = tf.InteractiveSession()
+        tf.Variable(0, name='global_step', trainable=False)
+        agent = DQNAgent(sess=sess,
+                         scope='dqn',
+                         replay_memory_size=200,
+                         replay_memory_init_size=100,
+                         update_target_estimator_every=100,
+                         state_shape=[2],
+                         mlp_layers=[10,10],
+                         prioritized_replay=True,
+                         prefetch_batches=2)
+        sess.run(tf.global_variables_initializer())
+
+        for _ in range(300):
+            ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]}, np.random.randint(2), np.random.randint(2), {'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]}, True]
+            agent.feed(ts)
+        self.assertEqual(agent.train_t, 201)
+        prefetcher = agent._prefetcher
+        agent.close()
+        self.assertFalse(prefetcher.thread.is_alive())
+
+        sess.close()
+        tf.reset_default_graph()
+
+    def test_batch_step(self):
+
+        sess = tf.InteractiveSession()
+        tf.Variable(0, name='global_step', trainable=False)
+        agent = DQNAgent(sess=sess,
+                         scope='dqn',
+                         state_shape=[2],
+                         mlp_layers=[10,10])
+        sess.run(tf.global_variables_initializer())
+
+        states = [{'obs': np.random.random_sample((2,)), 'legal_actions': [1]} for _ in range(5)]
+        actions, probs = agent.batch_eval_step(states)
+        self.assertEqual(actions, [1 for _ in range(5)])
+        self.assertEqual(len(probs), 5)
+
+        actions = agent.batch_step(states)
+        self.assertEqual(actions, [1 for _ in range(5)])
+
+        sess.close()
+        tf.reset_default_graph()
@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.mccfr_agent import MCCFRAgent
+from rlcard.utils.exploitability import exact_exploitability
+
+class TestMCCFR(unittest.TestCase):
+
+    def test_train(self):
+        for sampling in ['external', 'outcome']:
+            env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+            agent = MCCFRAgent(env, sampling=sampling)
+
+            for _ in range(100):
+                agent.train()
+
+            self.assertEqual(agent.iteration, 100)
+            self.assertGreater(agent.iterations_per_second, 0)
+            self.assertGreater(len(agent.average_policy), 0)
+            for obs in agent.policy:
+                np.testing.assert_allclose(agent.policy[obs].sum(), 1.0)
+
+            state = {'obs': np.array([1., 1., 0., 0., 0., 0.]), 'legal_actions': [0,2]}
+            action, _ = agent.eval_step(state)
+            self.assertIn(action, [0, 2])
+
+    def test_train_with_chance_nodes(self):
+        # Outcome sampling visits one trajectory per iteration, so it needs more
+        for sampling, iteration_num in [('external', 300), ('outcome', 3000)]:
+            np.random.seed(0)
+            env = rlcard.make('leduc-holdem', config={'seed':0, 'allow_step_back':True, 'chance_nodes':True})
+            agent = MCCFRAgent(env, sampling=sampling)
+            uniform = exact_exploitability(env, {})
+            for _ in range(iteration_num):
+                agent.train()
+
+            self.assertEqual(agent.iteration, iteration_num)
+            for obs in agent.policy:
+                np.testing.assert_allclose(agent.policy[obs].sum(), 1.0)
+            self.assertLess(exact_exploitability(env, agent.average_policy), uniform)
+
+    def test_pruning(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        agent = MCCFRAgent(env, prune_threshold=-0.5, prune_warmup=10)
+        for _ in range(100):
+            agent.train()
+        self.assertGreater(agent.visited_nodes, 0)
+        self.assertGreater(agent.pruned_subtrees, 0)
+
+    def test_explore_num(self):
+        env = rlcard.make('simple-doudizhu', config={'allow_step_back':True})
+        agent = MCCFRAgent(env, explore_num=1)
+        agent.train()
+        self.assertEqual(agent.iteration, 1)
+        self.assertGreater(len(agent.regrets), 0)
+
+    def test_outcome_sampling_limit_holdem(self):
+        env = rlcard.make('limit-holdem', config={'allow_step_back':True})
+        agent = MCCFRAgent(env, sampling='outcome')
+        for _ in range(10):
+            agent.train()
+        self.assertGreater(len(agent.regrets), 0)
+
+    def test_save_and_load(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        agent = MCCFRAgent(env, sampling='outcome')
+        for _ in range(10):
+            agent.train()
+        agent.save()
+
+        new_agent = MCCFRAgent(env, sampling='outcome')
+        new_agent.load()
+        self.assertEqual(len(agent.average_policy), len(new_agent.average_policy))
+        self.assertEqual(agent.iteration, new_agent.iteration)
+
+    def test_unknown_sampling(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        with self.assertRaises(ValueError):
+            MCCFRAgent(env, sampling='chance')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -60,6 +60,67 @@ class TestNFSP(unittest.TestCase):
         sess.close()
         tf.reset_default_graph()
 
+    def test_batch_step(self):
+
+        sess = tf.InteractiveSession()
+        tf.Variable(0, name='global_step', trainable=False)
+        agent = NFSPAgent(sess=sess,
+                         scope='nfsp',
+                         action_num=2,
+                         state_shape=[2],
+                         hidden_layers_sizes=[10,10],
+                         q_mlp_layers=[10,10])
+        sess.run(tf.global_variables_initializer())
+
+        states = [{'obs': np.random.random_sample((2,)), 'legal_actions': [1]} for _ in range(5)]
+        actions, probs = agent.batch_eval_step(states)
+        self.assertEqual(actions, [1 for _ in range(5)])
+        self.assertEqual(len(probs), 5)
+
+        for _ in range(10):
+            agent.sample_episode_policy()
+            actions = agent.batch_step(states)
+            self.assertEqual(actions, [1 for _ in range(5)])
+
+        sess.close()
+        tf.reset_default_graph()
+
+    def test_train_prefetch(self):
+
+        sess = tf.InteractiveSession()
+        tf.Variable(0, name='global_step', trainable=False)
+        agent = NFSPAgent(sess=sess,
+                         scope='nfsp',
+                         action_num=2,
+                         state_shape=[2],
+                         hidden_layers_sizes=[10,10],
+                         reservoir_buffer_capacity=50,
+                         batch_size=4,
+                         min_buffer_size_to_learn=20,
+                         q_replay_memory_size=50,
+                         q_replay_memory_init_size=20,
+                         q_batch_size=4,
+                         q_mlp_layers=[10,10],
+                         anticipatory_param=1.0,
+                         prefetch_batches=2)
+        sess.run(tf.global_variables_initializer())
+
+        for _ in range(200):
+            agent.sample_episode_policy()
+            agent.step({'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]})
+            ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]}, np.random.randint(2), 0, {'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]}, True]
+            agent.feed(ts)
+        self.assertIsNotNone(agent._prefetcher)
+        self.assertIsNotNone(agent._rl_agent._prefetcher)
+        prefetchers = [agent._prefetcher, agent._rl_agent._prefetcher]
+        agent.close()
+        for prefetcher in prefetchers:
+            self.assertFalse(prefetcher.thread.is_alive())
+        self.assertIsNone(agent._prefetcher)
+
+        sess.close()
+        tf.reset_default_graph()
+
     def test_reservoir_buffer(self):
         buff = ReservoirBuffer(10)
         for i in range(5):
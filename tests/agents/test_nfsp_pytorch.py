@@ -49,3 +49,52 @@ class TestNFSP(unittest.TestCase):
             agent.feed(ts)
         state_dict = agent.get_state_dict()
         self.assertIsInstance(state_dict, dict)
+
+    def test_train_prefetch(self):
+
+        agent = NFSPAgent(scope='nfsp',
+                         action_num=2,
+                         state_shape=[2],
+                         hidden_layers_sizes=[10,10],
+                         reservoir_buffer_capacity=50,
+                         batch_size=4,
+                         min_buffer_size_to_learn=20,
+                         q_replay_memory_size=50,
+                         q_replay_memory_init_size=20,
+                         q_batch_size=4,
+                         q_mlp_layers=[10,10],
+                         anticipatory_param=1.0,
+                         device=torch.device('cpu'),
+                         prefetch_batches=2)
+
+        for _ in range(200):
+            agent.sample_episode_policy()
+            agent.step({'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]})
+            ts = [{'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]}, np.random.randint(2), 0, {'obs': np.random.random_sample((2,)), 'legal_actions': [0, 1]}, True]
+            agent.feed(ts)
+        self.assertIsNotNone(agent._prefetcher)
+        self.assertIsNotNone(agent._rl_agent._prefetcher)
+        prefetchers = [agent._prefetcher, agent._rl_agent._prefetcher]
+        agent.close()
+        for prefetcher in prefetchers:
+            self.assertFalse(prefetcher.thread.is_alive())
+        self.assertIsNone(agent._prefetcher)
+
+    def test_batch_step(self):
+
+        agent = NFSPAgent(scope='nfsp',
+                         action_num=2,
+                         state_shape=[2],
+                         hidden_layers_sizes=[10,10],
+                         q_mlp_layers=[10,10],
+                         device=torch.device('cpu'))
+
+        states = [{'obs': np.random.random_sample((2,)), 'legal_actions': [1]} for _ in range(5)]
+        actions, probs = agent.batch_eval_step(states)
+        self.assertEqual(actions, [1 for _ in range(5)])
+        self.assertEqual(len(probs), 5)
+
+        for _ in range(10):
+            agent.sample_episode_policy()
+            actions = agent.batch_step(states)
+            self.assertEqual(actions, [1 for _ in range(5)])
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.cfr_agent import CFRAgent
+from rlcard.agents.parallel_cfr_trainer import ParallelCFRTrainer
+
+class TestParallelCFRTrainer(unittest.TestCase):
+
+    def test_single_process_is_cfr(self):
+        for update_rule in ['vanilla', 'dcfr']:
+            agent = CFRAgent(rlcard.make('leduc-holdem', config={'allow_step_back':True, 'seed':0}), update_rule=update_rule)
+            parallel_agent = CFRAgent(rlcard.make('leduc-holdem', config={'allow_step_back':True, 'seed':0}), update_rule=update_rule)
+            trainer = ParallelCFRTrainer(parallel_agent, 1, seed=0)
+            for _ in range(10):
+                agent.train()
+                trainer.train()
+            trainer.close()
+
+            self.assertEqual(agent.iteration, parallel_agent.iteration)
+            self.assertEqual(len(agent.regrets), len(parallel_agent.regrets))
+            for obs in agent.regrets:
+                np.testing.assert_allclose(agent.regrets[obs], parallel_agent.regrets[obs])
+                np.testing.assert_allclose(agent.average_policy[obs], parallel_agent.average_policy[obs])
+                np.testing.assert_allclose(agent.policy[obs], parallel_agent.policy[obs])
+
+    def test_infoset_key(self):
+        config = {'allow_step_back':True, 'seed':0, 'infoset_key':True}
+        agent = CFRAgent(rlcard.make('leduc-holdem', config=config))
+        parallel_agent = CFRAgent(rlcard.make('leduc-holdem', config=config))
+        trainer = ParallelCFRTrainer(parallel_agent, 1, seed=0)
+        for _ in range(3):
+            agent.train()
+            trainer.train()
+        trainer.close()
+
+        # The workers use the infoset keys of the env of the agent
+        self.assertEqual(set(parallel_agent.table.keys), set(agent.table.keys))
+        for obs in agent.regrets:
+            np.testing.assert_allclose(agent.regrets[obs], parallel_agent.regrets[obs])
+
+    def test_train(self):
+        agent = CFRAgent(rlcard.make('leduc-holdem', config={'allow_step_back':True}), update_rule='cfr+')
+        trainer = ParallelCFRTrainer(agent, 2, sync_every=3)
+        for _ in range(3):
+            trainer.train()
+        trainer.close()
+
+        self.assertEqual(agent.iteration, 18)
+        self.assertEqual(trainer.iterations, 18)
+        self.assertGreater(agent.visited_nodes, 0)
+        self.assertGreater(trainer.iterations_per_second, 0)
+        self.assertEqual(len(set(agent.table.keys)), len(agent.table))
+        for obs in agent.regrets:
+            self.assertTrue((agent.regrets[obs] >= 0).all())
+            np.testing.assert_allclose(agent.policy[obs].sum(), 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.envs import BatchedEnv
+from rlcard.agents import RandomAgent
+
+class TestBatchedEnv(unittest.TestCase):
+
+    def test_make(self):
+        env = rlcard.make('leduc-holdem', config={'env_num': 4, 'batched': True})
+        self.assertIsInstance(env, BatchedEnv)
+
+    def test_reset_and_step(self):
+        env = rlcard.make('leduc-holdem', config={'env_num': 4, 'batched': True, 'seed': 0})
+        obs, legal_actions_mask, player_ids = env.reset()
+        self.assertEqual(obs.shape, (4, 36))
+        self.assertEqual(legal_actions_mask.shape, (4, env.action_num))
+        self.assertEqual(player_ids.shape, (4,))
+        finished = 0
+        for _ in range(100):
+            actions = [np.random.choice(np.flatnonzero(mask)) for mask in legal_actions_mask]
+            obs, legal_actions_mask, player_ids, rewards, dones = env.step(actions)
+            self.assertEqual(rewards.shape, (4, env.player_num))
+            for i in range(4):
+                if dones[i]:
+                    finished += 1
+                    self.assertEqual(np.sum(rewards[i]), 0)
+                else:
+                    self.assertTrue(np.all(rewards[i] == 0))
+            self.assertTrue(np.all(legal_actions_mask.sum(axis=1) > 0))
+        self.assertGreater(finished, 0)
+        self.assertEqual(env.timestep, 400)
+
+    def test_multi_dimensional_state(self):
+        env = rlcard.make('doudizhu', config={'env_num': 2, 'batched': True})
+        obs, legal_actions_mask, _ = env.reset()
+        self.assertEqual(obs.shape, (2, 6, 5, 15))
+        obs, _, _, _, _ = env.step([np.flatnonzero(mask)[0] for mask in legal_actions_mask])
+        self.assertEqual(obs.shape, (2, 6, 5, 15))
+
+    def test_run(self):
+        env = rlcard.make('limit-holdem', config={'env_num': 4, 'batched': True})
+        env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
+        trajectories, payoffs = env.run(is_training=False)
+        self.assertEqual(len(payoffs), 4)
+        self.assertEqual(len(trajectories), env.player_num)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+
+import rlcard
+
+ENV_IDS = ['blackjack', 'leduc-holdem', 'limit-holdem', 'no-limit-holdem', 'uno',
+           'mahjong', 'doudizhu', 'simple-doudizhu', 'gin-rummy']
+
+
+def get_observation(env):
+    player_id = env.get_player_id()
+    state = env.get_state(player_id)
+    return player_id, state['obs'].tolist(), sorted(state['legal_actions']), env.is_over()
+
+
+def play_to_end(env):
+    while not env.is_over():
+        state = env.get_state(env.get_player_id())
+        env.step(np.random.choice(state['legal_actions']))
+
+
+class TestEnvClone(unittest.TestCase):
+
+    def test_clone(self):
+        for env_id in ENV_IDS:
+            env = rlcard.make(env_id, config={'seed': 0})
+            env.reset()
+            observation = get_observation(env)
+            clone = env.clone()
+            self.assertIsNot(clone.game, env.game)
+            self.assertEqual(get_observation(clone), observation)
+            play_to_end(clone)
+            self.assertEqual(get_observation(env), observation)
+            play_to_end(env)
+
+    def test_snapshot_and_restore(self):
+        for env_id in ENV_IDS:
+            env = rlcard.make(env_id, config={'seed': 0})
+            env.reset()
+            observation = get_observation(env)
+            snapshot = env.game.snapshot()
+            for _ in range(3):
+                play_to_end(env)
+                env.game.restore(snapshot)
+                self.assertEqual(get_observation(env), observation)
+
+    def test_restore_with_step_back(self):
+        env = rlcard.make('limit-holdem', config={'seed': 0, 'allow_step_back': True})
+        state, _ = env.reset()
+        env.step(state['legal_actions'][0])
+        observation = get_observation(env)
+        snapshot = env.game.snapshot()
+        env.step_back()
+        env.game.restore(snapshot)
+        self.assertEqual(get_observation(env), observation)
+        self.assertFalse(env.step_back())
+        if not env.is_over():
+            state = env.get_state(env.get_player_id())
+            env.step(state['legal_actions'][0])
+            env.step_back()
+            self.assertEqual(get_observation(env), observation)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.cfr_agent import CFRAgent
+
+ENV_IDS = ['blackjack', 'leduc-holdem', 'limit-holdem', 'no-limit-holdem', 'uno',
+           'mahjong', 'doudizhu', 'simple-doudizhu', 'gin-rummy']
+
+
+class TestInfosetKey(unittest.TestCase):
+
+    def test_state_key(self):
+        for env_id in ENV_IDS:
+            env = rlcard.make(env_id, config={'seed': 0, 'infoset_key': True})
+            state, player_id = env.reset()
+            self.assertIsInstance(state['infoset_key'], bytes)
+            self.assertEqual(state['infoset_key'], env.get_infoset_key(player_id))
+            self.assertLessEqual(len(state['infoset_key']), len(state['obs'].tostring()))
+            state, player_id = env.step(state['legal_actions'][0])
+            self.assertEqual(state['infoset_key'], env.get_infoset_key(player_id))
+
+            env = rlcard.make(env_id, config={'seed': 0})
+            state, _ = env.reset()
+            self.assertNotIn('infoset_key', state)
+
+    def test_holdem_key(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0, 'allow_step_back': True, 'infoset_key': True})
+        env.reset()
+        hand = env.game.players[0].hand.get_index().encode()
+        self.assertEqual(env.get_infoset_key(0), hand + b':')
+        env.step(env.actions.index('raise'))
+        env.step(env.actions.index('call'))
+        public_card = env.game.public_card.get_index().encode()
+        self.assertEqual(env.get_infoset_key(0), hand + public_card + b':rc/')
+        env.step_back()
+        self.assertEqual(env.get_infoset_key(0), hand + b':r')
+        snapshot = env.game.snapshot()
+        env.step(env.actions.index('fold'))
+        self.assertEqual(env.get_infoset_key(0), hand + b':rf')
+        env.game.restore(snapshot)
+        self.assertEqual(env.get_infoset_key(0), hand + b':r')
+
+        for env_id in ['limit-holdem', 'no-limit-holdem']:
+            env = rlcard.make(env_id, config={'seed': 0, 'allow_step_back': True, 'infoset_key': True})
+            state, player_id = env.reset()
+            key = env.get_infoset_key(player_id)
+            # The players see different hands
+            self.assertNotEqual(env.get_infoset_key(1 - player_id)[:4], key[:4])
+            while not env.is_over():
+                env.step(state['legal_actions'][0])
+                state = env.get_state(env.get_player_id())
+            while env.step_back():
+                pass
+            self.assertEqual(env.get_infoset_key(player_id), key)
+
+            # The order in which the cards are dealt does not matter
+            hand = env.game.players[player_id].hand
+            hand.reverse()
+            self.assertEqual(env.get_infoset_key(player_id), key)
+            hand.reverse()
+
+    def test_suit_isomorphism(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0, 'infoset_key': True, 'suit_isomorphism': True})
+        env.reset()
+        self.assertEqual(env.get_infoset_key(0), env.game.players[0].hand.rank.encode() + b':')
+
+        env = rlcard.make('limit-holdem', config={'seed': 0, 'infoset_key': True, 'suit_isomorphism': True})
+        _, player_id = env.reset()
+        key = env.get_infoset_key(player_id)
+        self.assertEqual(key[:1], b'S')
+        for card in env.game.players[player_id].hand:
+            card.suit = {'S': 'C', 'H': 'S', 'D': 'H', 'C': 'D'}[card.suit]
+        self.assertEqual(env.get_infoset_key(player_id), key)
+
+        for env_id in ['no-limit-holdem', 'blackjack', 'uno']:
+            with self.assertRaises(ValueError):
+                rlcard.make(env_id, config={'suit_isomorphism': True})
+
+    def test_cfr_with_infoset_key(self):
+        env = rlcard.make('leduc-holdem', config={'seed': 0, 'allow_step_back': True, 'infoset_key': True})
+        agent = CFRAgent(env)
+        agent.train()
+        for key in agent.table.keys:
+            self.assertIn(b':', key)
+        state, _ = env.reset()
+        action, probs = agent.eval_step(state)
+        self.assertIn(action, state['legal_actions'])
+
+if __name__ == '__main__':
+    unittest.main()
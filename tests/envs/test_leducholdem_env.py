@@ -63,6 +63,44 @@ class TestLeducholdemEnv(unittest.TestCase):
             total += payoff
         self.assertEqual(total, 0)
 
+    def test_chance_nodes(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back': True, 'chance_nodes': True})
+        self.assertEqual(env.reset(), (None, -1))
+        self.assertTrue(env.is_chance_node())
+        self.assertEqual(env.get_chance_outcomes(), [(0, 0.5), (1, 0.5)])
+        self.assertEqual(env.step_chance(1), (None, -1))
+        outcomes = env.get_chance_outcomes()
+        self.assertEqual(len(outcomes), 6)
+        self.assertAlmostEqual(sum(prob for _, prob in outcomes), 1)
+        env.step_chance('SK')
+        self.assertEqual(len(env.get_chance_outcomes()), 5)
+        env.step_back()
+        self.assertEqual(env.get_chance_outcomes(), outcomes)
+        env.step_chance('SK')
+        state, player_id = env.step_chance('HK')
+        self.assertEqual(player_id, 1)
+        self.assertFalse(env.is_chance_node())
+        self.assertEqual(env.game.players[0].hand.get_index(), 'SK')
+        self.assertEqual(env.game.players[1].hand.get_index(), 'HK')
+        self.assertEqual(state['obs'][2], 1)
+
+        # The public card is dealt at a chance node after the first round
+        env.step(env.actions.index('call'))
+        self.assertEqual(env.step(env.actions.index('check')), (None, -1))
+        self.assertEqual(sorted(outcome for outcome, _ in env.get_chance_outcomes()), ['HJ', 'HQ', 'SJ', 'SQ'])
+        state, _ = env.step_chance('HQ')
+        self.assertEqual(env.game.public_card.get_index(), 'HQ')
+        self.assertEqual(env.step_back(), (None, -1))
+        self.assertIsNone(env.game.public_card)
+
+        agents = [RandomAgent(env.action_num) for _ in range(env.player_num)]
+        env.set_agents(agents)
+        _, payoffs = env.run(is_training=False)
+        self.assertEqual(sum(payoffs), 0)
+
+        with self.assertRaises(ValueError):
+            rlcard.make('limit-holdem', config={'chance_nodes': True})
+
     def test_single_agent_mode(self):
         env = rlcard.make('leduc-holdem', config={'single_agent_mode':True})
         with self.assertRaises(ValueError):
@@ -14,6 +14,19 @@ class TestLimitholdemEnv(unittest.TestCase):
         for action in state['legal_actions']:
             self.assertLess(action, env.action_num)
 
+    def test_suit_isomorphism(self):
+        env = rlcard.make('limit-holdem', config={'seed': 0, 'suit_isomorphism': True})
+        state, player_id = env.reset()
+        self.assertEqual(state['obs'][:52].sum(), 2)
+        # The first card of the hand is always a spade
+        self.assertGreater(state['obs'][:13].sum(), 0)
+        # The hands that only differ by the suits have the same observation
+        hand = env.game.players[player_id].hand
+        suit_map = {'S': 'H', 'H': 'D', 'D': 'C', 'C': 'S'}
+        for card in hand:
+            card.suit = suit_map[card.suit]
+        self.assertEqual(env.get_state(player_id)['obs'].tolist(), state['obs'].tolist())
+
     def test_is_deterministic(self):
         self.assertTrue(is_deterministic('limit-holdem'))
 
@@ -24,6 +24,9 @@ class TestRegistration(unittest.TestCase):
         register(env_id='test_env', entry_point='rlcard.envs.blackjack:BlackjackEnv')
         with self.assertRaises(ValueError):
             make('test_env', config={'active_player':-1})
+        for batched in [False, True]:
+            with self.assertRaises(ValueError):
+                make('leduc-holdem', config={'chance_nodes':True, 'env_num':2, 'batched':batched})
 
 if __name__ == '__main__':
     unittest.main()
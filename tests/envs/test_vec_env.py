@@ -1,4 +1,6 @@
+import sys
 import unittest
+from unittest import mock
 import numpy as np
 
 import rlcard
@@ -14,5 +16,95 @@ class TestVecEnv(unittest.TestCase):
         self.assertEqual(len(payoffs), 4)
         trajectories, payoffs = env.run(is_training=True)
 
+    def test_vec_env_batch_step(self):
+        class PlainAgent(object):
+            use_raw = False
+            def step(self, state):
+                return state['legal_actions'][0]
+            def eval_step(self, state):
+                return state['legal_actions'][0], None
+
+        env = rlcard.make('leduc-holdem', config={'env_num': 3})
+        env.set_agents([RandomAgent(env.action_num), PlainAgent()])
+        states = [{'obs': np.zeros(36), 'legal_actions': [1, 2]} for _ in range(3)]
+        actions = env._agents_step(states, [0, 1, 0], is_training=False)
+        self.assertEqual(len(actions), 3)
+        self.assertEqual(actions[1], 1)
+        self.assertIn(actions[0], [1, 2])
+        actions = env._agents_step(states, [1, 1, 0], is_training=True)
+        self.assertEqual(actions[:2], [1, 1])
+        trajectories, payoffs = env.run(is_training=True)
+        self.assertEqual(len(payoffs), 3)
+
+    def test_vec_env_async(self):
+        env = rlcard.make('leduc-holdem', config={'env_num': 2, 'seed': 0})
+        with self.assertRaises(ValueError):
+            env.step_async([0, 0])
+        states, player_ids = env.reset()
+        self.assertEqual(len(states), 2)
+        finished = 0
+        for _ in range(50):
+            actions = [np.random.choice(state['legal_actions']) for state in states]
+            env.step_async(actions)
+            states, player_ids, dones, trajectories, payoffs = env.step_wait()
+            for i in range(2):
+                if dones[i]:
+                    finished += 1
+                    self.assertEqual(len(trajectories[i]), env.player_num)
+                    self.assertEqual(np.sum(payoffs[i]), 0)
+                else:
+                    self.assertIsNone(trajectories[i])
+        self.assertGreater(finished, 0)
+
+        env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
+        trajectories, payoffs = env.rollout(5, is_training=True)
+        self.assertGreaterEqual(len(payoffs), 5)
+        for transition in trajectories[0]:
+            self.assertEqual(len(transition), 5)
+        env.close()
+
+    @unittest.skipIf(sys.version_info < (3, 8), 'shared_memory requires Python 3.8')
+    def test_vec_env_shared_memory(self):
+        env = rlcard.make('leduc-holdem', config={'env_num': 2, 'shared_memory': True, 'seed': 0})
+        env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
+        trajectories, payoffs = env.run(is_training=False)
+        self.assertEqual(len(payoffs), 2)
+        for payoff in payoffs:
+            self.assertEqual(np.sum(payoff), 0)
+        for player_trajectories in trajectories:
+            for transition in player_trajectories:
+                self.assertEqual(transition[0]['obs'].shape, (36,))
+                self.assertGreater(len(transition[0]['legal_actions']), 0)
+        env.close()
+
+    @unittest.skipIf(sys.version_info < (3, 8), 'shared_memory requires Python 3.8')
+    def test_vec_env_shared_memory_dtype(self):
+        env = rlcard.make('uno', config={'env_num': 2, 'shared_memory': True, 'seed': 0})
+        obs_dtype = rlcard.make('uno').reset()[0]['obs'].dtype
+        states, _ = env.reset()
+        self.assertEqual(env.buffers.obs.dtype, obs_dtype)
+        # The second reset reads the observations from shared memory
+        states, _ = env.reset()
+        self.assertEqual(states[0]['obs'].dtype, obs_dtype)
+        env.close()
+
+    def test_vec_env_shared_memory_python_version(self):
+        with mock.patch.object(sys, 'version_info', (3, 7, 0)):
+            with self.assertRaises(ValueError):
+                rlcard.make('leduc-holdem', config={'env_num': 2, 'shared_memory': True})
+
+    @unittest.skipIf(sys.version_info < (3, 8), 'shared_memory requires Python 3.8')
+    def test_vec_env_process_num(self):
+        env = rlcard.make('leduc-holdem', config={'env_num': 5, 'process_num': 2, 'shared_memory': True, 'seed': 0})
+        self.assertEqual(len(env.ps), 2)
+        env.set_agents([RandomAgent(env.action_num) for _ in range(env.player_num)])
+        trajectories, payoffs = env.run(is_training=False)
+        self.assertEqual(len(payoffs), 5)
+        states, player_ids = env.reset()
+        self.assertEqual(len(states), 5)
+        trajectories, payoffs = env.rollout(10, is_training=True)
+        self.assertGreaterEqual(len(payoffs), 10)
+        env.close()
+
 if __name__ == '__main__':
     unittest.main()
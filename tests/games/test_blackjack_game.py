@@ -62,6 +62,24 @@ class TestBlackjackGame(unittest.TestCase):
         success = game.step_back()
         self.assertEqual(success, False)
 
+
+    def test_step_back_whole_game(self):
+        game = Game(allow_step_back=True)
+        game.configure({'game_player_num': 2})
+        game.init_game()
+        def snapshot():
+            return (game.game_pointer, dict(game.winner), [str(c) for c in game.dealer.deck],
+                    [str(c) for c in game.dealer.hand], game.dealer.status, game.dealer.score,
+                    [([str(c) for c in p.hand], p.status, p.score) for p in game.players])
+        snapshots = []
+        while not game.is_over():
+            snapshots.append(snapshot())
+            game.step(np.random.choice(['hit', 'stand']))
+        while snapshots:
+            self.assertTrue(game.step_back())
+            self.assertEqual(snapshot(), snapshots.pop())
+        self.assertEqual(game.step_back(), False)
+
     def test_get_state(self):
         game = Game()
         game.configure(DEFAULT_GAME_CONFIG)
@@ -79,6 +79,43 @@ class TestGinRummyGame(unittest.TestCase):
             _, _ = game.step(action)
         self.assertEqual(game.actions[-1].action_id, score_player_1_action_id)
 
+    def test_step_back(self):
+        game = Game(allow_step_back=True)
+        game.init_game()
+        self.assertFalse(game.step_back())
+
+        def snapshot():
+            result = [game.round.current_player_id, game.round.going_out_player_id, game.round.is_over,
+                      len(game.round.move_sheet), [action.action_id for action in game.actions],
+                      [str(card) for card in game.round.dealer.stock_pile],
+                      [str(card) for card in game.round.dealer.discard_pile]]
+            for player in game.round.players:
+                result.append([str(card) for card in player.hand])
+                result.append([str(card) for card in player.known_cards])
+                result.append([[str(card) for card in meld] for melds in player.meld_kinds_by_rank_id for meld in melds])
+                result.append([[str(card) for card in meld] for melds in player.meld_run_by_suit_id for meld in melds])
+            if not game.is_over():
+                result.append([action.action_id for action in game.judge.get_legal_actions()])
+            return result
+
+        snapshots = []
+        while not game.is_over():
+            snapshots.append(snapshot())
+            legal_actions = game.judge.get_legal_actions()
+            game.step(np.random.choice(legal_actions))
+        while snapshots:
+            self.assertTrue(game.step_back())
+            self.assertEqual(snapshot(), snapshots.pop())
+        self.assertFalse(game.step_back())
+
+        # Nothing is recorded for stepping back if it is not allowed
+        game = Game()
+        game.init_game()
+        for _ in range(4):
+            game.step(np.random.choice(game.judge.get_legal_actions()))
+        self.assertEqual(game.round.undo_sheet, [])
+        self.assertFalse(game.step_back())
+
     def test_get_state(self):
         game = Game()
         state, _ = game.init_game()
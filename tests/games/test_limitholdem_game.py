@@ -100,6 +100,25 @@ class TestLimitholdemMethods(unittest.TestCase):
             action = np.random.choice(legal_actions)
             game.step(action)
 
+
+    def test_step_back_whole_game(self):
+        game = Game(allow_step_back=True)
+        game.init_game()
+        def snapshot():
+            return (game.game_pointer, game.round_counter, list(game.history_raise_nums),
+                    [str(c) for c in game.dealer.deck], [str(c) for c in game.public_cards],
+                    [(p.in_chips, p.status) for p in game.players],
+                    list(game.round.raised), game.round.have_raised, game.round.not_raise_num, game.round.raise_amount)
+        snapshots = []
+        while not game.is_over():
+            snapshots.append(snapshot())
+            game.step(np.random.choice(game.get_legal_actions()))
+        while snapshots:
+            self.assertTrue(game.step_back())
+            self.assertEqual(snapshot(), snapshots.pop())
+        self.assertEqual(len(game.history), 0)
+        self.assertEqual(game.step_back(), False)
+
     def test_payoffs(self):
         game = Game()
         np.random.seed(0)
@@ -68,6 +68,24 @@ class TestMahjongMethods(unittest.TestCase):
         success = game.step_back()
         self.assertEqual(success, False)
 
+
+    def test_step_back_whole_game(self):
+        game = Game(allow_step_back=True)
+        game.init_game()
+        def snapshot():
+            return (game.round.current_player, game.round.last_player, game.round.valid_act,
+                    [c.get_str() for c in game.dealer.deck], [c.get_str() for c in game.dealer.table],
+                    [([c.get_str() for c in p.hand], [[c.get_str() for c in s] for s in p.pile]) for p in game.players])
+        snapshots = []
+        while not game.is_over():
+            snapshots.append(snapshot())
+            legal_actions = game.get_legal_actions(game.get_state(game.round.current_player))
+            game.step(legal_actions[np.random.randint(len(legal_actions))])
+        while snapshots:
+            self.assertTrue(game.step_back())
+            self.assertEqual(snapshot(), snapshots.pop())
+        self.assertEqual(game.step_back(), False)
+
     def test_player_get_player_id(self):
         player = Player(0, np.random.RandomState())
         self.assertEqual(0, player.get_player_id())
@@ -96,6 +96,25 @@ class TestNolimitholdemMethods(unittest.TestCase):
 
         self.assertEqual(Stage.RIVER, game.stage)
 
+
+    def test_step_back_whole_game(self):
+        game = Game(allow_step_back=True, num_players=3)
+        game.init_game()
+        def snapshot():
+            return (game.game_pointer, game.round_counter, game.stage,
+                    [str(c) for c in game.dealer.deck], [str(c) for c in game.public_cards],
+                    [(p.in_chips, p.remained_chips, p.status) for p in game.players],
+                    list(game.round.raised), game.round.not_raise_num, game.round.not_playing_num)
+        snapshots = []
+        while not game.is_over():
+            snapshots.append(snapshot())
+            legal_actions = game.get_legal_actions()
+            game.step(legal_actions[np.random.randint(len(legal_actions))])
+        while snapshots:
+            self.assertTrue(game.step_back())
+            self.assertEqual(snapshot(), snapshots.pop())
+        self.assertEqual(game.step_back(), False)
+
     def test_auto_step(self):
         game = Game()
 
@@ -73,6 +73,23 @@ class TestUnoMethods(unittest.TestCase):
         success = game.step_back()
         self.assertEqual(success, False)
 
+
+    def test_step_back_whole_game(self):
+        game = Game(allow_step_back=True)
+        game.init_game()
+        def snapshot():
+            return (game.round.current_player, game.round.direction, game.round.target.str, game.round.is_over,
+                    [card.str for card in game.dealer.deck], [card.str for card in game.round.played_cards],
+                    [[card.str for card in player.hand] for player in game.players])
+        snapshots = []
+        while not game.is_over():
+            snapshots.append(snapshot())
+            game.step(np.random.choice(game.get_legal_actions()))
+        while snapshots:
+            self.assertTrue(game.step_back())
+            self.assertEqual(snapshot(), snapshots.pop())
+        self.assertEqual(game.step_back(), False)
+
     def test_hand2dict(self):
         hand_1 = ['y-1', 'r-8', 'b-9', 'y-reverse', 'r-skip']
         hand1_dict = hand2dict(hand_1)
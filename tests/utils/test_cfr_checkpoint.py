@@ -0,0 +1,74 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from rlcard.utils.infoset_table import InfosetTable
+from rlcard.utils.cfr_checkpoint import save_checkpoint, CFRCheckpoint
+
+class TestCFRCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cfr_checkpoint.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_and_load(self):
+        table = InfosetTable(3, capacity=2)
+        keys = [b'\x02\x00', b'\x01', b'\x01\x00\x00', b'\x00']
+        for i, key in enumerate(keys):
+            infoset_id = table.get_id(key)
+            table.regrets[infoset_id] = [i, -i, 0.5]
+            table.strategy_sums[infoset_id] = [1, 2, i]
+        save_checkpoint(self.path, table, 7)
+
+        checkpoint = CFRCheckpoint(self.path)
+        self.assertEqual(checkpoint.iteration, 7)
+        self.assertEqual(len(checkpoint), 4)
+        self.assertIsInstance(checkpoint.strategy_sums, np.memmap)
+        self.assertEqual(checkpoint.strategy_sums.dtype, np.float32)
+        self.assertEqual([checkpoint.key(i) for i in range(4)], sorted(keys))
+        self.assertEqual(checkpoint.find(b'\x01\x00'), -1)
+
+        view = checkpoint.view('strategy_sums')
+        self.assertEqual(set(view), set(keys))
+        for key in keys:
+            np.testing.assert_array_equal(view[key], table.strategy_sums[table.find(key)])
+        with self.assertRaises(KeyError):
+            view[b'\x03']
+
+        new_table = checkpoint.to_table()
+        self.assertEqual(len(new_table), 4)
+        for key in keys:
+            np.testing.assert_array_equal(new_table.regrets[new_table.find(key)], table.regrets[table.find(key)])
+        table.update_policy()
+        for key in keys:
+            np.testing.assert_allclose(new_table.policy[new_table.find(key)], table.policy[table.find(key)])
+
+    def test_str_keys(self):
+        table = InfosetTable(2)
+        for key in ['b', 'a', 'c']:
+            table.strategy_sums[table.get_id(key)] = [1, 0]
+        save_checkpoint(self.path, table, 1)
+        checkpoint = CFRCheckpoint(self.path)
+        self.assertEqual(list(checkpoint.view('strategy_sums')), ['a', 'b', 'c'])
+        self.assertEqual(checkpoint.to_table().keys, ['a', 'b', 'c'])
+
+    def test_empty(self):
+        save_checkpoint(self.path, InfosetTable(2), 0)
+        checkpoint = CFRCheckpoint(self.path)
+        self.assertEqual(len(checkpoint), 0)
+        self.assertEqual(checkpoint.find(b'a'), -1)
+        self.assertEqual(len(checkpoint.to_table()), 0)
+
+    def test_not_a_checkpoint(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\x80\x04')
+        with self.assertRaises(ValueError):
+            CFRCheckpoint(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
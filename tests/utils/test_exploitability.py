@@ -0,0 +1,77 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+
+import rlcard
+from rlcard.agents.cfr_agent import CFRAgent
+from rlcard.utils.game_tree import compile_game_tree, DECISION
+from rlcard.utils.exploitability import tabular_policy, best_response, nash_conv, exact_exploitability
+
+class TestExactExploitability(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        cls.tree = compile_game_tree(cls.env)
+
+    def test_best_response(self):
+        tree = self.tree
+        policy = np.ones((tree.infoset_num, tree.action_num))
+        on_policy_values = tree.expected_payoffs(policy)
+        for player_id in range(tree.player_num):
+            value, best_actions = best_response(tree, policy, player_id)
+            self.assertGreater(value, on_policy_values[player_id])
+
+            # Playing the best actions against the policy reproduces the value
+            responder = (tree.node_types == DECISION) & (tree.players == player_id)
+            self.assertTrue((best_actions[responder] >= 0).all())
+            self.assertTrue((best_actions[~responder] == -1).all())
+            parents = tree.edge_parents
+            weights = tree.edge_probs(policy)
+            weights[responder[parents]] = tree.actions[responder[parents]] == best_actions[parents[responder[parents]]]
+            values = tree.payoffs[:, player_id].copy()
+            for edges in reversed(tree.edges_by_depth()):
+                np.add.at(values, parents[edges], weights[edges] * values[tree.children[edges]])
+            self.assertAlmostEqual(values[0], value)
+
+    def test_history_ids(self):
+        tree = self.tree
+        histories = tree.history_ids()
+        self.assertEqual(histories[0], 0)
+        # The chance nodes of the deal do not change the history
+        self.assertTrue((histories[tree.children[:tree.child_offsets[1]]] == 0).all())
+        # The nodes of one information set with the same history have the same depth
+        decision = tree.node_types == DECISION
+        pairs = {}
+        for node in np.nonzero(decision)[0]:
+            depth = pairs.setdefault((tree.infoset_ids[node], histories[node]), tree.depths[node])
+            self.assertEqual(depth, tree.depths[node])
+
+    def test_exploitability_of_cfr(self):
+        agent = CFRAgent(rlcard.make('leduc-holdem', config={'allow_step_back':True, 'seed':0}), update_rule='dcfr')
+        uniform = exact_exploitability(self.env, {})
+        self.assertAlmostEqual(uniform, nash_conv(self.tree, np.ones((self.tree.infoset_num, self.tree.action_num))) / 2)
+        for _ in range(100):
+            agent.train()
+        exploitability = exact_exploitability(self.env, agent.average_policy)
+        self.assertLess(exploitability, uniform)
+        self.assertGreater(exploitability, 0)
+        self.assertEqual(exploitability, exact_exploitability(self.env, agent.average_policy))
+
+        policy = tabular_policy(self.tree, agent.average_policy)
+        self.assertEqual(policy.shape, (self.tree.infoset_num, self.tree.action_num))
+
+    def test_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            cache_path = os.path.join(cache_dir, 'leduc_holdem_tree.pkl')
+            exploitability = exact_exploitability(self.env, {}, cache_path=cache_path)
+            self.assertTrue(os.path.exists(cache_path))
+            self.assertEqual(exact_exploitability(self.env, {}, cache_path=cache_path), exploitability)
+        finally:
+            shutil.rmtree(cache_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+
+import rlcard
+from rlcard.utils.game_tree import compile_game_tree, CHANCE, DECISION, TERMINAL
+
+class TestGameTree(unittest.TestCase):
+
+    def test_compile_leduc_holdem(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        tree = compile_game_tree(env)
+
+        self.assertEqual(tree.node_types[0], CHANCE)
+        np.testing.assert_allclose(tree.chance_probs[:tree.child_offsets[1]].sum(), 1.0)
+        self.assertEqual(len(tree.children), tree.node_num - 1)
+        self.assertTrue((tree.children > tree.edge_parents).all())
+
+        terminal = tree.node_types == TERMINAL
+        decision = tree.node_types == DECISION
+        self.assertTrue((np.diff(tree.child_offsets)[terminal] == 0).all())
+        np.testing.assert_allclose(tree.payoffs[terminal].sum(axis=1), 0)
+        self.assertTrue((tree.infoset_ids[decision] >= 0).all())
+        self.assertTrue((tree.players[decision] == tree.infoset_players[tree.infoset_ids[decision]]).all())
+
+        # Leduc Hold'em is symmetric, so the uniform policy has zero value
+        policy = np.ones((tree.infoset_num, env.action_num))
+        np.testing.assert_allclose(tree.expected_payoffs(policy), [0, 0], atol=1e-9)
+
+    def test_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            cache_path = os.path.join(cache_dir, 'leduc-holdem.pkl')
+            env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+            tree = compile_game_tree(env, cache_path=cache_path)
+            self.assertTrue(os.path.exists(cache_path))
+            cached_tree = compile_game_tree(env, cache_path=cache_path)
+            self.assertEqual(cached_tree.node_num, tree.node_num)
+            self.assertEqual(cached_tree.infoset_keys, tree.infoset_keys)
+            np.testing.assert_array_equal(cached_tree.payoffs, tree.payoffs)
+
+            # A tree cached for other settings of the env is compiled again
+            env = rlcard.make('leduc-holdem', config={'allow_step_back':True, 'infoset_key':True})
+            tree = compile_game_tree(env, cache_path=cache_path)
+            self.assertTrue(tree.infoset_key)
+            env = rlcard.make('leduc-holdem', config={'allow_step_back':True, 'infoset_key':True, 'suit_isomorphism':True})
+            isomorphic_tree = compile_game_tree(env, cache_path=cache_path)
+            self.assertTrue(isomorphic_tree.suit_isomorphism)
+            self.assertLess(isomorphic_tree.infoset_num, tree.infoset_num)
+            env = rlcard.make('leduc-holdem', config={'allow_step_back':True, 'infoset_key':True, 'chance_nodes':True})
+            self.assertTrue(compile_game_tree(env, cache_path=cache_path).chance_nodes)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_compile_from_current_state(self):
+        env = rlcard.make('simple-doudizhu', config={'allow_step_back':True, 'seed': 0})
+        with self.assertRaises(ValueError):
+            compile_game_tree(env)
+
+        # An endgame reached by always taking the action with the smallest
+        # id, which does not depend on the order of the legal actions
+        env.reset()
+        def card_num():
+            return sum(len(cards) for cards in env.get_perfect_information()['hand_cards'])
+        while card_num() > 11:
+            env.step(min(env.get_state(env.get_player_id())['legal_actions']))
+        player_id = env.get_player_id()
+        hand_cards = env.get_perfect_information()['hand_cards']
+        tree = compile_game_tree(env, from_current_state=True, max_nodes=10000)
+        self.assertEqual(tree.node_num, 643)
+        self.assertEqual(tree.node_types[0], DECISION)
+        self.assertEqual(tree.players[0], player_id)
+        self.assertEqual(env.get_perfect_information()['hand_cards'], hand_cards)
+
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True, 'seed': 0})
+        env.reset()
+        player_id = env.get_player_id()
+        tree = compile_game_tree(env, from_current_state=True)
+        self.assertEqual(tree.node_types[0], DECISION)
+        self.assertEqual(tree.players[0], player_id)
+        self.assertEqual(env.get_player_id(), player_id)
+        self.assertLess(tree.node_num, compile_game_tree(env).node_num)
+
+    def test_compile_with_chance_nodes(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True, 'chance_nodes':True})
+        tree = compile_game_tree(env)
+        deal_tree = compile_game_tree(rlcard.make('leduc-holdem', config={'allow_step_back':True}))
+        self.assertEqual(tree.node_types[0], CHANCE)
+        self.assertEqual(set(tree.infoset_keys), set(deal_tree.infoset_keys))
+        # The public card is only dealt if the game reaches the second round
+        self.assertLess(tree.node_num, deal_tree.node_num)
+        parents = tree.edge_parents
+        for node in np.nonzero(tree.node_types == CHANCE)[0]:
+            np.testing.assert_allclose(tree.chance_probs[parents == node].sum(), 1.0)
+
+        # The same policy has the same values in both trees
+        np_random = np.random.RandomState(0)
+        policy = {(player, key): np_random.rand(env.action_num)
+                  for player, key in zip(deal_tree.infoset_players, deal_tree.infoset_keys)}
+        def policy_matrix(tree):
+            return np.array([policy[(player, key)] for player, key in zip(tree.infoset_players, tree.infoset_keys)])
+        np.testing.assert_allclose(tree.expected_payoffs(policy_matrix(tree)),
+                                   deal_tree.expected_payoffs(policy_matrix(deal_tree)))
+
+    def test_max_nodes(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        with self.assertRaises(ValueError):
+            compile_game_tree(env, max_nodes=100)
+
+    def test_no_step_back(self):
+        env = rlcard.make('leduc-holdem')
+        with self.assertRaises(ValueError):
+            compile_game_tree(env)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,7 @@ import itertools
 import unittest
 
 from rlcard.games.limitholdem.judger import LimitholdemJudger
-from rlcard.games.limitholdem.utils import compare_hands
+from rlcard.games.limitholdem.utils import compare_hands, canonicalize_cards
 from rlcard.games.limitholdem.utils import Hand as Hand
 import numpy as np
 ''' Combinations selected for testing compare_hands function
@@ -291,6 +291,32 @@ class TestHoldemUtils(unittest.TestCase):
                                 ])
         self.assertEqual(winner, [0, 0, 1, 1])
 
+    def test_canonicalize_cards(self):
+        deck = [suit + rank for suit in 'SHDC' for rank in 'A23456789TJQK']
+        hands = set(tuple(canonicalize_cards(list(hand))[0]) for hand in itertools.combinations(deck, 2))
+        self.assertEqual(len(hands), 169)
+        self.assertEqual(canonicalize_cards(['HK', 'HA']), (['SA', 'SK'], []))
+        self.assertEqual(canonicalize_cards(['DK', 'CA']), (['SA', 'HK'], []))
+
+        np_random = np.random.RandomState(0)
+        permutations = list(itertools.permutations('SHDC'))
+        for _ in range(200):
+            cards = list(np_random.choice(deck, 7, replace=False))
+            public_num = np_random.choice([0, 3, 4, 5])
+            hand, public_cards = cards[:2], cards[2:2+public_num]
+            canonical = canonicalize_cards(hand, public_cards)
+            suit_map = dict(zip('SHDC', permutations[np_random.randint(len(permutations))]))
+            permuted_hand = [suit_map[card[0]] + card[1] for card in reversed(hand)]
+            permuted_public_cards = [suit_map[card[0]] + card[1] for card in public_cards]
+            permuted_public_cards[:3] = permuted_public_cards[:3][::-1]
+            self.assertEqual(canonicalize_cards(permuted_hand, permuted_public_cards), canonical)
+            # The canonical cards are in the same class, so the strength is kept
+            self.assertEqual(sorted(card[1] for card in canonical[0]), sorted(card[1] for card in hand))
+
+        # The order of the rounds is kept
+        self.assertNotEqual(canonicalize_cards(['SA', 'SK'], ['S2', 'H3', 'H4', 'S5']),
+                            canonicalize_cards(['SA', 'SK'], ['S2', 'H3', 'S5', 'H4']))
+
     def test_split_pots_among_players(self):
         j = LimitholdemJudger(np.random.RandomState(seed=7))
 
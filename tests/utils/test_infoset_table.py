@@ -0,0 +1,89 @@
+import unittest
+import pickle
+import numpy as np
+
+from rlcard.utils.infoset_table import InfosetTable
+
+class TestInfosetTable(unittest.TestCase):
+
+    def test_get_id(self):
+        table = InfosetTable(3, capacity=2)
+        ids = [table.get_id(key) for key in ['a', 'b', 'c', 'a', 'd', 'e']]
+        self.assertEqual(ids, [0, 1, 2, 0, 3, 4])
+        self.assertEqual(len(table), 5)
+        self.assertGreaterEqual(len(table.regrets), 5)
+        self.assertEqual(table.find('c'), 2)
+        self.assertEqual(table.find('f'), -1)
+        self.assertNotIn('f', table)
+
+    def test_grow_keeps_rows(self):
+        table = InfosetTable(2, capacity=1)
+        table.regrets[table.get_id('a')] = [1.0, 2.0]
+        table.get_id('b')
+        table.get_id('c')
+        np.testing.assert_array_equal(table.regrets[0], [1.0, 2.0])
+        np.testing.assert_array_equal(table.policy[2], [0.5, 0.5])
+
+    def test_truncate(self):
+        table = InfosetTable(2)
+        for key in ['a', 'b', 'c']:
+            table.regrets[table.get_id(key)] = [1.0, -1.0]
+        table.truncate(1)
+        self.assertEqual(len(table), 1)
+        self.assertNotIn('b', table)
+        self.assertEqual(table.get_id('c'), 1)
+        np.testing.assert_array_equal(table.regrets[1], [0.0, 0.0])
+
+    def test_update_policy(self):
+        table = InfosetTable(3)
+        regrets = [[1.0, -2.0, 3.0], [-1.0, -1.0, 0.0], [0.0, 2.0, 0.0]]
+        for i, regret in enumerate(regrets):
+            table.regrets[table.get_id(i)] = regret
+        table.update_policy()
+        np.testing.assert_allclose(table.policy[:3], [[0.25, 0.0, 0.75], [1/3, 1/3, 1/3], [0.0, 1.0, 0.0]])
+
+    def test_floor_regrets(self):
+        table = InfosetTable(3)
+        table.regrets[table.get_id('a')] = [1.0, -2.0, 0.0]
+        table.floor_regrets()
+        np.testing.assert_array_equal(table.regrets[0], [1.0, 0.0, 0.0])
+
+    def test_discount(self):
+        table = InfosetTable(2)
+        infoset_id = table.get_id('a')
+        table.regrets[infoset_id] = [2.0, -2.0]
+        table.strategy_sums[infoset_id] = [4.0, 8.0]
+        table.discount(0.5, 0.25, 0.75)
+        np.testing.assert_allclose(table.regrets[infoset_id], [1.0, -0.5])
+        np.testing.assert_allclose(table.strategy_sums[infoset_id], [3.0, 6.0])
+
+    def test_average_policy(self):
+        table = InfosetTable(2)
+        table.strategy_sums[table.get_id('a')] = [1.0, 3.0]
+        table.get_id('b')
+        np.testing.assert_allclose(table.average_policy(), [[0.25, 0.75], [0.5, 0.5]])
+
+    def test_view(self):
+        table = InfosetTable(2)
+        table.regrets[table.get_id('a')] = [1.0, 2.0]
+        view = table.view('regrets')
+        self.assertEqual(len(view), 1)
+        self.assertIn('a', view)
+        self.assertEqual(list(view), ['a'])
+        np.testing.assert_array_equal(view['a'], [1.0, 2.0])
+        with self.assertRaises(KeyError):
+            view['b']
+
+    def test_pickle(self):
+        table = InfosetTable(2)
+        for key in ['a', 'b', 'c']:
+            table.regrets[table.get_id(key)] = [1.0, -1.0]
+        new_table = pickle.loads(pickle.dumps(table))
+        self.assertEqual(len(new_table), 3)
+        self.assertEqual(len(new_table.regrets), 3)
+        self.assertEqual(new_table.find('b'), 1)
+        self.assertEqual(new_table.get_id('d'), 3)
+        np.testing.assert_array_equal(new_table.regrets[2], [1.0, -1.0])
+
+if __name__ == '__main__':
+    unittest.main()
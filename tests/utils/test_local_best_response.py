@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+
+import rlcard
+from rlcard.agents.random_agent import RandomAgent
+from rlcard.utils.local_best_response import LocalBestResponse, lbr_exploitability
+
+class BatchRandomAgent(RandomAgent):
+    ''' A random agent that records the sizes of the batches it evaluates
+    '''
+
+    def __init__(self, action_num):
+        super().__init__(action_num)
+        self.batch_sizes = []
+
+    def batch_eval_step(self, states):
+        self.batch_sizes.append(len(states))
+        return super().batch_eval_step(states)
+
+class KeyedRandomAgent(RandomAgent):
+    ''' A random agent that requires the infoset keys in the states
+    '''
+
+    def eval_step(self, state):
+        if 'infoset_key' not in state:
+            raise ValueError('The state has no infoset key')
+        return super().eval_step(state)
+
+class TestLocalBestResponse(unittest.TestCase):
+
+    def test_play(self):
+        env = rlcard.make('no-limit-holdem', config={'allow_step_back':True, 'seed':0})
+        lbr = LocalBestResponse(env, RandomAgent(env.action_num), range_size=20, rollout_num=10, seed=0)
+        for player_id in range(2):
+            payoff = lbr.play(player_id)
+            self.assertTrue(env.is_over())
+            self.assertEqual(payoff, env.get_payoffs()[player_id])
+
+    def test_play_batch_eval_step(self):
+        env = rlcard.make('no-limit-holdem', config={'allow_step_back':True, 'seed':0})
+        agent = BatchRandomAgent(env.action_num)
+        lbr = LocalBestResponse(env, agent, range_size=20, rollout_num=10, seed=0)
+        for player_id in range(2):
+            lbr.play(player_id)
+        # The hands of the belief are evaluated in one batch
+        self.assertGreater(len(agent.batch_sizes), 0)
+        self.assertEqual(max(agent.batch_sizes), 20)
+
+    def test_unsupported_env(self):
+        env = rlcard.make('leduc-holdem', config={'allow_step_back':True})
+        with self.assertRaises(ValueError):
+            LocalBestResponse(env, RandomAgent(env.action_num))
+        env = rlcard.make('no-limit-holdem')
+        with self.assertRaises(ValueError):
+            LocalBestResponse(env, RandomAgent(env.action_num))
+
+    def test_lbr_exploitability(self):
+        env = rlcard.make('no-limit-holdem')
+        agent = RandomAgent(env.action_num)
+        value, interval = lbr_exploitability(env, agent, 10, range_size=20, rollout_num=10, seed=0)
+        self.assertGreater(interval, 0)
+        self.assertEqual(lbr_exploitability(env, agent, 10, range_size=20, rollout_num=10, seed=0), (value, interval))
+
+    def test_lbr_exploitability_env_config(self):
+        env = rlcard.make('no-limit-holdem', config={'infoset_key':True})
+        value, _ = lbr_exploitability(env, KeyedRandomAgent(env.action_num), 2, range_size=5, rollout_num=5, seed=0)
+        self.assertTrue(np.isfinite(value))
+
+    def test_lbr_exploitability_with_processes(self):
+        env = rlcard.make('no-limit-holdem')
+        value, interval = lbr_exploitability(env, RandomAgent(env.action_num), 4, process_num=2, range_size=10, rollout_num=5, seed=0)
+        self.assertTrue(np.isfinite(value))
+        self.assertGreaterEqual(interval, 0)
+        # The workers seed the global generators that the random agent uses
+        self.assertEqual(lbr_exploitability(env, RandomAgent(env.action_num), 4, process_num=2, range_size=10, rollout_num=5, seed=0), (value, interval))
+
+if __name__ == '__main__':
+    unittest.main()
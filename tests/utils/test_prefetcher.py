@@ -0,0 +1,54 @@
+import unittest
+import gc
+import threading
+
+from rlcard.utils.prefetcher import Prefetcher
+
+class TestPrefetcher(unittest.TestCase):
+
+    def test_get(self):
+        counter = iter(range(100))
+        prefetcher = Prefetcher(lambda: next(counter), queue_size=3)
+        self.assertEqual([prefetcher.get() for _ in range(10)], list(range(10)))
+        prefetcher.close()
+        self.assertFalse(prefetcher.thread.is_alive())
+
+    def test_queue_size(self):
+        calls = []
+        prefetched = threading.Event()
+        def sample():
+            calls.append(len(calls))
+            if len(calls) == 3:
+                prefetched.set()
+            return calls[-1]
+        prefetcher = Prefetcher(sample, queue_size=2)
+        prefetched.wait(5)
+        # Two batches are in the queue and the thread waits to put the third
+        prefetcher.thread.join(0.3)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(prefetcher.get(), 0)
+        prefetcher.close()
+
+    def test_error(self):
+        def sample():
+            raise ValueError('empty buffer')
+        prefetcher = Prefetcher(sample)
+        with self.assertRaises(ValueError):
+            prefetcher.get()
+        prefetcher.close()
+
+    def test_weak_method(self):
+        class Sampler(object):
+            def sample(self):
+                return 0
+        sampler = Sampler()
+        prefetcher = Prefetcher(sampler.sample)
+        self.assertEqual(prefetcher.get(), 0)
+        # The thread does not keep the sampler alive
+        del sampler
+        gc.collect()
+        prefetcher.thread.join(5)
+        self.assertFalse(prefetcher.thread.is_alive())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import unittest
+import collections
+import pickle
+import numpy as np
+
+from rlcard.utils.replay_memory import Memory, SumTree, PrioritizedMemory, ReservoirBuffer, FixedSizeRingBuffer
+
+Element = collections.namedtuple('Element', 'info_state iteration probs')
+
+class TestReplayMemory(unittest.TestCase):
+
+    def test_save(self):
+        memory = Memory(3, 2, action_num=4)
+        for i in range(5):
+            memory.save(np.full(2, i), i, float(i), np.full(2, i + 1), i % 2 == 0, [i % 4])
+        self.assertEqual(len(memory), 3)
+
+        # The oldest transitions are overwritten
+        self.assertEqual(sorted(memory.actions.tolist()), [2, 3, 4])
+        for i in range(3):
+            action = memory.actions[i]
+            self.assertTrue((memory.states[i] == action).all())
+            self.assertTrue((memory.next_states[i] == action + 1).all())
+            self.assertEqual(memory.rewards[i], action)
+            self.assertEqual(memory.dones[i], action % 2 == 0)
+            self.assertEqual(np.nonzero(memory.legal_actions[i])[0].tolist(), [action % 4])
+
+    def test_sample(self):
+        memory = Memory(10, 4, action_num=3)
+        for i in range(10):
+            memory.save(np.full((2, 2), i), i, float(i), np.full((2, 2), -i), False)
+        state_batch, action_batch, reward_batch, next_state_batch, done_batch, legal_actions_batch = memory.sample()
+        self.assertEqual(state_batch.shape, (4, 2, 2))
+        self.assertEqual(len(set(action_batch.tolist())), 4)
+        self.assertTrue((state_batch[:, 0, 0] == action_batch).all())
+        self.assertTrue((next_state_batch[:, 0, 0] == -action_batch).all())
+        self.assertTrue((reward_batch == action_batch).all())
+        self.assertFalse(done_batch.any())
+        self.assertTrue(legal_actions_batch.all())
+
+        memory = Memory(10, 2)
+        memory.save(np.zeros(2), 0, 0.0, np.zeros(2), True)
+        memory.save(np.zeros(2), 1, 0.0, np.zeros(2), True)
+        self.assertIsNone(memory.sample()[5])
+
+    def test_pack_obs(self):
+        memory = Memory(10, 4, pack_obs=True)
+        states = np.random.randint(2, size=(10, 6, 5, 15))
+        for i in range(10):
+            memory.save(states[i], i, 0.0, 1 - states[i], False)
+        self.assertEqual(memory.states.shape, (10, 57))
+        self.assertEqual(memory.states.dtype, np.uint8)
+        state_batch, action_batch, _, next_state_batch, _, _ = memory.sample()
+        self.assertEqual(state_batch.dtype, states.dtype)
+        self.assertTrue((state_batch == states[action_batch]).all())
+        self.assertTrue((next_state_batch == 1 - states[action_batch]).all())
+
+        with self.assertRaises(ValueError):
+            memory.save(np.full((6, 5, 15), 2), 0, 0.0, states[0], False)
+
+    def test_dedup_next_state(self):
+        for pack_obs in [False, True]:
+            memory = Memory(5, 5, pack_obs=pack_obs, dedup_next_state=True)
+            self.assertIsNone(memory.next_states)
+            # Episodes of three transitions whose last next states are terminal
+            episode_states = []
+            for episode in range(4):
+                states = np.random.randint(2, size=(4, 8)).astype(np.float32)
+                for i in range(3):
+                    memory.save(states[i], len(episode_states), 0.0, states[i+1], i == 2)
+                    episode_states.append((states[i], states[i+1]))
+                # Only the terminal next states that are overwritten are freed
+                self.assertLessEqual(len(memory.next_state_overflow), 2)
+                memory.batch_size = len(memory)
+                state_batch, action_batch, _, next_state_batch, done_batch, _ = memory.sample()
+                self.assertEqual(sorted(action_batch.tolist()), list(range(len(episode_states)))[-5:])
+                for state, action, next_state in zip(state_batch, action_batch, next_state_batch):
+                    self.assertTrue((state == episode_states[action][0]).all())
+                    self.assertTrue((next_state == episode_states[action][1]).all())
+
+    def test_sum_tree(self):
+        tree = SumTree(5)
+        tree.update(np.arange(5), [1.0, 2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(tree.total(), 15.0)
+        self.assertEqual(tree.find([0.0, 0.5, 1.0, 2.9, 3.0, 9.9, 10.0, 14.9]).tolist(), [0, 0, 1, 1, 2, 3, 4, 4])
+
+        tree.update([1, 3, 1], [0.0, 1.0, 6.0])
+        self.assertEqual(tree.total(), 16.0)
+        self.assertEqual(tree.get([1, 3]).tolist(), [6.0, 1.0])
+        self.assertEqual(tree.find([6.9, 10.9, 11.0]).tolist(), [1, 3, 4])
+
+    def test_prioritized_sample(self):
+        np.random.seed(0)
+        memory = PrioritizedMemory(8, 4, action_num=2, alpha=1.0, epsilon=0.0)
+        for i in range(6):
+            memory.save(np.full(2, i), i, 0.0, np.zeros(2), False)
+        # New transitions have the maximum priority
+        self.assertEqual(memory.tree.total(), 6.0)
+
+        memory.update_priorities(np.arange(6), [0.0, 0.0, 0.0, 0.0, -1.0, 3.0])
+        self.assertEqual(memory.max_priority, 3.0)
+        counts = np.zeros(6)
+        for _ in range(100):
+            state_batch, action_batch, _, _, _, legal_actions_batch, weights, indexes, _ = memory.sample(beta=1.0)
+            self.assertTrue((action_batch == indexes).all())
+            self.assertTrue((state_batch[:, 0] == indexes).all())
+            self.assertEqual(legal_actions_batch.shape, (4, 2))
+            # The weights are inversely proportional to the priorities
+            self.assertTrue(np.allclose(weights, np.where(indexes == 5, 1.0 / 3, 1.0)))
+            counts += np.bincount(indexes, minlength=6)
+        self.assertEqual(counts[:4].sum(), 0)
+        self.assertEqual(counts[4], 100)
+        self.assertEqual(counts[5], 300)
+
+        memory.save(np.zeros(2), 6, 0.0, np.zeros(2), False)
+        self.assertEqual(memory.tree.get([6])[0], 3.0)
+
+        # The rows overwritten after sampling keep their new priorities
+        indexes, write_counts = memory.sample()[7:]
+        for i in range(8):
+            memory.save(np.zeros(2), i, 0.0, np.zeros(2), False)
+        memory.update_priorities(indexes, np.full(4, 10.0), write_counts)
+        self.assertEqual(memory.tree.get(indexes).tolist(), [3.0] * 4)
+        self.assertEqual(memory.max_priority, 3.0)
+
+    def test_reservoir_buffer(self):
+        np.random.seed(0)
+        buff = ReservoirBuffer(10)
+        for i in range(5):
+            buff.add(Element(np.full(3, i), i, np.full(2, 0.5)))
+        self.assertEqual(len(buff), 5)
+        self.assertEqual([element.iteration for element in buff], list(range(5)))
+        self.assertEqual(buff.columns[0].dtype, np.int64)
+        self.assertEqual(buff.columns[2].dtype, np.float32)
+
+        samples = buff.sample(3)
+        self.assertIsInstance(samples, Element)
+        self.assertEqual(samples.info_state.shape, (3, 3))
+        self.assertTrue(samples.info_state.flags['C_CONTIGUOUS'])
+        self.assertTrue((samples.info_state[:, 0] == samples.iteration).all())
+        with self.assertRaises(ValueError):
+            buff.sample(11)
+
+        # Each of the 1000 elements is kept with the same probability
+        counts = np.zeros(1000)
+        for _ in range(100):
+            buff = ReservoirBuffer(10)
+            buff.add_batch(np.arange(600))
+            for i in range(600, 1000):
+                buff.add(i)
+            counts[list(buff)] += 1
+        self.assertTrue(np.allclose(counts.reshape(4, 250).sum(axis=1), 250, rtol=0.2))
+
+        buff = pickle.loads(pickle.dumps(buff))
+        self.assertEqual(len(buff), 10)
+        buff.clear()
+        self.assertEqual(len(buff), 0)
+
+    def test_packed_fields(self):
+        buff = ReservoirBuffer(10, packed_fields=['info_state'])
+        info_states = np.random.randint(2, size=(6, 7, 4, 15))
+        buff.add(Element(info_states[0], 0, np.full(3, 0.5)))
+        buff.add_batch(Element(info_states[1:], np.arange(1, 6), np.full((5, 3), 0.5)))
+        self.assertEqual(buff.columns[0].shape, (10, 53))
+        samples = buff.sample(6)
+        self.assertEqual(samples.info_state.dtype, info_states.dtype)
+        self.assertTrue((samples.info_state == info_states[samples.iteration]).all())
+        for element in buff:
+            self.assertTrue((element.info_state == info_states[element.iteration]).all())
+
+        with self.assertRaises(ValueError):
+            buff.add(Element(np.full((7, 4, 15), 0.5), 0, np.full(3, 0.5)))
+
+    def test_fixed_size_ring_buffer(self):
+        buf = FixedSizeRingBuffer(4)
+        buf.add_batch(Element(np.zeros((3, 2)), np.arange(3), np.zeros((3, 2))))
+        buf.add(Element(np.ones(2), 3, np.ones(2)))
+        buf.add(Element(np.ones(2), 4, np.ones(2)))
+        self.assertEqual(sorted(element.iteration for element in buf), [1, 2, 3, 4])
+
+        # Only the last elements of a large batch are kept
+        buf.add_batch(Element(np.zeros((6, 2)), np.arange(10, 16), np.zeros((6, 2))))
+        self.assertEqual(sorted(element.iteration for element in buf), [12, 13, 14, 15])
+        self.assertEqual(sorted(buf.sample(4).iteration.tolist()), [12, 13, 14, 15])
+
+if __name__ == '__main__':
+    unittest.main()